@@ -1,12 +1,21 @@
 # See: https://github.com/EDCD/EDMarketConnector/blob/main/PLUGINS.md
-# Use: from _logger import logger
+# Use per component: from _logger import get_logger; logger = get_logger("table")
 
 import logging
+import logging.handlers
 import os
+import queue
+import threading
+import time
 
-from config import appname
+from config import appname, config
+
+DEFAULT_LOG_LEVEL = logging.INFO
+# Config key (or environment variable) with levels, like "INFO,journal=DEBUG,table=WARNING".
+# The first item without "=" sets level of the whole plugin.
+LOG_LEVELS_CONFIG_KEY = "fc_companion_log_levels"
+LOG_LEVELS_ENV_VAR = "FC_COMPANION_LOG_LEVELS"
 
-DEFAULT_LOG_LEVEL = logging.DEBUG
 # This could also be returned from plugin_start3()
 plugin_name = os.path.basename(os.path.dirname(__file__))
 
@@ -16,15 +25,154 @@ plugin_name = os.path.basename(os.path.dirname(__file__))
 #     code, else the logger won't be properly set up.
 logger = logging.getLogger(f"{appname}.{plugin_name}")
 
-# If the Logger has handlers then it was already set up by the core code, else
-# it needs setting up here.
-if not logger.hasHandlers():
-    logger.setLevel(DEFAULT_LOG_LEVEL)
-    logger_channel = logging.StreamHandler()
-    logger_formatter = logging.Formatter(
-        f"%(asctime)s - %(name)s - %(levelname)s - %(module)s:%(lineno)d:%(funcName)s: %(message)s"
+
+class RateLimitFilter(logging.Filter):
+    """
+    Passes not more than one record per interval from the same call site.
+    Count of the dropped records is attached to the next passed one and appended to its message
+    by the listener's thread. Filter is called only for enabled levels, so it costs nothing for
+    disabled debug.
+    """
+
+    def __init__(self, interval_sec: float):
+        super().__init__()
+        self._interval_sec = interval_sec
+        self._mutex = threading.Lock()
+        # Key is (pathname, lineno), value is (last passed time, suppressed count).
+        self._sites: dict[tuple[str, int], tuple[float, int]] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        key = (record.pathname, record.lineno)
+        now = time.monotonic()
+        with self._mutex:
+            last, suppressed = self._sites.get(key, (0.0, 0))
+            if now - last < self._interval_sec:
+                self._sites[key] = (last, suppressed + 1)
+                return False
+            self._sites[key] = (now, 0)
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+
+class _RawQueueHandler(logging.handlers.QueueHandler):
+    """
+    Puts record into queue as is. Standard QueueHandler formats message on the calling thread,
+    here it is done by listener's handlers. So arguments must not be changed after logging call,
+    which is true for the plugin's records (strings, numbers and fresh objects).
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class _PluginQueueListener(logging.handlers.QueueListener):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        suppressed = getattr(record, "suppressed", 0)
+        if suppressed:
+            record.msg = f"{record.msg} ({suppressed} similar suppressed)"
+        return record
+
+
+def _parse_levels(spec: str) -> dict[str, int]:
+    """
+    Parses "INFO,journal=DEBUG" into {"": INFO, "journal": DEBUG}, malformed items are ignored.
+    """
+    levels: dict[str, int] = {}
+    for item in spec.split(","):
+        component, _, level_name = item.strip().rpartition("=")
+        level = logging.getLevelName(level_name.strip().upper())
+        if isinstance(level, int):
+            levels[component.strip()] = level
+    return levels
+
+
+def _configured_levels() -> dict[str, int]:
+    spec = (
+        os.environ.get(LOG_LEVELS_ENV_VAR)
+        or config.get_str(LOG_LEVELS_CONFIG_KEY)
+        or ""
     )
-    logger_formatter.default_time_format = "%Y-%m-%d %H:%M:%S"
-    logger_formatter.default_msec_format = "%s.%03d"
-    logger_channel.setFormatter(logger_formatter)
-    logger.addHandler(logger_channel)
+    return _parse_levels(spec)
+
+
+_levels = _configured_levels()
+
+
+def get_logger(component: str, rate_limit_sec: float = 0.0) -> logging.Logger:
+    """
+    Returns logger of the plugin's component, its level can be configured separately.
+    Parameters:
+        component: Short name of the component, like "journal" or "table".
+        rate_limit_sec: If positive, the same call site logs not more than once per this interval.
+    """
+    component_logger = logger.getChild(component)
+    if component in _levels:
+        component_logger.setLevel(_levels[component])
+    if not component_logger.filters:
+        # Core code's filters (if any) must see records of the children too.
+        for log_filter in logger.filters:
+            component_logger.addFilter(log_filter)
+        if rate_limit_sec > 0:
+            component_logger.addFilter(RateLimitFilter(rate_limit_sec))
+    return component_logger
+
+
+def _setup_queued_logging() -> logging.handlers.QueueListener:
+    """
+    Records are formatted and written by the listener's thread, so hot threads only put them into queue.
+    Handlers of the plugin's logger are moved behind the queue, ancestors' handlers are fed from it too.
+    """
+    if logger.hasHandlers():
+        # Already set up by the core code.
+        own_handlers = list(logger.handlers)
+        ancestors_handlers: list[logging.Handler] = []
+        parent = logger.parent if logger.propagate else None
+        while parent is not None:
+            ancestors_handlers.extend(parent.handlers)
+            parent = parent.parent if parent.propagate else None
+    else:
+        logger.setLevel(DEFAULT_LOG_LEVEL)
+        logger_channel = logging.StreamHandler()
+        logger_formatter = logging.Formatter(
+            f"%(asctime)s - %(name)s - %(levelname)s - %(module)s:%(lineno)d:%(funcName)s: %(message)s"
+        )
+        logger_formatter.default_time_format = "%Y-%m-%d %H:%M:%S"
+        logger_formatter.default_msec_format = "%s.%03d"
+        logger_channel.setFormatter(logger_formatter)
+        own_handlers = [logger_channel]
+        ancestors_handlers = []
+
+    if "" in _levels:
+        logger.setLevel(_levels[""])
+
+    for handler in own_handlers:
+        logger.removeHandler(handler)
+    _restore_on_stop.extend(own_handlers)
+    _restore_on_stop_propagate.append(logger.propagate)
+
+    log_queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+    listener = _PluginQueueListener(
+        log_queue, *own_handlers, *ancestors_handlers, respect_handler_level=True
+    )
+    logger.addHandler(_RawQueueHandler(log_queue))
+    logger.propagate = False
+    listener.start()
+    return listener
+
+
+_restore_on_stop: list[logging.Handler] = []
+_restore_on_stop_propagate: list[bool] = []
+_listener = _setup_queued_logging()
+
+
+def stop_logging() -> None:
+    """
+    Flushes queued records and returns to synchronous logging, called when plugin is unloaded.
+    """
+    _listener.stop()
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+    for handler in _restore_on_stop:
+        logger.addHandler(handler)
+    logger.propagate = _restore_on_stop_propagate[0]
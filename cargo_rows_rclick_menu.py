@@ -1,82 +1,155 @@
+import time
 import tkinter as tk
-from typing import Callable
-import webbrowser
 from carrier_cargo_position import CarrierCargoPosition
-from external_web_search import get_inara_commodity_url
+from carrier_helpers import CarrierIdentity
+from context_menu import (
+    ContextMenu,
+    MenuAction,
+    MenuItem,
+    MenuLazySubmenu,
+    MenuLink,
+    MenuSeparator,
+    MenuSubmenu,
+)
+from inara_links import InaraCommodityLinks
+from known_markets import KnownMarkets
+from nearest_buyers import NearestBuyers
 import translation
 
 
-class _MenuCommand:
-    def __init__(self, label: str, handler: Callable[[], None]):
-        self.label = label
-        self.handler = handler
-
-
-class _MenuSeparator:
-    """Marker class to insert separator into menu."""
-
-    pass
+def _age_text(updated: float) -> str:
+    minutes = int(time.time() - updated) // 60
+    if minutes < 60:
+        return translation.ptl(f"{minutes} min ago")
+    if minutes < 48 * 60:
+        return translation.ptl(f"{minutes // 60} h ago")
+    return translation.ptl(f"{minutes // (24 * 60)} d ago")
 
 
 class RightClickContextMenuForTable:
-    def __init__(self, parent: tk.Widget, carrier_cargo_position: CarrierCargoPosition):
+    NEAREST_BUYERS_COUNT = 10
+    KNOWN_BUYERS_COUNT = 15
+
+    def __init__(
+        self,
+        parent: tk.Widget,
+        carrier_cargo_position: CarrierCargoPosition,
+        origin_system: str = "",
+    ):
         self._parent = parent
         self._carrier_cargo_position: CarrierCargoPosition = carrier_cargo_position
-        self._menu = tk.Menu(self._parent, tearoff=0)
 
-        self._commands: list[_MenuCommand | _MenuSeparator] = [
-            _MenuCommand(
-                translation.ptl(f"Copy: {self._carrier_cargo_position.trade_name}"),
-                lambda: self._copy_to_clipboard(
-                    self._carrier_cargo_position.trade_name
-                ),
+        position = self._carrier_cargo_position
+        self._commands: list[MenuItem] = [
+            MenuAction(
+                translation.ptl(f"Copy: {position.trade_name}"),
+                lambda: self._copy_to_clipboard(position.trade_name),
             ),
-            _MenuCommand(
-                translation.ptl("Check on Inara"),
-                lambda: self._open_inara_search(
-                    self._carrier_cargo_position.trade_name
+        ]
+        if position.trade_name:
+            # Link is taken from local table, only unknown one is searched on Inara in background.
+            self._commands.append(
+                MenuLink(
+                    translation.ptl("Check on Inara"),
+                    f"commodity:{position.id or position.trade_name}",
+                    lambda: InaraCommodityLinks.lookup(
+                        position.id, position.trade_name
+                    ),
+                    lambda token: InaraCommodityLinks.resolve(
+                        position.id, position.trade_name, token
+                    ),
+                )
+            )
+        if position.id:
+            self._commands += [
+                MenuSubmenu(
+                    translation.ptl("Known buyers"),
+                    self._known_buyers_items(position),
                 ),
-            ),
-            _MenuSeparator(),
-            _MenuCommand(translation.ptl("Cancel/Close"), lambda: None),
+                MenuLazySubmenu(
+                    translation.ptl("Nearest buyers"),
+                    f"nearest:{position.id}:{origin_system}",
+                    lambda token: self._nearest_buyers_items(position, origin_system),
+                ),
+            ]
+        self._commands += [
+            MenuSeparator(),
+            MenuAction(translation.ptl("Cancel/Close"), lambda: None),
         ]
 
-        self._build_menu()
-
     def popup(self, event: tk.Event):
-        try:
-            self._menu.tk_popup(event.x_root, event.y_root)
-        finally:
-            self._menu.grab_release()
-
-    def _build_menu(self):
-        for cmd in self._commands:
-            if isinstance(cmd, _MenuCommand):
-                self._menu.add_command(label=cmd.label, command=cmd.handler)
-            else:
-                self._menu.add_separator()
-
-    def _copy_to_clipboard(self, text: str):
-        self._parent.clipboard_clear()
-        self._parent.clipboard_append(text)
+        ContextMenu.shared(self._parent).popup(event, self._commands)
 
-    def _open_inara_search(self, commodity_market_name: str):
+    def _known_buyers_items(
+        self, position: CarrierCargoPosition
+    ) -> list[MenuAction | MenuSeparator]:
         """
-        Opens Inara search for buying or selling the given commodity.
-        Uses the carrier's current location as search center.
+        Known markets buying the commodity, the best price first. Click copies system's name.
+        """
+        own_station = CarrierIdentity.call_sign()
+        buyers = sorted(
+            (
+                market
+                for market in KnownMarkets.buyers_of(position.id)
+                if market.station_name != own_station
+            ),
+            key=lambda m: -m.buys[position.id].price,
+        )[: type(self).KNOWN_BUYERS_COUNT]
+        if not buyers:
+            return [MenuAction(translation.ptl("No known buyers yet."), lambda: None)]
+        items: list[MenuAction | MenuSeparator] = []
+        for market in buyers:
+            buy = market.buys[position.id]
+            location = (
+                f"{market.station_name} | {market.system_name}"
+                if market.system_name
+                else market.station_name
+            )
+            items.append(
+                MenuAction(
+                    translation.ptl(
+                        f"{location}: {buy.price:,} Cr, demand {buy.demand:,}, "
+                        f"{_age_text(market.updated)}"
+                    ),
+                    lambda system=market.system_name or market.station_name: (
+                        self._copy_to_clipboard(system)
+                    ),
+                )
+            )
+        return items
+
+    def _nearest_buyers_items(
+        self, position: CarrierCargoPosition, origin_system: str
+    ) -> list[MenuAction | MenuSeparator]:
+        """
+        Known markets buying the commodity near the carrier, click copies system's name.
+        Called out of Tk thread, it waits for coordinates if those are still loading.
         """
 
-        if not commodity_market_name:
-            return
-        url = get_inara_commodity_url(commodity_market_name)
-        if not url:
-            return
-
-        type(self).open_url(url)
+        def note(text: str) -> list[MenuAction | MenuSeparator]:
+            return [MenuAction(text, lambda: None)]
+
+        if not origin_system:
+            return note(translation.ptl("Carrier's system is unknown."))
+        buyers = NearestBuyers.find(
+            position.id,
+            origin_system,
+            type(self).NEAREST_BUYERS_COUNT,
+            exclude_station=CarrierIdentity.call_sign(),
+        )
+        if not buyers:
+            return note(translation.ptl("No known buyers with known location."))
+        return [
+            MenuAction(
+                translation.ptl(
+                    f"{market.station_name} | {market.system_name}: {distance:,.0f} ly, "
+                    f"{market.buys[position.id].price:,} Cr"
+                ),
+                lambda system=market.system_name: self._copy_to_clipboard(system),
+            )
+            for market, distance in buyers
+        ]
 
-    @staticmethod
-    def open_url(url: str):
-        try:
-            webbrowser.open(url)
-        except Exception as e:
-            print(f"Failed to open browser: {e}")
+    def _copy_to_clipboard(self, text: str):
+        self._parent.clipboard_clear()
+        self._parent.clipboard_append(text)
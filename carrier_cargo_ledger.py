@@ -0,0 +1,208 @@
+import threading
+import time
+from typing import Any, Callable, ClassVar, Optional
+from cargo_names import MarketCatalogue
+from config import config
+from fleetcarriercargo import CargoTally
+from _logger import get_logger
+
+logger = get_logger("journal")
+
+LedgerKey = int | str
+
+
+def _ledger_key(commodity: str) -> LedgerKey:
+    """
+    Journal's "Type" and server's commodity name may differ, so both are matched by catalogue's id.
+    Commodity unknown to the catalogue is matched by lower cased name.
+    """
+    market = MarketCatalogue.explain_commodity(commodity)
+    return market.id if market and market.id else commodity.lower()
+
+
+class CarrierCargoLedger:
+    """
+    Local incremental changes of the carrier's cargo, built from the journal events.
+    Those are applied on top of the last tally received from the server, so the table
+    is updated right after in-game action without calling CAPI.
+    When server's tally is updated, changes made before the tally was requested are dropped,
+    later ones may be not included into it yet and are kept.
+    """
+
+    # Config key to override reconcile interval (minutes).
+    RECONCILE_INTERVAL_CONFIG_KEY: ClassVar[str] = "fc_companion_reconcile_minutes"
+    DEFAULT_RECONCILE_INTERVAL_MIN: ClassVar[int] = 30
+    # Request not answered for so long is lost, its time is not used then.
+    REQUEST_TIMEOUT_SEC: ClassVar[float] = 300.0
+
+    _mutex: ClassVar[threading.Lock] = threading.Lock()
+    # Changes since the last server's tally: (unix time, key, commodity name, delta).
+    _entries: ClassVar[list[tuple[float, LedgerKey, str, int]]] = []
+    # Sums of the entries per key.
+    _deltas: ClassVar[dict[LedgerKey, int]] = {}
+    # Unix time of the last request of server's tally not answered yet.
+    _requested_at: ClassVar[Optional[float]] = None
+    _drifted: ClassVar[bool] = False
+    _last_reconcile: ClassVar[float] = time.monotonic()
+    _handlers: ClassVar[list[Callable[[], None]]] = []
+
+    @classmethod
+    def add_on_ledger_change_handler(cls, handler: Callable[[], None]) -> None:
+        """
+        Handler is called when local ledger was changed by the journal event.
+        """
+        with cls._mutex:
+            cls._handlers.append(handler)
+
+    @classmethod
+    def apply_journal_event(
+        cls, entry: dict[str, Any], station: Optional[str], call_sign: str
+    ) -> bool:
+        """
+        Updates ledger from the journal event. Returns True if ledger was changed.
+        Parameters:
+            entry: Journal entry as EDMC gives it.
+            station: Station where commander is docked now.
+            call_sign: Own carrier's call sign.
+        """
+        event = entry.get("event")
+        on_own_carrier = bool(call_sign) and station == call_sign
+        changes: list[tuple[str, int]] = []
+
+        if event == "CargoTransfer":
+            if not on_own_carrier:
+                return False
+            for transfer in entry.get("Transfers", []):
+                direction = transfer.get("Direction")
+                count = int(transfer.get("Count", 0))
+                if direction == "tocarrier":
+                    changes.append((transfer.get("Type", ""), count))
+                elif direction == "toship":
+                    changes.append((transfer.get("Type", ""), -count))
+        elif event == "MarketBuy":
+            if not on_own_carrier:
+                return False
+            changes.append((entry.get("Type", ""), -int(entry.get("Count", 0))))
+        elif event == "MarketSell":
+            if not on_own_carrier:
+                return False
+            changes.append((entry.get("Type", ""), int(entry.get("Count", 0))))
+        elif event == "CarrierTradeOrder":
+            # Other commanders can trade with the orders without any events for us,
+            # so server's tally must be requested sooner.
+            cls.mark_drifted()
+            return False
+        else:
+            return False
+
+        changes = [(c, d) for c, d in changes if c and d]
+        if not changes:
+            return False
+
+        now = time.time()
+        keyed = [(_ledger_key(c), c, d) for c, d in changes]
+        with cls._mutex:
+            for key, commodity, delta in keyed:
+                cls._entries.append((now, key, commodity, delta))
+                cls._deltas[key] = cls._deltas.get(key, 0) + delta
+            handlers = list(cls._handlers)
+        logger.debug("Carrier cargo ledger updated by %s: %s", event, changes)
+        for handler in handlers:
+            handler()
+        return True
+
+    @classmethod
+    def adjusted_items(cls, cargo: CargoTally) -> list[tuple[Any, str, int]]:
+        """
+        Returns server's tally corrected by the local ledger as list of (cargo_key or None, commodity, quantity).
+        Commodities known only by ledger have None as cargo_key. Empty positions are excluded.
+        """
+        with cls._mutex:
+            deltas = dict(cls._deltas)
+            names = {key: commodity for _, key, commodity, _ in cls._entries}
+
+        result: list[tuple[Any, str, int]] = []
+        for cargo_key, amount in cargo.items():
+            commodity: str = cargo_key.commodity
+            delta = deltas.pop(_ledger_key(commodity), 0) if deltas else 0
+            quantity = amount + delta
+            if quantity < 0:
+                cls.mark_drifted()
+            if quantity > 0:
+                result.append((cargo_key, commodity, quantity))
+
+        for key, delta in deltas.items():
+            if delta < 0:
+                cls.mark_drifted()
+            elif delta > 0:
+                result.append((None, names[key], delta))
+        return result
+
+    @classmethod
+    def mark_drifted(cls) -> None:
+        """
+        Ledger cannot be trusted anymore, server's tally should be requested.
+        """
+        with cls._mutex:
+            if not cls._drifted:
+                logger.debug("Carrier cargo ledger drifted from server's tally.")
+            cls._drifted = True
+
+    @classmethod
+    def needs_reconcile(cls) -> bool:
+        """
+        Returns True if server's tally should be requested: ledger drifted or it keeps
+        local changes for longer than configured interval.
+        """
+        with cls._mutex:
+            if cls._drifted:
+                return True
+            if not cls._deltas:
+                return False
+            elapsed = time.monotonic() - cls._last_reconcile
+        interval_min = (
+            config.get_int(cls.RECONCILE_INTERVAL_CONFIG_KEY)
+            or cls.DEFAULT_RECONCILE_INTERVAL_MIN
+        )
+        return elapsed > interval_min * 60
+
+    @classmethod
+    def mark_reconcile_requested(cls) -> None:
+        """
+        Prevents repeating requests to the server until the next interval.
+        Changes made before the request are expected in the server's answer.
+        """
+        with cls._mutex:
+            cls._drifted = False
+            cls._last_reconcile = time.monotonic()
+            cls._requested_at = time.time()
+
+    @classmethod
+    def reset(cls) -> None:
+        """
+        Server's tally was updated. If plugin requested it, only changes made before the request
+        are dropped: server's answer may be older than the later ones. Tally which came without
+        plugin's request is taken as the current one, there is no time to compare with.
+        Handlers are not called, caller repaints with the new tally anyway.
+        """
+        with cls._mutex:
+            tally_time = cls._requested_at
+            if tally_time is not None and (
+                time.time() - tally_time > cls.REQUEST_TIMEOUT_SEC
+            ):
+                tally_time = None
+            if tally_time is None:
+                cls._entries.clear()
+            else:
+                cls._entries = [e for e in cls._entries if e[0] > tally_time]
+            cls._deltas.clear()
+            for _, key, _, delta in cls._entries:
+                cls._deltas[key] = cls._deltas.get(key, 0) + delta
+            if cls._entries:
+                logger.debug(
+                    "Server's tally is older than %d ledger changes, those are kept.",
+                    len(cls._entries),
+                )
+            cls._requested_at = None
+            cls._drifted = False
+            cls._last_reconcile = time.monotonic()
@@ -1,16 +1,149 @@
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, ClassVar, Optional
 from fleetcarriercargo import FleetCarrierCargo, CargoTally
+from _logger import get_logger
 
+logger = get_logger("carrier")
 
-def get_carrier_name() -> str:
+
+class CarrierIdentity:
     """
-    Returns carrier's call sign or empty string if it is not known yet.
+    Cached carrier's call sign.
+    It is read from FleetCarrierCargo once and refreshed only when carrier signals cargo change,
+    so reading it is O(1) and does not touch carrier's inventory.
     """
-    carrier_name: str = ""
 
-    def get_name(call_sign: str | None, cargo: CargoTally):
-        nonlocal carrier_name
-        carrier_name = call_sign or ""
-        return False
+    _mutex: ClassVar[threading.Lock] = threading.Lock()
+    _call_sign: ClassVar[Optional[str]] = None
+    _subscribed: ClassVar[bool] = False
+    _handlers: ClassVar[list[Callable[[str], None]]] = []
+
+    @classmethod
+    def call_sign(cls) -> str:
+        """
+        Returns carrier's call sign or empty string if it is not known yet.
+        """
+        call_sign = cls._call_sign
+        if call_sign is None:
+            call_sign = cls._refresh()
+        return call_sign
+
+    @classmethod
+    def add_on_identity_change_handler(cls, handler: Callable[[str], None]) -> None:
+        """
+        Adds handler which is called with new call sign when carrier's identity changes
+        (for example, when the first CAPI fetch made it known).
+        Handler may be called from any thread.
+        """
+        cls._ensure_subscribed()
+        with cls._mutex:
+            cls._handlers.append(handler)
+
+    @classmethod
+    def _ensure_subscribed(cls) -> None:
+        with cls._mutex:
+            if cls._subscribed:
+                return
+            cls._subscribed = True
+        FleetCarrierCargo.add_on_cargo_change_handler(cls._refresh)
+
+    @classmethod
+    def _refresh(cls) -> str:
+        """
+        Re-reads call sign from the carrier and notifies handlers if it was changed.
+        """
+        cls._ensure_subscribed()
+        new_call_sign: str = ""
+
+        def get_name(call_sign: str | None, cargo: CargoTally):
+            nonlocal new_call_sign
+            new_call_sign = call_sign or ""
+            return False
+
+        FleetCarrierCargo.inventory(get_name)
+
+        with cls._mutex:
+            old_call_sign = cls._call_sign
+            cls._call_sign = new_call_sign
+            handlers = list(cls._handlers)
+
+        if old_call_sign is not None and old_call_sign != new_call_sign:
+            logger.debug(
+                "Carrier identity changed from '%s' to '%s'.",
+                old_call_sign,
+                new_call_sign,
+            )
+            for handler in handlers:
+                handler(new_call_sign)
+        return new_call_sign
+
+
+class CarrierPosition:
+    """
+    Star system of the own carrier, from the journal: CarrierLocation (written on game's start),
+    CarrierJump (commander is aboard) and scheduled jumps (CarrierJumpRequest, CarrierJumpCancelled).
+    Once departure time of the scheduled jump passes, carrier is considered to be in its destination.
+    """
+
+    _mutex: ClassVar[threading.Lock] = threading.Lock()
+    _system: ClassVar[str] = ""
+    # Market id of the own carrier, to skip jumps of other carriers commander is docked at.
+    _carrier_id: ClassVar[Optional[int]] = None
+    # (destination, unix time of departure) of the scheduled jump.
+    _jump: ClassVar[Optional[tuple[str, float]]] = None
+
+    @classmethod
+    def system(cls) -> str:
+        """
+        Returns carrier's system or empty string if it is not known.
+        """
+        with cls._mutex:
+            if cls._jump is not None and time.time() >= cls._jump[1]:
+                cls._system = cls._jump[0]
+                cls._jump = None
+            return cls._system
+
+    @classmethod
+    def apply_journal_event(
+        cls, event: str, entry: dict[str, Any], call_sign: str
+    ) -> None:
+        """
+        Updates position from carrier's journal event, other events are ignored.
+        """
+        if entry.get("CarrierType", "FleetCarrier") != "FleetCarrier":
+            # Squadron's carrier.
+            return
+        with cls._mutex:
+            if event == "CarrierLocation":
+                cls._carrier_id = entry.get("CarrierID", cls._carrier_id)
+                cls._system = entry.get("StarSystem") or cls._system
+                cls._jump = None
+            elif event == "CarrierJump":
+                own = (
+                    entry.get("MarketID") == cls._carrier_id
+                    if cls._carrier_id is not None
+                    else bool(call_sign) and entry.get("StationName") == call_sign
+                )
+                if own and entry.get("StarSystem"):
+                    cls._system = entry["StarSystem"]
+                    cls._jump = None
+            elif event == "CarrierJumpRequest":
+                cls._carrier_id = entry.get("CarrierID", cls._carrier_id)
+                departure = _parse_journal_time(entry.get("DepartureTime"))
+                if entry.get("SystemName") and departure is not None:
+                    cls._jump = (entry["SystemName"], departure)
+            elif event == "CarrierJumpCancelled":
+                cls._jump = None
+
 
-    FleetCarrierCargo.inventory(get_name)
-    return carrier_name
+def _parse_journal_time(value: Optional[str]) -> Optional[float]:
+    try:
+        return (
+            datetime.strptime(value or "", "%Y-%m-%dT%H:%M:%SZ")
+            .replace(tzinfo=timezone.utc)
+            .timestamp()
+        )
+    except ValueError:
+        return None
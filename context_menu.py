@@ -0,0 +1,276 @@
+import tkinter as tk
+from typing import Any, Callable, ClassVar, Optional
+from _logger import get_logger
+from task_runner import CancelToken, LatestWinsTaskRunner
+import translation
+
+logger = get_logger("web")
+
+PENDING_SUFFIX = " …"
+
+
+def open_url(url: str):
+    import webbrowser
+
+    try:
+        webbrowser.open(url)
+    except Exception as e:
+        logger.error("Failed to open browser: %s", e)
+
+
+class MenuAction:
+    def __init__(self, label: str, handler: Callable[[], None]):
+        self.label = label
+        self.handler = handler
+
+
+class MenuLink:
+    """
+    Menu item opening web page, which URL may need web search.
+
+    lookup() must be cheap (local tables only) and returns (known, url), url is None if it is known
+    there is no page. It returns None while local tables are still loading, item is shown pending.
+    resolve(token) may go to the network, it is called out of Tk thread.
+    Key identifies the page, the same key in different menus is resolved once.
+    """
+
+    def __init__(
+        self,
+        label: str,
+        key: str,
+        lookup: Callable[[], Optional[tuple[bool, Optional[str]]]],
+        resolve: Callable[[CancelToken], Optional[str]],
+    ):
+        self.label = label
+        self.key = key
+        self.lookup = lookup
+        self.resolve = resolve
+
+
+class MenuSeparator:
+    """Marker class to insert separator into menu."""
+
+    pass
+
+
+class MenuSubmenu:
+    """
+    Cascade of plain actions, built each time menu is shown.
+    """
+
+    def __init__(self, label: str, items: list[MenuAction | MenuSeparator]):
+        self.label = label
+        self.items = items
+
+
+class MenuLazySubmenu:
+    """
+    Cascade which items are computed out of Tk thread by compute(token), from local data only.
+    It shows pending mark until the items are ready. Key identifies the content.
+    """
+
+    def __init__(
+        self,
+        label: str,
+        key: str,
+        compute: Callable[[CancelToken], list[MenuAction | MenuSeparator]],
+    ):
+        self.label = label
+        self.key = key
+        self.compute = compute
+
+
+MenuItem = MenuAction | MenuLink | MenuSeparator | MenuSubmenu | MenuLazySubmenu
+
+
+class ContextMenu:
+    """
+    Right-click menu shared by all widgets of the same top level window.
+
+    Popup never waits for the network. Links which are not known locally are resolved in background:
+    once user hovers the item, and for sure once user clicks it. While resolving, item shows pending
+    mark, click on it opens the page when the link is ready. Resolving of items user did not click
+    is cancelled when the menu is shown again. Lazy submenus are computed in background as soon as
+    the menu is shown.
+    """
+
+    _instances: ClassVar[dict[str, "ContextMenu"]] = {}
+
+    @classmethod
+    def shared(cls, widget: tk.Widget) -> "ContextMenu":
+        toplevel = widget.winfo_toplevel()
+        key = str(toplevel)
+        instance = cls._instances.get(key)
+        if instance is None or not instance._menu.winfo_exists():
+            instance = cls._instances[key] = cls(toplevel)
+        return instance
+
+    def __init__(self, owner: tk.Misc):
+        self._menu = tk.Menu(owner, tearoff=0)
+        self._menu.bind("<<MenuSelect>>", self._on_menu_select)
+        self._menu.bind("<Destroy>", self._on_destroy)
+        # Menu is a toplevel of its own, results are delivered through the owner's one.
+        self._task_runner = LatestWinsTaskRunner(owner, max_workers=2)
+        self._items: list[MenuItem] = []
+        self._submenus: list[tk.Menu] = []
+        # Key -> link, for the links being resolved now.
+        self._pending: dict[str, MenuLink] = {}
+        # Keys of the pending links user clicked.
+        self._open_requested: set[str] = set()
+        # Tags of the lazy submenus being computed for the current menu.
+        self._lazy_tags: list[str] = []
+
+    def popup(self, event: tk.Event, items: list[MenuItem]):
+        for key in list(self._pending):
+            if key not in self._open_requested:
+                self._task_runner.cancel(self._tag(key))
+                del self._pending[key]
+        for tag in self._lazy_tags:
+            self._task_runner.cancel(tag)
+        self._lazy_tags = []
+
+        self._items = items
+        self._menu.delete(0, tk.END)
+        for submenu in self._submenus:
+            submenu.destroy()
+        self._submenus = []
+        # Entries' indices match items' ones, separators are entries too.
+        for index, item in enumerate(items):
+            if isinstance(item, MenuSeparator):
+                self._menu.add_separator()
+            elif isinstance(item, MenuAction):
+                self._menu.add_command(label=item.label, command=item.handler)
+            elif isinstance(item, MenuSubmenu):
+                submenu = tk.Menu(self._menu, tearoff=0)
+                type(self)._add_actions(submenu, item.items)
+                self._submenus.append(submenu)
+                self._menu.add_cascade(label=item.label, menu=submenu)
+            elif isinstance(item, MenuLazySubmenu):
+                submenu = tk.Menu(self._menu, tearoff=0)
+                submenu.add_command(label=PENDING_SUFFIX.strip(), state=tk.DISABLED)
+                self._submenus.append(submenu)
+                self._menu.add_cascade(label=item.label + PENDING_SUFFIX, menu=submenu)
+                self._start_lazy_submenu(index, item, submenu)
+            else:
+                self._menu.add_command(
+                    label=item.label,
+                    command=lambda link=item: self._on_link_click(link),
+                )
+                self._update_link_entry(index, item)
+        try:
+            self._menu.tk_popup(event.x_root, event.y_root)
+        finally:
+            self._menu.grab_release()
+
+    @staticmethod
+    def _add_actions(menu: tk.Menu, items: list[MenuAction | MenuSeparator]):
+        for item in items:
+            if isinstance(item, MenuSeparator):
+                menu.add_separator()
+            else:
+                menu.add_command(label=item.label, command=item.handler)
+
+    def _start_lazy_submenu(self, index: int, item: MenuLazySubmenu, submenu: tk.Menu):
+        tag = f"submenu:{item.key}"
+        self._lazy_tags.append(tag)
+
+        def fill(items: list[MenuAction | MenuSeparator]):
+            if not submenu.winfo_exists():
+                return
+            submenu.delete(0, tk.END)
+            type(self)._add_actions(submenu, items)
+            self._menu.entryconfigure(index, label=item.label)
+
+        def failed(error: Exception):
+            logger.error("Could not build submenu %s: %s", item.key, error)
+            fill([MenuAction(translation.ptl(f"Failed: {error}"), lambda: None)])
+
+        self._task_runner.submit(tag, item.compute, fill, failed)
+
+    def _update_link_entry(self, index: int, link: MenuLink):
+        found = link.lookup()
+        if found is None and link.key not in self._pending:
+            # Local tables are still loading, resolving reads them out of Tk thread.
+            self._start_resolve(link)
+            return
+        known, url = found or (False, None)
+        if link.key in self._pending:
+            self._menu.entryconfigure(
+                index, label=link.label + PENDING_SUFFIX, state=tk.NORMAL
+            )
+        elif known and not url:
+            self._menu.entryconfigure(
+                index,
+                label=f"{link.label} {translation.ptl('(not found)')}",
+                state=tk.DISABLED,
+            )
+        else:
+            self._menu.entryconfigure(index, label=link.label, state=tk.NORMAL)
+
+    def _refresh_link(self, key: str):
+        """
+        Updates label of the link in currently built menu, if it is there.
+        """
+        if not self._menu.winfo_exists():
+            return
+        for index, item in enumerate(self._items):
+            if isinstance(item, MenuLink) and item.key == key:
+                self._update_link_entry(index, item)
+
+    def _on_menu_select(self, event: Any):
+        try:
+            index = self._menu.index("active")
+        except tk.TclError:
+            return
+        if index is None or index >= len(self._items):
+            return
+        item = self._items[index]
+        if isinstance(item, MenuLink):
+            # Pre-resolve on hover, so the link is likely ready by the click.
+            self._start_resolve(item)
+
+    def _on_link_click(self, link: MenuLink):
+        known, url = link.lookup() or (False, None)
+        if known:
+            if url:
+                open_url(url)
+            return
+        self._open_requested.add(link.key)
+        self._start_resolve(link)
+
+    def _start_resolve(self, link: MenuLink):
+        if link.key in self._pending:
+            return
+        known, _ = link.lookup() or (False, None)
+        if known:
+            return
+        self._pending[link.key] = link
+        self._task_runner.submit(
+            self._tag(link.key),
+            link.resolve,
+            lambda url, key=link.key: self._on_resolved(key, url),
+            lambda e, key=link.key: self._on_resolve_failed(key, e),
+        )
+        self._refresh_link(link.key)
+
+    def _on_resolved(self, key: str, url: Optional[str]):
+        self._pending.pop(key, None)
+        if key in self._open_requested:
+            self._open_requested.discard(key)
+            if url:
+                open_url(url)
+        self._refresh_link(key)
+
+    def _on_resolve_failed(self, key: str, error: Exception):
+        logger.error("Could not resolve link %s: %s", key, error)
+        self._pending.pop(key, None)
+        self._open_requested.discard(key)
+        self._refresh_link(key)
+
+    def _on_destroy(self, event: Any):
+        if event.widget is self._menu:
+            self._task_runner.shutdown()
+
+    @staticmethod
+    def _tag(key: str) -> str:
+        return f"link:{key}"
@@ -0,0 +1,125 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Callable, Optional
+from _logger import get_logger
+from external_web_search import (
+    EdsmCachedAccess,
+    FilterSellFromEDSM,
+    get_edsm_sphere_systems,
+)
+from known_markets import KnownMarket, KnownMarkets
+from metrics import Metrics
+from system_coords import SystemCoordinates
+from task_runner import CancelToken, TaskCancelled
+
+logger = get_logger("sphere")
+
+
+@dataclass(frozen=True, slots=True)
+class SphereBuyer:
+    market: KnownMarket
+    distance: float
+    # Credits for the cargo station buys, limited by its demand.
+    value: int
+
+
+@dataclass(frozen=True, slots=True)
+class SphereScanProgress:
+    # The most valuable buyers found so far.
+    buyers: list[SphereBuyer]
+    systems_done: int
+    systems_total: int
+
+
+class EdsmSphereScan:
+    """
+    Finds stations around the system which buy the cargo.
+    EDSM gives populated systems in the sphere, then stations and markets of those systems are
+    fetched on the bounded pool of threads through EdsmCachedAccess and FilterSellFromEDSM,
+    so everything already fetched is reused and requests are paced by EdsmRateLimit.
+    """
+
+    @staticmethod
+    def scan(
+        center_system: str,
+        cargo: dict[int, int],
+        on_progress: Callable[[SphereScanProgress], None],
+        cancel_token: CancelToken,
+        radius: float = 100.0,
+        max_systems: int = 60,
+        max_workers: int = 4,
+        top: int = 30,
+        exclude_station: Optional[str] = None,
+    ) -> SphereScanProgress:
+        """
+        Returns the final result. on_progress is called from the calling thread after each system.
+        Parameters:
+            cargo: Commodity id -> quantity on carrier.
+            max_systems: The nearest populated systems which are scanned.
+        """
+        systems = get_edsm_sphere_systems(center_system, radius, cancel_token)[
+            :max_systems
+        ]
+        SystemCoordinates.add_many(
+            (name, coords) for name, _, coords in systems if coords is not None
+        )
+
+        buyers: dict[int | str, SphereBuyer] = {}
+        done = 0
+
+        def scan_system(system: str, distance: float) -> list[SphereBuyer]:
+            found: list[SphereBuyer] = []
+            for _, stations in EdsmCachedAccess.get_stations_in_system(
+                system, cancel_token
+            ).items():
+                for station in stations:
+                    cancel_token.raise_if_cancelled()
+                    if (
+                        station.market_id <= 0
+                        or station.station_name == exclude_station
+                        or station.station_type == "Fleet Carrier"
+                    ):
+                        continue
+                    FilterSellFromEDSM(station, cancel_token)
+                    market = KnownMarkets.market(station.market_id)
+                    if market is None:
+                        continue
+                    value = sum(
+                        min(quantity, buy.demand) * buy.price
+                        for commodity_id, quantity in cargo.items()
+                        for buy in [market.buys.get(commodity_id)]
+                        if buy is not None
+                    )
+                    if value > 0:
+                        found.append(SphereBuyer(market, distance, value))
+            return found
+
+        def ranked() -> list[SphereBuyer]:
+            return sorted(buyers.values(), key=lambda b: (-b.value, b.distance))[:top]
+
+        with Metrics.timer("sphere_scan.compute"):
+            executor = ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix="FcCompanionSphere"
+            )
+            try:
+                futures = [
+                    executor.submit(scan_system, name, distance)
+                    for name, distance, _ in systems
+                ]
+                for future in as_completed(futures):
+                    cancel_token.raise_if_cancelled()
+                    try:
+                        found = future.result()
+                    except TaskCancelled:
+                        raise
+                    except Exception as e:
+                        # One system failed, others are still worth showing.
+                        logger.warning("Sphere scan: system is skipped: %s", e)
+                        found = []
+                    for buyer in found:
+                        buyers[buyer.market.key] = buyer
+                    done += 1
+                    on_progress(SphereScanProgress(ranked(), done, len(systems)))
+            finally:
+                executor.shutdown(wait=False, cancel_futures=True)
+        return SphereScanProgress(ranked(), done, len(systems))
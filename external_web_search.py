@@ -1,18 +1,161 @@
-from collections import defaultdict
+from array import array
 from dataclasses import dataclass
+from enum import Enum
+from itertools import accumulate
+import os
+import sys
 import threading
-from typing import Any, ClassVar, Set, TypeAlias
-import requests
-from _logger import logger
+import time
+import fast_json
+from typing import Any, Callable, ClassVar, Iterator, Mapping, Optional, Set, TypeAlias
+from config import config
+from _logger import get_logger
 from carrier_cargo_position import CarrierCargoPosition
+from known_markets import KnownMarkets, MarketBuy
 from sell_on_station import FilterSellOnStationProtocol
 from cargo_names import MarketCatalogue
 import carrier_helpers
+from metrics import Metrics
+from task_runner import CancelToken
 import translation
 import re
 
+logger = get_logger("web")
 
-def _call_inara_search(what: str):
+# Config key (or environment variable) with EDSM's address, like "http://127.0.0.1:8765"
+# for the stand-in server from tools.
+EDSM_URL_CONFIG_KEY = "fc_companion_edsm_url"
+EDSM_URL_ENV_VAR = "FC_COMPANION_EDSM_URL"
+DEFAULT_EDSM_URL = "https://www.edsm.net"
+
+
+def edsm_url(path: str) -> str:
+    base = (
+        os.environ.get(EDSM_URL_ENV_VAR)
+        or config.get_str(EDSM_URL_CONFIG_KEY)
+        or DEFAULT_EDSM_URL
+    )
+    return base.rstrip("/") + path
+
+
+def _http_get_json(
+    url: str,
+    params: dict[str, Any],
+    cancel_token: Optional[CancelToken] = None,
+    timeout: float = 10.0,
+    headers: Optional[dict[str, str]] = None,
+    on_response: Optional[Callable[[int, Mapping[str, str]], None]] = None,
+) -> Any:
+    """
+    GET request which returns parsed JSON.
+    Body is read in chunks, so cancelled request stops at the next chunk instead of reading all.
+    on_response(status, headers) is called before the status is checked.
+    """
+    import requests
+
+    if cancel_token is not None:
+        cancel_token.raise_if_cancelled()
+    with requests.get(
+        url, params=params, headers=headers, timeout=timeout, stream=True
+    ) as response:
+        if on_response is not None:
+            on_response(response.status_code, response.headers)
+        response.raise_for_status()
+        chunks: list[bytes] = []
+        for chunk in response.iter_content(chunk_size=16 * 1024):
+            if cancel_token is not None:
+                cancel_token.raise_if_cancelled()
+            chunks.append(chunk)
+        logger.debug("GET %s: %d bytes", response.url, sum(map(len, chunks)))
+    return fast_json.loads(b"".join(chunks))
+
+
+class EdsmRateLimit:
+    """
+    Paces requests to EDSM by its X-Rate-Limit-* headers.
+    While plenty of requests remain they are not delayed, when few remain they are spread until
+    the limit resets. Response 429 pauses all requests for Retry-After seconds.
+    """
+
+    LOW_REMAINING: ClassVar[int] = 60
+    DEFAULT_PAUSE_SEC: ClassVar[float] = 60.0
+
+    _mutex: ClassVar[threading.Lock] = threading.Lock()
+    _next_at: ClassVar[float] = 0.0
+    _interval: ClassVar[float] = 0.0
+
+    @classmethod
+    def wait(cls, cancel_token: Optional[CancelToken] = None) -> None:
+        """
+        Blocks until the next request may be sent, takes its turn.
+        """
+        with cls._mutex:
+            now = time.monotonic()
+            at = max(now, cls._next_at)
+            cls._next_at = at + cls._interval
+        if at > now:
+            Metrics.count("web.edsm.paced")
+        while True:
+            if cancel_token is not None:
+                cancel_token.raise_if_cancelled()
+            delay = at - time.monotonic()
+            if delay <= 0:
+                return
+            time.sleep(min(delay, 0.25))
+
+    @classmethod
+    def on_response(cls, status: int, headers: Mapping[str, str]) -> None:
+        with cls._mutex:
+            if status == 429:
+                try:
+                    pause = float(headers.get("Retry-After", cls.DEFAULT_PAUSE_SEC))
+                except ValueError:
+                    pause = cls.DEFAULT_PAUSE_SEC
+                logger.warning("EDSM rate limit is hit, pause for %.0f s.", pause)
+                cls._next_at = max(cls._next_at, time.monotonic() + pause)
+                return
+            try:
+                remaining = int(headers["X-Rate-Limit-Remaining"])
+                reset = float(headers["X-Rate-Limit-Reset"])
+            except (KeyError, ValueError):
+                return
+            cls._interval = (
+                reset / max(remaining, 1) if remaining < cls.LOW_REMAINING else 0.0
+            )
+
+
+def _edsm_get_json(
+    path: str,
+    params: dict[str, Any],
+    cancel_token: Optional[CancelToken] = None,
+    timeout: float = 10.0,
+    retries: int = 2,
+) -> Any:
+    """
+    GET request to EDSM paced by EdsmRateLimit. Request which hit the limit is repeated after pause.
+    """
+    import requests
+
+    for attempt in range(retries + 1):
+        EdsmRateLimit.wait(cancel_token)
+        try:
+            return _http_get_json(
+                edsm_url(path),
+                params,
+                cancel_token,
+                timeout,
+                on_response=EdsmRateLimit.on_response,
+            )
+        except requests.HTTPError as e:
+            if (
+                e.response is None
+                or e.response.status_code != 429
+                or attempt == retries
+            ):
+                raise
+
+
+def _call_inara_search(what: str, cancel_token: Optional[CancelToken] = None):
     params = {"type": "GlobalSearch", "term": what}
     url = f"https://inara.cz/sites/elite/ajaxsearch.php"
 
@@ -24,21 +167,22 @@ def _call_inara_search(what: str):
         "Accept-Encoding": "gzip",
     }
 
-    response = requests.get(url, params=params, headers=headers)
-    response.raise_for_status()
-
-    body = response.text
-    logger.debug(f"Inara query {response.url} response for link: {body}")
+    with Metrics.timer("web.inara.search"):
+        results = _http_get_json(url, params, cancel_token, headers=headers)
+    logger.debug("Inara query %s response for link: %s", what, results)
 
-    return response.json()
+    return results
 
 
-def get_inara_commodity_url(commodity_name: str) -> str | None:
+def get_inara_commodity_url(
+    commodity_name: str, cancel_token: Optional[CancelToken] = None
+) -> str | None:
     """
     Gets link-endpoint on / from Inara for the commodity.
+    Prefer InaraCommodityLinks which keeps results.
     """
     base = "https://inara.cz"
-    results = _call_inara_search(commodity_name)
+    results = _call_inara_search(commodity_name, cancel_token)
     for entry in results:
         label = entry.get("label", "")
         if label.startswith('<a href="/elite/commodity/'):
@@ -50,25 +194,117 @@ def get_inara_commodity_url(commodity_name: str) -> str | None:
     return None
 
 
-@dataclass
+def get_edsm_systems_coords(
+    system_names: list[str], cancel_token: Optional[CancelToken] = None
+) -> dict[str, tuple[float, float, float]]:
+    """
+    Gets coordinates of the systems from EDSM in one request. Systems unknown to EDSM are absent.
+    Prefer SystemCoordinates which keeps results.
+    """
+    if not system_names:
+        return {}
+    params: dict[str, Any] = {"systemName[]": system_names, "showCoordinates": 1}
+    with Metrics.timer("web.edsm.systems"):
+        data = _edsm_get_json("/api-v1/systems", params, cancel_token)
+    result: dict[str, tuple[float, float, float]] = {}
+    # EDSM gives empty object instead of empty list if nothing is found.
+    for item in data if isinstance(data, list) else []:
+        coords = item.get("coords")
+        if item.get("name") and coords:
+            result[item["name"]] = (coords["x"], coords["y"], coords["z"])
+    return result
+
+
+# EDSM does not search farther.
+EDSM_SPHERE_MAX_RADIUS_LY = 100.0
+
+
+def get_edsm_sphere_systems(
+    center_system: str,
+    radius: float,
+    cancel_token: Optional[CancelToken] = None,
+) -> list[tuple[str, float, Optional[tuple[float, float, float]]]]:
+    """
+    Gets populated systems around the center from EDSM: (name, distance, coordinates),
+    the nearest first. Radius is limited by EDSM_SPHERE_MAX_RADIUS_LY.
+    """
+    if not center_system:
+        return []
+    params: dict[str, Any] = {
+        "systemName": center_system,
+        "radius": min(radius, EDSM_SPHERE_MAX_RADIUS_LY),
+        "showCoordinates": 1,
+        "showInformation": 1,
+    }
+    with Metrics.timer("web.edsm.sphere"):
+        data = _edsm_get_json("/api-v1/sphere-systems", params, cancel_token)
+    result: list[tuple[str, float, Optional[tuple[float, float, float]]]] = []
+    # Unpopulated systems have empty "information", those have no stations.
+    for item in data if isinstance(data, list) else []:
+        if not item.get("name") or not item.get("information"):
+            continue
+        coords = item.get("coords")
+        result.append(
+            (
+                item["name"],
+                float(item.get("distance", 0.0)),
+                (coords["x"], coords["y"], coords["z"]) if coords else None,
+            )
+        )
+    result.sort(key=lambda r: r[1])
+    return result
+
+
+class PadSize(Enum):
+    LARGE = "L"
+    MEDIUM = "M"
+
+
+@dataclass(frozen=True, slots=True)
 class FilteredEdsmStation:
+    """
+    Station with market. Thousands of them are kept in RAM, so record is slotted
+    and system's name and station's type are interned, shared by all stations.
+    """
+
     station_name: str
     station_id: int
     market_id: int
-    pads_information: str
     system_name: str
+    station_type: str
+    pad_size: PadSize
 
-    _mutex: ClassVar[threading.Lock] = threading.Lock()
-    _cached_inara: ClassVar[dict[str, str]] = {}
-
-    def get_inara_station_link(self) -> str | None:
+    @classmethod
+    def create(
+        cls,
+        station_name: str,
+        station_id: int,
+        market_id: int,
+        system_name: str,
+        station_type: str,
+    ) -> "FilteredEdsmStation":
+        return cls(
+            station_name=station_name,
+            station_id=station_id,
+            market_id=market_id,
+            system_name=sys.intern(system_name),
+            station_type=sys.intern(station_type),
+            pad_size=PadSize.MEDIUM if station_type == "Outpost" else PadSize.LARGE,
+        )
+
+    @property
+    def pads_information(self) -> str:
+        return translation.ptl("outpost") if self.pad_size == PadSize.MEDIUM else ""
+
+    def get_inara_station_link(
+        self, cancel_token: Optional[CancelToken] = None
+    ) -> str | None:
+        """
+        Searches station's page on Inara. Prefer InaraStationLinks which keeps results.
+        """
         base = "https://inara.cz"
         target_key = f"{self.station_name} | {self.system_name}"
-        with type(self)._mutex:
-            if target_key in type(self)._cached_inara:
-                return type(self)._cached_inara[target_key]
-
-        results = _call_inara_search(self.station_name)
+        results = _call_inara_search(self.station_name, cancel_token)
         for entry in results:
             if entry.get("value") == target_key:
                 # Label has reference like <a href="/elite/station/734697/">
@@ -76,122 +312,235 @@ class FilteredEdsmStation:
                     r'href="([^"]+)"', entry["label"], re.IGNORECASE | re.DOTALL
                 )
                 if m:
-                    url = f"{base}{m.group(1)}"
-                    with type(self)._mutex:
-                        if target_key not in type(self)._cached_inara:
-                            type(self)._cached_inara[target_key] = url
-                    return url
+                    return f"{base}{m.group(1)}"
         return None
 
 
 EdsmResponse: TypeAlias = list[dict[str, Any]]
-EdsmPerStationTypeResponse: TypeAlias = dict[str, list[FilteredEdsmStation]]
+
+
+class StationsOfSystem:
+    """
+    Stations with market of one system, packed into columns: names are one string, numbers are
+    arrays and types are indices of the system's few distinct types. That takes a fraction of
+    the memory of station objects, those are created only when asked.
+    Types stay strings, not enum: EDSM adds new ones and those must still be listed.
+    """
+
+    __slots__ = (
+        "system_name",
+        "_names",
+        "_name_ends",
+        "_station_ids",
+        "_market_ids",
+        "_types",
+        "_type_indices",
+    )
+
+    def __init__(self, stations: list[FilteredEdsmStation]):
+        self.system_name = stations[0].system_name if stations else ""
+        self._names = "".join(station.station_name for station in stations)
+        self._name_ends = array(
+            "I", accumulate(len(station.station_name) for station in stations)
+        )
+        self._station_ids = array("q", (station.station_id for station in stations))
+        self._market_ids = array("q", (station.market_id for station in stations))
+        types: dict[str, int] = {}
+        self._type_indices = array(
+            "H",
+            (types.setdefault(s.station_type, len(types)) for s in stations),
+        )
+        self._types = tuple(types)
+
+    def __len__(self) -> int:
+        return len(self._station_ids)
+
+    def type_count(self) -> int:
+        return len(self._types)
+
+    @property
+    def stations(self) -> list[FilteredEdsmStation]:
+        return [self._station(i) for i in range(len(self))]
+
+    def items(self) -> Iterator[tuple[str, list[FilteredEdsmStation]]]:
+        """
+        Yields (station's type, stations of that type).
+        """
+        for type_index, station_type in enumerate(self._types):
+            yield station_type, [
+                self._station(i)
+                for i, index in enumerate(self._type_indices)
+                if index == type_index
+            ]
+
+    def _station(self, i: int) -> FilteredEdsmStation:
+        start = self._name_ends[i - 1] if i else 0
+        return FilteredEdsmStation.create(
+            station_name=self._names[start : self._name_ends[i]],
+            station_id=self._station_ids[i],
+            market_id=self._market_ids[i],
+            system_name=self.system_name,
+            station_type=self._types[self._type_indices[i]],
+        )
+
+
+EdsmPerStationTypeResponse: TypeAlias = StationsOfSystem
 
 
 class EdsmCachedAccess:
     _mutex = threading.Lock()
     _stations_per_system: dict[str, EdsmPerStationTypeResponse] = {}
+    _on_stations_fetched: list[Callable[[list[FilteredEdsmStation]], None]] = []
 
     def __init__(self):
         pass
 
     @classmethod
-    def get_stations_in_system(cls, system_name: str) -> EdsmPerStationTypeResponse:
+    def get_stations_in_system(
+        cls, system_name: str, cancel_token: Optional[CancelToken] = None
+    ) -> EdsmPerStationTypeResponse:
         """
         Returns processed list of the stations for out limited purposes, groupped by station's type.
         """
         with cls._mutex:
-            if system_name not in cls._stations_per_system:
-                cls._stations_per_system[system_name] = cls._filter_and_group_stations(
-                    cls.get_raw_edsm_stations_in_system(system_name), system_name
-                )
-            return cls._stations_per_system[system_name]
+            cached = cls._stations_per_system.get(system_name)
+        Metrics.cache_access("edsm_stations", cached is not None)
+        if cached is not None:
+            return cached
+
+        # Network request is done without lock, so other systems are not waiting for this one.
+        grouped = cls._filter_and_group_stations(
+            cls.get_raw_edsm_stations_in_system(system_name, cancel_token), system_name
+        )
+        with cls._mutex:
+            result = cls._stations_per_system.setdefault(system_name, grouped)
+            handlers = list(cls._on_stations_fetched)
+        fetched = grouped.stations
+        for handler in handlers:
+            handler(fetched)
+        return result
+
+    @classmethod
+    def add_on_stations_fetched_handler(
+        cls, handler: Callable[[list[FilteredEdsmStation]], None]
+    ) -> None:
+        """
+        Adds handler called with all stations of the system fetched from EDSM.
+        Handler is called from the background thread.
+        """
+        with cls._mutex:
+            cls._on_stations_fetched.append(handler)
 
     @staticmethod
     def _filter_and_group_stations(
         stations: EdsmResponse, system: str
     ) -> EdsmPerStationTypeResponse:
-        grouped: EdsmPerStationTypeResponse = defaultdict(list)
-        carrier_name = carrier_helpers.get_carrier_name()
+        filtered: list[FilteredEdsmStation] = []
+        carrier_name = carrier_helpers.CarrierIdentity.call_sign()
 
         for station in stations:
             if not station.get("haveMarket", False):
                 continue
 
             station_type = station.get("type", "Unknown")
-            filtered_station = FilteredEdsmStation(
+            filtered_station = FilteredEdsmStation.create(
                 station_name=station.get("name", ""),
                 station_id=station.get("id", -1),
                 market_id=station.get("marketId", -1),
-                pads_information="",
                 system_name=system,
+                station_type=station_type,
             )
             if filtered_station.station_name == carrier_name:
                 continue
-            logger.debug(f"station type: {station_type}")
-            if station_type == "Outpost":
-                filtered_station.pads_information = translation.ptl("outpost")
-            grouped[station_type].append(filtered_station)
+            logger.debug("station type: %s", station_type)
+            filtered.append(filtered_station)
 
-        return grouped
+        return StationsOfSystem(filtered)
+
+    @classmethod
+    def _on_carrier_identity_changed(cls, call_sign: str) -> None:
+        """
+        Own carrier is filtered out of the cached groups by name, so those must be rebuilt.
+        """
+        with cls._mutex:
+            cls._stations_per_system.clear()
 
     @staticmethod
-    def get_raw_edsm_stations_in_system(system_name: str) -> EdsmResponse:
+    def get_raw_edsm_stations_in_system(
+        system_name: str, cancel_token: Optional[CancelToken] = None
+    ) -> EdsmResponse:
         """
         Returns raw response from EDSM as json object.
         """
         if not system_name:
             return []
 
-        BASE_URL = "https://www.edsm.net/api-system-v1/stations"
         params = {
             "systemName": system_name,
         }
-        response = requests.get(BASE_URL, params=params)
-        response.raise_for_status()
-        data = response.json()
+        with Metrics.timer("web.edsm.stations"):
+            data = _edsm_get_json("/api-system-v1/stations", params, cancel_token)
 
         return data.get("stations", [])
 
 
+carrier_helpers.CarrierIdentity.add_on_identity_change_handler(
+    EdsmCachedAccess._on_carrier_identity_changed  # pyright: ignore[reportPrivateUsage]
+)
+
+
 class FilterSellFromEDSM(FilterSellOnStationProtocol):
     _mutex = threading.Lock()
     # Key is marketId
     _cache_static: dict[int, Set[int]] = {}
 
-    def __init__(self, station: FilteredEdsmStation):
+    def __init__(
+        self,
+        station: FilteredEdsmStation,
+        cancel_token: Optional[CancelToken] = None,
+    ):
         self._station = station
-        self.__fetch_station_buys(station)
+        self.__fetch_station_buys(station, cancel_token)
 
-    def __fetch_station_buys(self, station: FilteredEdsmStation) -> None:
+    def __fetch_station_buys(
+        self, station: FilteredEdsmStation, cancel_token: Optional[CancelToken]
+    ) -> None:
         """
         Gets and updates list of what station is buying from EDSM.
         Uses own local in-RAM cache too to relax EDSM.
         """
         key = station.market_id
         with type(self)._mutex:
-            if key in self._cache_static:
+            hit = key in self._cache_static
+            Metrics.cache_access("edsm_market", hit)
+            if hit:
                 self._buy_ids = type(self)._cache_static[key]
                 return
-        url = "https://www.edsm.net/api-system-v1/stations/market"
         params: dict[str, Any] = {"marketId": station.market_id}
 
-        resp = requests.get(url, params=params, timeout=5)
-        resp.raise_for_status()
-        data = resp.json()
+        with Metrics.timer("web.edsm.market"):
+            data = _edsm_get_json(
+                "/api-system-v1/stations/market", params, cancel_token, timeout=5
+            )
 
         # EDSM gives string "commodity" as "id" field. We want to parse numeric ID out of it.
-        buys = {
-            commodity_obj.id
+        prices = {
+            commodity_obj.id: MarketBuy(
+                int(item.get("sellPrice", 0)), int(item.get("demand", 0))
+            )
             for item in data.get("commodities", [])
             if item.get("stock", 0) == 0 and item.get("demand", 0) > 0 and "id" in item
             for commodity_obj in [MarketCatalogue.explain_commodity(item["id"])]
             if commodity_obj is not None
         }
+        buys = set(prices)
         with type(self)._mutex:
             if key not in self._cache_static:
                 type(self)._cache_static[key] = buys
         self._buy_ids = buys
+        KnownMarkets.update(
+            station.market_id, station.station_name, station.system_name, prices
+        )
 
     def is_not(self, station_name: str) -> bool:
         return self._station.station_name != station_name
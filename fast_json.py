@@ -0,0 +1,95 @@
+import json
+from typing import Any, Callable, Optional, Type, TypeVar
+from _logger import get_logger
+
+logger = get_logger("json")
+
+T = TypeVar("T")
+
+# Backends are optional, the first available one is used: orjson, msgspec, stdlib json.
+_loads: Optional[Callable[[bytes | str], Any]] = None
+_backend_name = ""
+
+
+def backend_name() -> str:
+    _ensure_backend()
+    return _backend_name
+
+
+def loads(data: bytes | str) -> Any:
+    """
+    Parses JSON document. Bytes are decoded directly, without making str of them first.
+    Raises ValueError on malformed document, whatever backend is used.
+    """
+    if _loads is None:
+        _ensure_backend()
+    return _loads(data)  # type: ignore
+
+
+def load_file(file_path: str) -> Any:
+    with open(file_path, "rb") as f:
+        return loads(f.read())
+
+
+def loads_typed(data: bytes | str, schema: Type[T], convert: Callable[[Any], T]) -> T:
+    """
+    Parses JSON document into schema (dataclass), fields absent in schema are skipped.
+    With msgspec it is decoded straight into the schema, otherwise convert(parsed document) is used.
+    Convert is used as well if document does not match the schema strictly, so it must be tolerant.
+    """
+    decoder = _typed_decoder(schema)
+    if decoder is not None:
+        try:
+            return decoder(data)
+        except ValueError:
+            pass
+    return convert(loads(data))
+
+
+def _ensure_backend() -> None:
+    global _loads, _backend_name
+    if _loads is not None:
+        return
+    try:
+        import orjson
+
+        _loads, _backend_name = orjson.loads, "orjson"
+    except ImportError:
+        try:
+            import msgspec
+
+            decode = msgspec.json.decode
+
+            def msgspec_loads(data: bytes | str) -> Any:
+                try:
+                    return decode(data)
+                except msgspec.DecodeError as e:
+                    raise ValueError(str(e)) from e
+
+            _loads, _backend_name = msgspec_loads, "msgspec"
+        except ImportError:
+            _loads, _backend_name = json.loads, "json"
+    logger.debug("JSON backend: %s", _backend_name)
+
+
+_typed_decoders: dict[type, Optional[Callable[[bytes | str], Any]]] = {}
+
+
+def _typed_decoder(schema: type) -> Optional[Callable[[bytes | str], Any]]:
+    if schema in _typed_decoders:
+        return _typed_decoders[schema]
+    try:
+        import msgspec
+
+        decoder = msgspec.json.Decoder(schema)
+
+        def decode(data: bytes | str) -> Any:
+            try:
+                return decoder.decode(data)
+            except msgspec.DecodeError as e:
+                raise ValueError(str(e)) from e
+
+        _typed_decoders[schema] = decode
+    except ImportError:
+        _typed_decoders[schema] = None
+    return _typed_decoders[schema]
@@ -4,15 +4,20 @@ from typing import ClassVar
 
 
 class IconsCache:
-    iconDir: ClassVar[str] = path.join(path.dirname(__file__), "icons")
-    icons: ClassVar[dict[str, tk.PhotoImage]]
+    """
+    Icons are loaded on first use, because tk.PhotoImage requires Tk root to exist.
+    """
 
+    iconDir: ClassVar[str] = path.join(path.dirname(__file__), "icons")
+    _icons: ClassVar[dict[str, tk.PhotoImage]] = {}
 
-IconsCache.icons = {
-    "left_arrow": tk.PhotoImage(file=path.join(IconsCache.iconDir, "left_arrow.gif")),
-    "right_arrow": tk.PhotoImage(file=path.join(IconsCache.iconDir, "right_arrow.gif")),
-    "view_open": tk.PhotoImage(file=path.join(IconsCache.iconDir, "view_open.gif")),
-    "view_close": tk.PhotoImage(file=path.join(IconsCache.iconDir, "view_close.gif")),
-    "view_sort": tk.PhotoImage(file=path.join(IconsCache.iconDir, "view_sort.gif")),
-    "resize": tk.PhotoImage(file=path.join(IconsCache.iconDir, "resize.gif")),
-}
+    @classmethod
+    def get(cls, name: str) -> tk.PhotoImage:
+        """
+        Returns icon by the name of the file in icons directory without extension, like "resize".
+        """
+        icon = cls._icons.get(name)
+        if icon is None:
+            icon = tk.PhotoImage(file=path.join(cls.iconDir, f"{name}.gif"))
+            cls._icons[name] = icon
+        return icon
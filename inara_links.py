@@ -0,0 +1,233 @@
+import json
+import os
+import threading
+import time
+from typing import Any, ClassVar, Optional
+from _logger import get_logger
+from external_web_search import FilteredEdsmStation, get_inara_commodity_url
+from metrics import Metrics
+from persistent_store import PersistentStore, atomic_write
+from task_runner import CancelToken
+import fast_json
+
+logger = get_logger("web")
+
+
+class _PersistentLinksTable(PersistentStore):
+    """
+    Persistent table of key -> URL of the page on Inara.
+
+    Table shipped with the plugin (SHIPPED_FILE_NAME, if present) is merged with user's table
+    in plugin's data directory, which is filled by web search on misses. Key unknown to Inara
+    is stored too (negative result), so it is not searched again until NEGATIVE_TTL_SEC passes.
+    User's table is JSON lines: each result appends one line, repeated keys are compacted on load.
+    Subclasses define own file names and class variables of the state.
+    """
+
+    NEGATIVE_TTL_SEC: ClassVar[float] = 7 * 24 * 3600
+    SHIPPED_FILE_NAME: ClassVar[str] = ""
+    CACHE_NAME: ClassVar[str] = ""
+
+    _mutex: ClassVar[threading.Lock]
+    # Key -> (url or None if Inara does not know it, unix time of the check).
+    _table: ClassVar[dict[str, tuple[Optional[str], float]]]
+
+    @classmethod
+    def load(cls) -> None:
+        """
+        Reads the tables from disk, called out of Tk thread (on startup).
+        """
+        cls._ensure_loaded()
+
+    @classmethod
+    def _lookup(cls, key: str) -> Optional[tuple[bool, Optional[str]]]:
+        """
+        Local lookup only, it never reads the disk. Returns (known, url), url is None for known
+        negative result. Returns None while the tables are not loaded yet.
+        """
+        if not cls._loaded:
+            return None
+        with cls._mutex:
+            entry = cls._table.get(key)
+        if entry is None:
+            Metrics.cache_access(cls.CACHE_NAME, False)
+            return False, None
+        url, checked = entry
+        if url is None and time.time() - checked > cls.NEGATIVE_TTL_SEC:
+            Metrics.cache_access(cls.CACHE_NAME, False)
+            return False, None
+        Metrics.cache_access(cls.CACHE_NAME, True)
+        return True, url
+
+    @classmethod
+    def _store(cls, key: str, url: Optional[str]) -> None:
+        cls._ensure_loaded()
+        checked = time.time()
+        with cls._mutex:
+            cls._table[key] = (url, checked)
+        cls._append_lines([cls._to_json_line(key, url, checked)])
+
+    @classmethod
+    def export(cls, file_path: Optional[str] = None) -> None:
+        """
+        Writes whole table to the file, by default into the plugin's directory as shipped table.
+        """
+        cls._ensure_loaded()
+        with cls._mutex:
+            snapshot = dict(cls._table)
+        cls._save(snapshot, file_path or cls._shipped_file_path())
+
+    @classmethod
+    def _shipped_file_path(cls) -> str:
+        return os.path.join(
+            os.path.dirname(os.path.abspath(__file__)), cls.SHIPPED_FILE_NAME
+        )
+
+    @staticmethod
+    def _read(file_path: str) -> dict[str, tuple[Optional[str], float]]:
+        try:
+            with open(file_path, "r", encoding="utf-8") as f:
+                content: dict[str, Any] = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning("Could not read %s: %s", file_path, e)
+            return {}
+        return {
+            key: (entry.get("url"), float(entry.get("checked", 0)))
+            for key, entry in content.items()
+        }
+
+    @staticmethod
+    def _save(table: dict[str, tuple[Optional[str], float]], file_path: str) -> None:
+        content = {
+            key: {"url": url, "checked": int(checked)}
+            for key, (url, checked) in sorted(table.items())
+        }
+        try:
+            with atomic_write(file_path) as f:
+                json.dump(content, f, indent=1)
+        except OSError as e:
+            logger.warning("Could not store %s: %s", file_path, e)
+
+    @staticmethod
+    def _to_json_line(key: str, url: Optional[str], checked: float) -> str:
+        return (
+            json.dumps(
+                {"k": key, "url": url, "checked": int(checked)}, separators=(",", ":")
+            )
+            + "\n"
+        )
+
+    @classmethod
+    def _load(cls) -> None:
+        shipped = cls._read(cls._shipped_file_path())
+        user: dict[str, tuple[Optional[str], float]] = {}
+        lines_count = 0
+        for line in cls._iter_lines():
+            lines_count += 1
+            try:
+                item = fast_json.loads(line)
+                user[item["k"]] = (item.get("url"), float(item.get("checked", 0)))
+            except (ValueError, KeyError, TypeError):
+                continue
+        if lines_count > len(user):
+            cls._compact(user)
+        # The newest check wins, so updated shipped table fixes user's old negative results.
+        table = dict(shipped)
+        for key, entry in user.items():
+            if entry[1] >= table.get(key, (None, 0.0))[1]:
+                table[key] = entry
+        with cls._mutex:
+            cls._table = table
+
+    @classmethod
+    def _compact(cls, table: dict[str, tuple[Optional[str], float]]) -> None:
+        try:
+            with atomic_write(cls._file_path()) as f:
+                f.writelines(
+                    cls._to_json_line(key, url, checked)
+                    for key, (url, checked) in sorted(table.items())
+                )
+        except OSError as e:
+            logger.warning("Could not compact %s: %s", cls.FILE_NAME, e)
+
+
+class InaraCommodityLinks(_PersistentLinksTable):
+    """
+    Commodity id -> Inara's commodity page.
+    Commodities unknown to MarketCatalogue all have id 0, those are keyed by the trade name.
+    """
+
+    FILE_NAME = "inara_commodities.jsonl"
+    SHIPPED_FILE_NAME = "inara_commodities.json"
+    CACHE_NAME = "inara_commodity"
+
+    _mutex = threading.Lock()
+    _table = {}
+
+    @staticmethod
+    def _key(commodity_id: int, trade_name: str) -> str:
+        return str(commodity_id) if commodity_id else f"name:{trade_name.lower()}"
+
+    @classmethod
+    def lookup(
+        cls, commodity_id: int, trade_name: str = ""
+    ) -> Optional[tuple[bool, Optional[str]]]:
+        return cls._lookup(cls._key(commodity_id, trade_name))
+
+    @classmethod
+    def resolve(
+        cls,
+        commodity_id: int,
+        trade_name: str,
+        cancel_token: Optional[CancelToken] = None,
+    ) -> Optional[str]:
+        """
+        Local lookup, on miss asks Inara and stores the result. Network errors are not stored.
+        """
+        cls._ensure_loaded()
+        known, url = cls.lookup(commodity_id, trade_name) or (False, None)
+        if known:
+            return url
+        url = get_inara_commodity_url(trade_name, cancel_token)
+        cls._store(cls._key(commodity_id, trade_name), url)
+        return url
+
+
+class InaraStationLinks(_PersistentLinksTable):
+    """
+    Station -> Inara's station page.
+    """
+
+    FILE_NAME = "inara_stations.jsonl"
+    SHIPPED_FILE_NAME = "inara_stations.json"
+    CACHE_NAME = "inara_station"
+
+    _mutex = threading.Lock()
+    _table = {}
+
+    @staticmethod
+    def _key(station: FilteredEdsmStation) -> str:
+        return f"{station.station_name} | {station.system_name}"
+
+    @classmethod
+    def lookup(
+        cls, station: FilteredEdsmStation
+    ) -> Optional[tuple[bool, Optional[str]]]:
+        return cls._lookup(cls._key(station))
+
+    @classmethod
+    def resolve(
+        cls, station: FilteredEdsmStation, cancel_token: Optional[CancelToken] = None
+    ) -> Optional[str]:
+        """
+        Local lookup, on miss asks Inara and stores the result. Network errors are not stored.
+        """
+        cls._ensure_loaded()
+        known, url = cls.lookup(station) or (False, None)
+        if known:
+            return url
+        url = station.get_inara_station_link(cancel_token)
+        cls._store(cls._key(station), url)
+        return url
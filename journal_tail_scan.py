@@ -0,0 +1,213 @@
+import glob
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Any, Iterator, Optional
+from _logger import get_logger
+import fast_json
+import plugin_paths
+
+logger = get_logger("journal")
+
+
+@dataclass
+class RecoveredJournalState:
+    """
+    State of the game restored from the latest journal records.
+    Fields are None if they were not found.
+    """
+
+    current_system: Optional[str] = None
+    # True if last docking related record was found, docked_station is None then means "undocked".
+    docking_known: bool = False
+    docked_station: Optional[str] = None
+    targeted_system: Optional[str] = None
+    # True if last route related record was found, route_destination is None then means "route cleared".
+    route_known: bool = False
+    route_destination: Optional[str] = None
+    # (event, record) of the carrier's position events from the newest back to the last
+    # CarrierLocation, carrier_known is set once it is found.
+    carrier_known: bool = False
+    carrier_records: list[tuple[str, dict[str, Any]]] = field(default_factory=list)
+
+    def is_complete(self) -> bool:
+        return (
+            self.current_system is not None
+            and self.docking_known
+            and self.targeted_system is not None
+            and self.route_known
+            and self.carrier_known
+        )
+
+
+_EVENT_RE = re.compile(rb'"event":"(\w+)"')
+_INTERESTING_EVENTS = frozenset(
+    {
+        b"Docked",
+        b"Undocked",
+        b"Location",
+        b"FSDJump",
+        b"CarrierJump",
+        b"FSDTarget",
+        b"NavRoute",
+        b"NavRouteClear",
+        b"CarrierLocation",
+        b"CarrierJumpRequest",
+        b"CarrierJumpCancelled",
+    }
+)
+_CARRIER_EVENTS = frozenset(
+    {b"CarrierLocation", b"CarrierJump", b"CarrierJumpRequest", b"CarrierJumpCancelled"}
+)
+
+
+# Quick check for the whole block before splitting it into lines, journal has no spaces there.
+_EVENT_MARKERS = tuple(b'"event":"' + e + b'"' for e in _INTERESTING_EVENTS)
+
+
+def _read_interesting_lines_backwards(
+    file_path: str, budget: list[int], block_size: int = 64 * 1024
+) -> Iterator[bytes]:
+    """
+    Yields lines of the file which may contain interesting events, starting from the last one.
+    File is read by blocks from its end, blocks without interesting events are not split to lines.
+    Parameters:
+        budget: One element list with bytes left to read, decreased by this function.
+    """
+    with open(file_path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        tail = b""
+        while position > 0 and budget[0] > 0:
+            read_size = min(block_size, position)
+            position -= read_size
+            budget[0] -= read_size
+            f.seek(position)
+            chunk = f.read(read_size) + tail
+            if position > 0:
+                # First piece may be partial line, it is completed by the next (previous in file) block.
+                split_at = chunk.find(b"\n")
+                if split_at < 0:
+                    tail = chunk
+                    continue
+                tail = chunk[:split_at]
+                complete = chunk[split_at + 1 :]
+            else:
+                tail = b""
+                complete = chunk
+            if not any(marker in complete for marker in _EVENT_MARKERS):
+                continue
+            for line in reversed(complete.split(b"\n")):
+                yield line
+
+
+def _read_route_destination(journal_dir: str) -> Optional[str]:
+    try:
+        route: list[dict[str, Any]] = fast_json.load_file(
+            os.path.join(journal_dir, "NavRoute.json")
+        ).get("Route", [])
+    except Exception as e:
+        logger.debug("Could not read NavRoute.json: %s", e)
+        return None
+    return route[-1].get("StarSystem") if route else None
+
+
+def _apply_record(
+    state: RecoveredJournalState, event: bytes, entry: dict[str, Any], journal_dir: str
+):
+    """
+    Applies single record to the state. Records come from the newest to the oldest,
+    so only not yet known fields are set.
+    """
+    if state.current_system is None and event in (
+        b"Location",
+        b"FSDJump",
+        b"CarrierJump",
+        b"Docked",
+    ):
+        state.current_system = entry.get("StarSystem")
+
+    if not state.docking_known:
+        if event == b"Docked":
+            state.docking_known = True
+            state.docked_station = entry.get("StationName")
+        elif event == b"Undocked":
+            state.docking_known = True
+        elif event in (b"Location", b"CarrierJump"):
+            state.docking_known = True
+            if entry.get("Docked"):
+                state.docked_station = entry.get("StationName")
+
+    if state.targeted_system is None and event == b"FSDTarget":
+        state.targeted_system = entry.get("Name")
+
+    if not state.route_known:
+        if event == b"NavRoute":
+            state.route_known = True
+            # Journal record has no route itself, it is stored into separated file.
+            state.route_destination = _read_route_destination(journal_dir)
+        elif event == b"NavRouteClear":
+            state.route_known = True
+
+    if not state.carrier_known and event in _CARRIER_EVENTS:
+        state.carrier_records.append((event.decode(), entry))
+        state.carrier_known = event == b"CarrierLocation"
+
+
+_LEGACY_JOURNAL_RE = re.compile(r"Journal\.(\d\d)(\d\d)(\d\d)(\d{6})\.")
+
+
+def _journal_sort_key(file_path: str) -> str:
+    """
+    Journal's name contains its creation time: "Journal.2024-05-01T101500.01.log",
+    older game versions wrote "Journal.240501101500.01.log", it is converted to the newer form.
+    """
+    name = os.path.basename(file_path)
+    legacy = _LEGACY_JOURNAL_RE.match(name)
+    if legacy:
+        year, month, day, clock = legacy.groups()
+        return f"Journal.20{year}-{month}-{day}T{clock}.{name[legacy.end():]}"
+    return name
+
+
+def scan_journal_tail(
+    journal_dir: Optional[str] = None,
+    max_files: int = 5,
+    max_bytes: int = 16 * 1024 * 1024,
+) -> RecoveredJournalState:
+    """
+    Restores last known docking, target, route and carrier's state from the newest journal files,
+    read backwards.
+    Stops as soon as everything is found or reading limits are reached, so it takes milliseconds
+    regardless of journal history size.
+    """
+    journal_dir = journal_dir or plugin_paths.journal_dir()
+    state = RecoveredJournalState()
+    if not journal_dir:
+        return state
+
+    # Sorted by names, files may be rotated meanwhile, so they are not stat-ed.
+    journals = sorted(
+        glob.glob(os.path.join(journal_dir, "Journal.*.log")),
+        key=_journal_sort_key,
+        reverse=True,
+    )
+    budget = [max_bytes]
+    for file_path in journals[:max_files]:
+        try:
+            for line in _read_interesting_lines_backwards(file_path, budget):
+                match = _EVENT_RE.search(line)
+                if not match or match.group(1) not in _INTERESTING_EVENTS:
+                    continue
+                try:
+                    entry = fast_json.loads(line)
+                except ValueError:
+                    continue
+                _apply_record(state, match.group(1), entry, journal_dir)
+                if state.is_complete():
+                    return state
+        except OSError as e:
+            logger.warning("Failed to scan journal %s: %s", file_path, e)
+        if budget[0] <= 0:
+            break
+    return state
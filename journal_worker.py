@@ -0,0 +1,143 @@
+import queue
+import threading
+import tkinter as tk
+from typing import Callable, Hashable, Optional, TypeAlias
+from _logger import get_logger
+from metrics import Metrics
+from tk_dispatch import TkDispatcher
+
+logger = get_logger("journal")
+
+RenderRequest: TypeAlias = Callable[[], None]
+JournalJob: TypeAlias = Callable[[], Optional[RenderRequest]]
+
+
+class JournalWorker:
+    """
+    Processes journal related jobs in dedicated thread, so EDMC's callback returns immediately.
+    Job may return render request which is executed later in Tk thread.
+
+    - Queue is bounded, if it is full new job is dropped instead of blocking the caller.
+    - Job submitted with the key supersedes not yet processed older job with the same key.
+    - Render requests with the same key are coalesced, only the latest one is executed.
+    """
+
+    def __init__(self, tk_widget: tk.Widget, maxsize: int = 256):
+        self._dispatcher = TkDispatcher.of(tk_widget)
+        self._queue: queue.Queue[
+            tuple[int, Optional[Hashable], Optional[JournalJob]]
+        ] = queue.Queue(maxsize=maxsize)
+        self._mutex = threading.Lock()
+        self._sequence: int = 0
+        self._latest_by_key: dict[Hashable, int] = {}
+        self._pending_renders: dict[Hashable, RenderRequest] = {}
+        self._flush_scheduled = False
+        self._dropped: int = 0
+
+        self._thread = threading.Thread(
+            target=self._run, name="FcCompanionJournal", daemon=True
+        )
+        self._thread.start()
+
+    @property
+    def dropped(self) -> int:
+        """Count of the jobs dropped because queue was full."""
+        return self._dropped
+
+    def submit(self, job: JournalJob, key: Optional[Hashable] = None) -> bool:
+        """
+        Queues job for the worker thread. Never blocks.
+        Returns False if job was dropped because queue is full.
+        """
+        with self._mutex:
+            self._sequence += 1
+            sequence = self._sequence
+            try:
+                self._queue.put_nowait((sequence, key, job))
+            except queue.Full:
+                sequence = 0
+            else:
+                if key is not None:
+                    self._latest_by_key[key] = sequence
+        if not sequence:
+            self._dropped += 1
+            Metrics.count("journal.dropped")
+            logger.warning(
+                "Journal queue is full, dropped job (%d total).", self._dropped
+            )
+            return False
+        return True
+
+    def is_idle(self) -> bool:
+        """
+        True if there are no queued jobs and no pending render requests.
+        """
+        with self._mutex:
+            return self._queue.unfinished_tasks == 0 and not self._pending_renders
+
+    def post_render(self, render: RenderRequest, key: Hashable) -> None:
+        """
+        Schedules render request into Tk thread. Can be called from any thread.
+        """
+        with self._mutex:
+            self._pending_renders[key] = render
+            if self._flush_scheduled:
+                return
+            self._flush_scheduled = True
+        self._dispatcher.post(self._flush_renders)
+
+    def stop(self) -> None:
+        """
+        Stops worker thread. Pending jobs are discarded.
+        """
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+            self._queue.task_done()
+        self._queue.put((0, None, None))
+
+    def _flush_renders(self):
+        with self._mutex:
+            renders = list(self._pending_renders.values())
+            self._pending_renders.clear()
+            self._flush_scheduled = False
+        for render in renders:
+            try:
+                render()
+            except Exception as e:
+                logger.exception("Render request failed.", exc_info=e)
+
+    def _is_superseded(self, sequence: int, key: Optional[Hashable]) -> bool:
+        if key is None:
+            return False
+        with self._mutex:
+            if self._latest_by_key.get(key) != sequence:
+                return True
+            del self._latest_by_key[key]
+            return False
+
+    def _run(self):
+        while True:
+            sequence, key, job = self._queue.get()
+            if job is None:
+                return
+            try:
+                self._process(sequence, key, job)
+            finally:
+                self._queue.task_done()
+
+    def _process(self, sequence: int, key: Optional[Hashable], job: JournalJob):
+        if self._is_superseded(sequence, key):
+            Metrics.count("journal.superseded")
+            logger.debug("Skipping superseded journal job, key %s.", key)
+            return
+        try:
+            with Metrics.timer("journal.job"):
+                render = job()
+        except Exception as e:
+            logger.exception("Journal job failed.", exc_info=e)
+            return
+        if render is not None:
+            self.post_render(render, key if key is not None else ("job", sequence))
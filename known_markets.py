@@ -0,0 +1,138 @@
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, ClassVar
+from _logger import get_logger
+
+logger = get_logger("market")
+
+
+@dataclass(frozen=True, slots=True)
+class MarketBuy:
+    price: int
+    demand: int
+
+
+@dataclass(frozen=True, slots=True)
+class KnownMarket:
+    """
+    What station buys, as it was known at "updated" (unix time).
+    System is empty if it is unknown.
+    """
+
+    market_id: int
+    station_name: str
+    system_name: str
+    buys: dict[int, MarketBuy]
+    updated: float
+
+    @property
+    def key(self) -> int | str:
+        return self.market_id if self.market_id > 0 else self.station_name
+
+
+class KnownMarkets:
+    """
+    All markets plugin has seen in this session: docked ones (Market.json) and fetched from EDSM.
+
+    Commodities get bit numbers on the first sight, so market's "buys" is kept as bitset as well,
+    which makes coverage checks a single AND.
+    Buyers of each commodity are indexed too, the index is updated with each market.
+    """
+
+    _mutex: ClassVar[threading.Lock] = threading.Lock()
+    _markets: ClassVar[dict[int | str, KnownMarket]] = {}
+    _masks: ClassVar[dict[int | str, int]] = {}
+    _bit_of_commodity: ClassVar[dict[int, int]] = {}
+    # Commodity id -> (market key -> market buying it).
+    _buyers: ClassVar[dict[int, dict[int | str, KnownMarket]]] = {}
+    _revision: ClassVar[int] = 0
+    _handlers: ClassVar[list[Callable[[KnownMarket], None]]] = []
+
+    @classmethod
+    def update(
+        cls,
+        market_id: int,
+        station_name: str,
+        system_name: str,
+        buys: dict[int, MarketBuy],
+    ) -> None:
+        """
+        Stores market's data, replacing older one of the same station. Can be called from any thread.
+        """
+        market = KnownMarket(market_id, station_name, system_name, buys, time.time())
+        with cls._mutex:
+            mask = 0
+            for commodity_id in buys:
+                bit = cls._bit_of_commodity.get(commodity_id)
+                if bit is None:
+                    bit = cls._bit_of_commodity[commodity_id] = len(
+                        cls._bit_of_commodity
+                    )
+                mask |= 1 << bit
+            previous = cls._markets.get(market.key)
+            if not system_name and previous is not None:
+                # Market.json may come without the system, keep one known from EDSM.
+                market = KnownMarket(
+                    market_id, station_name, previous.system_name, buys, market.updated
+                )
+            if previous is not None:
+                for commodity_id in previous.buys.keys() - buys.keys():
+                    buyers = cls._buyers[commodity_id]
+                    buyers.pop(previous.key, None)
+                    if not buyers:
+                        del cls._buyers[commodity_id]
+            for commodity_id in buys:
+                cls._buyers.setdefault(commodity_id, {})[market.key] = market
+            cls._markets[market.key] = market
+            cls._masks[market.key] = mask
+            cls._revision += 1
+            handlers = list(cls._handlers)
+        logger.debug("Known market of %s: %d buys", station_name, len(buys))
+        for handler in handlers:
+            handler(market)
+
+    @classmethod
+    def add_on_market_update_handler(
+        cls, handler: Callable[[KnownMarket], None]
+    ) -> None:
+        """
+        Handler is called with updated market, from the thread which updated it.
+        """
+        with cls._mutex:
+            cls._handlers.append(handler)
+
+    @classmethod
+    def snapshot(
+        cls,
+    ) -> tuple[int, dict[int, int], list[tuple[KnownMarket, int]]]:
+        """
+        Returns (revision, commodity id -> bit, [(market, buys bitset)]).
+        """
+        with cls._mutex:
+            return (
+                cls._revision,
+                dict(cls._bit_of_commodity),
+                [(market, cls._masks[key]) for key, market in cls._markets.items()],
+            )
+
+    @classmethod
+    def market(cls, key: int | str) -> KnownMarket | None:
+        with cls._mutex:
+            return cls._markets.get(key)
+
+    @classmethod
+    def buyers_of(cls, commodity_id: int) -> list[KnownMarket]:
+        """
+        Known markets buying the commodity, price and demand are in market's "buys".
+        """
+        with cls._mutex:
+            return list(cls._buyers.get(commodity_id, {}).values())
+
+    @classmethod
+    def revision(cls) -> int:
+        return cls._revision
+
+    @classmethod
+    def size(cls) -> int:
+        return len(cls._markets)
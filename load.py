@@ -1,18 +1,23 @@
 import sys
 import os
 
-from ui_frame import MainUiFrame
-
 sys.path.insert(
     0, os.path.join(os.path.dirname(__file__), "..", "ed-fc-cargo-tracker-lib")
 )
 
-from _logger import logger
+from _logger import get_logger, stop_logging
 from _logger import plugin_name
-from typing import Any
+from typing import Any, TYPE_CHECKING
 from typing import Optional
 
-_main_frame: MainUiFrame | None = None
+if TYPE_CHECKING:
+    from ui_frame import MainUiFrame
+
+logger = get_logger("plugin")
+
+# UI and everything it needs (web search, menus, etc.) is imported in plugin_app(),
+# so plugin_start3() adds close to nothing to EDMC's startup.
+_main_frame: "MainUiFrame | None" = None
 
 
 def plugin_start3(plugin_dir: str) -> str:
@@ -33,6 +38,13 @@ def journal_entry(
         _main_frame.journal_entry(cmdr, is_beta, system, station, entry, state)
 
 
+def plugin_stop() -> None:
+    global _main_frame
+    if _main_frame:
+        _main_frame.stop()
+    stop_logging()
+
+
 # def plugin_prefs(parent, cmdr, is_beta):
 #     return nb.Frame()
 
@@ -43,5 +55,7 @@ def journal_entry(
 
 def plugin_app(parent: Any):
     global _main_frame
+    from ui_frame import MainUiFrame
+
     _main_frame = MainUiFrame(parent)
     return _main_frame
@@ -0,0 +1,143 @@
+import json
+import threading
+import time
+from array import array
+from typing import Any, Callable, ClassVar, Optional
+
+
+class _RingBuffer:
+    """
+    Keeps last N samples in preallocated array, so recording does not allocate.
+    """
+
+    __slots__ = ("_values", "_next", "_filled", "total_count", "total_sum")
+
+    def __init__(self, size: int):
+        self._values = array("d", bytes(8 * size))
+        self._next: int = 0
+        self._filled: int = 0
+        self.total_count: int = 0
+        self.total_sum: float = 0.0
+
+    def add(self, value: float):
+        self._values[self._next] = value
+        self._next = (self._next + 1) % len(self._values)
+        if self._filled < len(self._values):
+            self._filled += 1
+        self.total_count += 1
+        self.total_sum += value
+
+    def samples(self) -> list[float]:
+        return list(self._values[: self._filled])
+
+
+class _TimerContext:
+    __slots__ = ("_name", "_start")
+
+    def __init__(self, name: str):
+        self._name = name
+        self._start = 0.0
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *args: Any):
+        Metrics.record(self._name, time.perf_counter() - self._start)
+
+
+class Metrics:
+    """
+    Lightweight registry of timers and counters for hot paths.
+    Timer keeps last samples in fixed-size ring buffer, percentiles are computed only when read.
+    """
+
+    SAMPLES_PER_TIMER: ClassVar[int] = 512
+
+    _mutex: ClassVar[threading.Lock] = threading.Lock()
+    _timers: ClassVar[dict[str, _RingBuffer]] = {}
+    _counters: ClassVar[dict[str, int]] = {}
+    _started: ClassVar[float] = time.time()
+    _sections: ClassVar[dict[str, Callable[[], Any]]] = {}
+
+    @classmethod
+    def timer(cls, name: str) -> _TimerContext:
+        """
+        Usage: with Metrics.timer("edsm.stations"): ...
+        """
+        return _TimerContext(name)
+
+    @classmethod
+    def record(cls, name: str, seconds: float) -> None:
+        with cls._mutex:
+            buffer = cls._timers.get(name)
+            if buffer is None:
+                buffer = cls._timers[name] = _RingBuffer(cls.SAMPLES_PER_TIMER)
+            buffer.add(seconds)
+
+    @classmethod
+    def count(cls, name: str, increment: int = 1) -> None:
+        with cls._mutex:
+            cls._counters[name] = cls._counters.get(name, 0) + increment
+
+    @classmethod
+    def cache_access(cls, cache_name: str, hit: bool) -> None:
+        cls.count(f"cache.{cache_name}.{'hit' if hit else 'miss'}")
+
+    @classmethod
+    def register_section(cls, name: str, provider: Callable[[], Any]) -> None:
+        """
+        Adds extra data to the snapshot, provider is called only when snapshot is taken.
+        """
+        with cls._mutex:
+            cls._sections[name] = provider
+
+    @classmethod
+    def snapshot(cls) -> dict[str, Any]:
+        """
+        Returns current state: counters and timers' percentiles in milliseconds.
+        """
+        with cls._mutex:
+            counters = dict(cls._counters)
+            sections = dict(cls._sections)
+            timers = {
+                name: (buffer.samples(), buffer.total_count, buffer.total_sum)
+                for name, buffer in cls._timers.items()
+            }
+
+        timers_stats: dict[str, dict[str, float]] = {}
+        for name, (samples, total_count, total_sum) in sorted(timers.items()):
+            samples.sort()
+            timers_stats[name] = {
+                "count": total_count,
+                "mean_ms": total_sum / total_count * 1000 if total_count else 0.0,
+                "p50_ms": cls._percentile(samples, 0.50) * 1000,
+                "p90_ms": cls._percentile(samples, 0.90) * 1000,
+                "p99_ms": cls._percentile(samples, 0.99) * 1000,
+                "max_ms": (samples[-1] if samples else 0.0) * 1000,
+            }
+        return {
+            "uptime_sec": time.time() - cls._started,
+            "counters": dict(sorted(counters.items())),
+            "timers": timers_stats,
+            "sections": {name: provider() for name, provider in sections.items()},
+        }
+
+    @classmethod
+    def dump_json(cls, file_path: Optional[str] = None) -> str:
+        """
+        Returns snapshot as JSON text, writes it to the file too if file_path is given.
+        """
+        text = json.dumps(cls.snapshot(), indent=2)
+        if file_path:
+            with open(file_path, "w", encoding="utf-8") as f:
+                f.write(text)
+        return text
+
+    @staticmethod
+    def _percentile(sorted_samples: list[float], p: float) -> float:
+        if not sorted_samples:
+            return 0.0
+        return sorted_samples[
+            min(len(sorted_samples) - 1, int(p * len(sorted_samples)))
+        ]
@@ -0,0 +1,44 @@
+from typing import Optional
+from known_markets import KnownMarket, KnownMarkets
+from metrics import Metrics
+from system_coords import SystemCoordinates
+
+
+class NearestBuyers:
+    """
+    Known markets buying the commodity, the nearest to the given system first.
+    Only local data is used: known markets and known systems' coordinates.
+    """
+
+    @staticmethod
+    def find(
+        commodity_id: int,
+        origin: str,
+        count: int = 10,
+        exclude_station: Optional[str] = None,
+    ) -> list[tuple[KnownMarket, float]]:
+        """
+        Returns up to count (market, distance in ly). Empty if origin's coordinates are unknown.
+        """
+        center = SystemCoordinates.get(origin)
+        if center is None:
+            return []
+        with Metrics.timer("buyers.nearest"):
+            buyers_per_system: dict[str, list[KnownMarket]] = {}
+            for market in KnownMarkets.buyers_of(commodity_id):
+                if not market.system_name or market.station_name == exclude_station:
+                    continue
+                buyers_per_system.setdefault(market.system_name.lower(), []).append(
+                    market
+                )
+            result: list[tuple[KnownMarket, float]] = []
+            # Each system may have several buyers, so count systems is enough.
+            for system, distance in SystemCoordinates.nearest(
+                center, buyers_per_system.keys(), count
+            ):
+                for market in sorted(
+                    buyers_per_system[system.lower()],
+                    key=lambda m: -m.buys[commodity_id].price,
+                ):
+                    result.append((market, distance))
+            return result[:count]
@@ -0,0 +1,88 @@
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import IO, ClassVar, Iterable, Iterator
+from _logger import get_logger
+import plugin_paths
+
+logger = get_logger("store")
+
+
+@contextmanager
+def atomic_write(file_path: str) -> Iterator[IO[str]]:
+    """
+    Opens temporary file next to file_path for writing, it replaces file_path only if the block succeeds.
+    Readers never see partially written file.
+    """
+    directory = os.path.dirname(os.path.abspath(file_path))
+    with tempfile.NamedTemporaryFile(
+        "w", encoding="utf-8", dir=directory, delete=False, newline="\n"
+    ) as f:
+        try:
+            yield f
+        except BaseException:
+            f.close()
+            os.unlink(f.name)
+            raise
+    os.replace(f.name, file_path)
+
+
+class PersistentStore:
+    """
+    Base of the classes keeping their state in FILE_NAME of plugin's data directory.
+
+    State is loaded on the first use by _ensure_loaded(), which can be called from any thread:
+    other threads wait until the load is finished. Subclasses implement _load().
+    Each subclass gets own load lock and flag, its data needs own mutex.
+    """
+
+    FILE_NAME: ClassVar[str] = ""
+
+    _load_mutex: ClassVar[threading.Lock]
+    _loaded: ClassVar[bool]
+
+    def __init_subclass__(cls, **kwargs):  # type: ignore
+        super().__init_subclass__(**kwargs)
+        cls._load_mutex = threading.Lock()
+        cls._loaded = False
+
+    @classmethod
+    def _load(cls) -> None:
+        raise NotImplementedError
+
+    @classmethod
+    def _ensure_loaded(cls) -> None:
+        if cls._loaded:
+            return
+        with cls._load_mutex:
+            if cls._loaded:
+                return
+            cls._load()
+            cls._loaded = True
+
+    @classmethod
+    def _file_path(cls) -> str:
+        return os.path.join(plugin_paths.plugin_data_dir(), cls.FILE_NAME)
+
+    @classmethod
+    def _iter_lines(cls) -> Iterator[bytes]:
+        """
+        Yields lines of the store's file, nothing if there is no file yet.
+        """
+        try:
+            with open(cls._file_path(), "rb") as f:
+                yield from f
+        except FileNotFoundError:
+            return
+
+    @classmethod
+    def _append_lines(cls, lines: Iterable[str]) -> None:
+        """
+        Appends lines (with their line ends) to the store's file, errors are logged.
+        """
+        try:
+            with open(cls._file_path(), "a", encoding="utf-8", newline="\n") as f:
+                f.writelines(lines)
+        except OSError as e:
+            logger.warning("Could not store %s: %s", cls.FILE_NAME, e)
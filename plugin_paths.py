@@ -0,0 +1,26 @@
+import os
+from config import config
+
+
+def journal_dir() -> str:
+    """
+    Returns directory where game writes journal and Market.json as EDMC is configured.
+    """
+    directory = config.get_str("journaldir")
+    if not directory:
+        directory = config.default_journal_dir
+    return directory
+
+
+DATA_DIR_CONFIG_KEY = "fc_companion_data_dir"
+
+
+def plugin_data_dir() -> str:
+    """
+    Returns directory for plugin's own persistent data (indexes, caches), creates it if needed.
+    """
+    directory = config.get_str(DATA_DIR_CONFIG_KEY)
+    if not directory:
+        directory = os.path.join(str(config.app_dir_path), "fc_companion")
+    os.makedirs(directory, exist_ok=True)
+    return directory
@@ -0,0 +1,187 @@
+import math
+from dataclasses import dataclass
+from typing import Callable, Optional
+from known_markets import KnownMarket, KnownMarkets
+from metrics import Metrics
+from spatial_index import SpatialGrid
+from system_coords import Coords, SystemCoordinates
+from task_runner import CancelToken
+
+
+@dataclass(frozen=True, slots=True)
+class RouteLeg:
+    system_name: str
+    # Carrier's jumps from the previous leg.
+    jumps: int
+    distance: float
+    value: int
+    # Station -> (commodity id -> quantity sold there).
+    sold: dict[str, dict[int, int]]
+
+
+@dataclass(frozen=True, slots=True)
+class RoutePlan:
+    legs: list[RouteLeg]
+    value: int
+    jumps: int
+
+    @property
+    def value_per_jump(self) -> float:
+        return self.value / self.jumps if self.jumps else 0.0
+
+
+@dataclass(frozen=True, slots=True)
+class _State:
+    system_index: int
+    remaining: dict[int, int]
+    legs: tuple[RouteLeg, ...]
+    value: int
+    jumps: int
+
+    @property
+    def score(self) -> float:
+        return self.value / self.jumps if self.jumps else 0.0
+
+
+class CarrierRoutePlanner:
+    """
+    Searches short sequence of carrier's jumps to the systems with known markets,
+    which sells the most of the cargo value per jump.
+
+    Candidates are systems with known markets and known coordinates (SystemCoordinates: journal, EDSM,
+    or dump imported by tools/import_edsm_systems.py --coords into plugin's data directory). Leg to the system
+    farther than jump range costs several jumps (through any systems on the way).
+    Search is bounded beam search: on each leg only beam_width best routes are extended.
+    The first leg alone usually has the best value per jump, so of all routes which are at least
+    min_efficiency times as good per jump as the best one, the route selling the most wins.
+    """
+
+    @staticmethod
+    def plan(
+        origin: str,
+        cargo: dict[int, int],
+        jump_range: float = 500.0,
+        max_legs: int = 4,
+        max_jumps_per_leg: int = 2,
+        beam_width: int = 8,
+        min_efficiency: float = 0.5,
+        exclude_station: Optional[str] = None,
+        cancel_token: Optional[CancelToken] = None,
+        coords_of: Callable[[str], Optional[Coords]] = SystemCoordinates.get,
+    ) -> Optional[RoutePlan]:
+        """
+        Returns the best plan or None if no reachable known market buys the cargo.
+        Parameters:
+            cargo: Commodity id -> quantity on carrier.
+            exclude_station: Station which is never planned (own carrier).
+        """
+        with Metrics.timer("route_plan.compute"):
+            origin_coords = coords_of(origin)
+            if origin_coords is None:
+                return None
+
+            # Markets grouped by system, systems are numbered for the grid.
+            systems: list[tuple[str, Coords, list[KnownMarket]]] = []
+            index_of: dict[str, int] = {}
+            _, _, markets = KnownMarkets.snapshot()
+            for market, _ in markets:
+                if not market.system_name or market.station_name == exclude_station:
+                    continue
+                if not any(commodity_id in cargo for commodity_id in market.buys):
+                    continue
+                index = index_of.get(market.system_name.lower())
+                if index is None:
+                    coords = coords_of(market.system_name)
+                    if coords is None:
+                        continue
+                    index = index_of[market.system_name.lower()] = len(systems)
+                    systems.append((market.system_name, coords, []))
+                systems[index][2].append(market)
+            if not systems:
+                return None
+
+            grid = SpatialGrid(cell_size=jump_range)
+            for index, (_, coords, _) in enumerate(systems):
+                grid.add(index, *coords)
+
+            start = _State(-1, {c: q for c, q in cargo.items() if q > 0}, (), 0, 0)
+            beam = [start]
+            explored: list[_State] = []
+            for _ in range(max_legs):
+                if cancel_token is not None:
+                    cancel_token.raise_if_cancelled()
+                extended: list[_State] = []
+                for state in beam:
+                    position = (
+                        origin_coords
+                        if state.system_index < 0
+                        else systems[state.system_index][1]
+                    )
+                    visited = {leg.system_name for leg in state.legs}
+                    for index, distance in grid.within(
+                        *position, jump_range * max_jumps_per_leg
+                    ):
+                        name, _, system_markets = systems[index]
+                        if name in visited or name.lower() == origin.lower():
+                            continue
+                        remaining = dict(state.remaining)
+                        value, sold = CarrierRoutePlanner._sell_in_system(
+                            system_markets, remaining
+                        )
+                        if value <= 0:
+                            continue
+                        jumps = max(1, math.ceil(distance / jump_range))
+                        leg = RouteLeg(name, jumps, distance, value, sold)
+                        extended.append(
+                            _State(
+                                index,
+                                remaining,
+                                state.legs + (leg,),
+                                state.value + value,
+                                state.jumps + jumps,
+                            )
+                        )
+                if not extended:
+                    break
+                extended.sort(key=lambda s: (-s.score, -s.value))
+                beam = extended[:beam_width]
+                explored.extend(beam)
+                if all(not any(s.remaining.values()) for s in beam):
+                    break
+
+            if not explored:
+                return None
+            good_enough = min_efficiency * max(s.score for s in explored)
+            best = max(
+                (s for s in explored if s.score >= good_enough),
+                key=lambda s: (s.value, -s.jumps),
+            )
+            return RoutePlan(list(best.legs), best.value, best.jumps)
+
+    @staticmethod
+    def _sell_in_system(
+        markets: list[KnownMarket], remaining: dict[int, int]
+    ) -> tuple[int, dict[str, dict[int, int]]]:
+        """
+        Sells what markets of the system buy, the best price first. Updates remaining.
+        """
+        offers = sorted(
+            (
+                (buy.price, buy.demand, commodity_id, market.station_name)
+                for market in markets
+                for commodity_id, buy in market.buys.items()
+                if remaining.get(commodity_id, 0) > 0 and buy.price > 0
+            ),
+            reverse=True,
+        )
+        value = 0
+        sold: dict[str, dict[int, int]] = {}
+        for price, demand, commodity_id, station in offers:
+            quantity = min(remaining[commodity_id], demand)
+            if quantity <= 0:
+                continue
+            remaining[commodity_id] -= quantity
+            value += quantity * price
+            per_station = sold.setdefault(station, {})
+            per_station[commodity_id] = per_station.get(commodity_id, 0) + quantity
+        return value, sold
@@ -1,10 +1,15 @@
-import json
 import os
+from dataclasses import dataclass, field
 from typing import Any
 from carrier_cargo_position import CarrierCargoPosition
-from config import config
+from known_markets import KnownMarket, KnownMarkets, MarketBuy
+import plugin_paths
+from metrics import Metrics
 import cargo_names
-from _logger import logger
+import fast_json
+from _logger import get_logger
+
+logger = get_logger("market")
 
 
 class FilterSellOnStationProtocol:
@@ -29,6 +34,46 @@ class FilterSellOnStationProtocol:
     """Returns for what station this filter was created. """
 
 
+@dataclass
+class _MarketJsonItem:
+    id: int
+    Demand: int = 0
+    SellPrice: int = 0
+
+
+@dataclass
+class _MarketJson:
+    """
+    Part of Market.json the plugin needs, other fields are skipped while parsing.
+    """
+
+    MarketID: int = 0
+    StationName: str = ""
+    StarSystem: str = ""
+    Items: list[_MarketJsonItem] = field(default_factory=list)
+
+    @staticmethod
+    def from_parsed(content: dict[str, Any]) -> "_MarketJson":
+        items: list[_MarketJsonItem] = []
+        for i in content.get("Items", []):
+            try:
+                items.append(
+                    _MarketJsonItem(
+                        int(i["id"]),
+                        int(i.get("Demand", 0)),
+                        int(i.get("SellPrice", 0)),
+                    )
+                )
+            except Exception as e:
+                logger.warning("Skipping malformed item in Market.json: %s (%s)", i, e)
+        return _MarketJson(
+            int(content.get("MarketID", 0)),
+            str(content.get("StationName", "")),
+            str(content.get("StarSystem", "")),
+            items,
+        )
+
+
 class FilterSellOnDockedStation(FilterSellOnStationProtocol):
     def __init__(self, station: str):
         self._station_buys: list[cargo_names.MarketNameWithCommodity] = []
@@ -48,26 +93,45 @@ class FilterSellOnDockedStation(FilterSellOnStationProtocol):
         return self._station
 
     def _load_market_json_what_station_buys(self):
-        journal_dir = config.get_str("journaldir")
-        if not journal_dir:
-            journal_dir = config.default_journal_dir
-        file_path = os.path.join(journal_dir, "Market.json")
+        with Metrics.timer("market_json.parse"):
+            self._parse_market_json()
+
+    def _parse_market_json(self):
+        file_path = os.path.join(plugin_paths.journal_dir(), "Market.json")
 
         try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                content = json.load(f)
+            with open(file_path, "rb") as f:
+                content = fast_json.loads_typed(
+                    f.read(), _MarketJson, _MarketJson.from_parsed
+                )
         except Exception as e:
-            logger.error(f"Failed to load Market.json: {e}")
+            logger.error("Failed to load Market.json: %s", e)
             return
 
-        items: list[dict[str, Any]] = content.get("Items", [])
-        for i in items:
-            try:
-                if int(i.get("Demand", 0)) <= 0:
-                    continue
-                commodity_id = int(i["id"])
-                item = cargo_names.MarketCatalogue.explain_commodity_id(commodity_id)
-                if item:
-                    self._station_buys.append(item)
-            except Exception as e:
-                logger.warning(f"Skipping malformed item in Market.json: {i} ({e})")
+        buys: dict[int, MarketBuy] = {}
+        for i in content.Items:
+            if i.Demand <= 0:
+                continue
+            item = cargo_names.MarketCatalogue.explain_commodity_id(i.id)
+            if item:
+                self._station_buys.append(item)
+                buys[i.id] = MarketBuy(i.SellPrice, i.Demand)
+        KnownMarkets.update(content.MarketID, self._station, content.StarSystem, buys)
+
+
+class FilterSellOnKnownMarket(FilterSellOnStationProtocol):
+    """
+    Highlights by market's data plugin already has, without reading anything.
+    """
+
+    def __init__(self, market: KnownMarket):
+        self._market = market
+
+    def is_not(self, station_name: str) -> bool:
+        return self._market.station_name != station_name
+
+    def is_buying(self, what: CarrierCargoPosition) -> bool:
+        return what.id in self._market.buys
+
+    def get_station(self) -> str:
+        return self._market.station_name
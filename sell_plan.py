@@ -0,0 +1,102 @@
+import heapq
+from dataclasses import dataclass
+from typing import Optional
+from known_markets import KnownMarket, KnownMarkets
+from metrics import Metrics
+
+
+@dataclass(frozen=True, slots=True)
+class SellPlanStop:
+    market: KnownMarket
+    # Commodity id -> quantity sold there.
+    sold: dict[int, int]
+    value: int
+
+
+class SellPlanner:
+    """
+    Picks few stations which together buy the most of the cargo value (greedy set cover).
+
+    Station's gain is the value of the cargo it can still absorb (limited by its demand).
+    Gains only decrease as cargo is planned to be sold, so lazy greedy is used: stations are
+    kept in heap by their last known gain and only the top one is recomputed.
+    """
+
+    @staticmethod
+    def plan(
+        cargo: dict[int, int],
+        max_stops: int = 10,
+        exclude_station: Optional[str] = None,
+    ) -> list[SellPlanStop]:
+        """
+        Parameters:
+            cargo: Commodity id -> quantity on carrier.
+            exclude_station: Station which is never planned (own carrier).
+        """
+        with Metrics.timer("sell_plan.compute"):
+            _, bits, markets = KnownMarkets.snapshot()
+            remaining = {
+                commodity_id: quantity
+                for commodity_id, quantity in cargo.items()
+                if quantity > 0 and commodity_id in bits
+            }
+            cargo_mask = 0
+            for commodity_id in remaining:
+                cargo_mask |= 1 << bits[commodity_id]
+            uncovered = cargo_mask
+
+            # Buys of the cargo's commodities only, as (commodity id, bit, price, demand).
+            commodity_of_bit = {bit: commodity_id for commodity_id, bit in bits.items()}
+            offers: list[list[tuple[int, int, int, int]]] = []
+            candidates: list[tuple[KnownMarket, int]] = []
+            for market, mask in markets:
+                common = mask & cargo_mask
+                if not common or market.station_name == exclude_station:
+                    continue
+                market_offers: list[tuple[int, int, int, int]] = []
+                while common:
+                    low = common & -common
+                    common ^= low
+                    bit = low.bit_length() - 1
+                    commodity_id = commodity_of_bit[bit]
+                    buy = market.buys[commodity_id]
+                    if buy.price > 0 and buy.demand > 0:
+                        market_offers.append((commodity_id, bit, buy.price, buy.demand))
+                if market_offers:
+                    candidates.append((market, mask))
+                    offers.append(market_offers)
+
+            def gain(index: int) -> int:
+                value = 0
+                for commodity_id, _, price, demand in offers[index]:
+                    left = remaining[commodity_id]
+                    if left > 0:
+                        value += (left if left < demand else demand) * price
+                return value
+
+            heap = [(-gain(index), index) for index in range(len(candidates))]
+            heapq.heapify(heap)
+
+            stops: list[SellPlanStop] = []
+            while heap and uncovered and len(stops) < max_stops:
+                _, index = heapq.heappop(heap)
+                if not candidates[index][1] & uncovered:
+                    continue
+                value = gain(index)
+                if value <= 0:
+                    continue
+                if heap and value < -heap[0][0]:
+                    # Stale gain, somebody else may be better now.
+                    heapq.heappush(heap, (-value, index))
+                    continue
+                sold: dict[int, int] = {}
+                for commodity_id, bit, _, demand in offers[index]:
+                    quantity = min(remaining[commodity_id], demand)
+                    if quantity <= 0:
+                        continue
+                    sold[commodity_id] = quantity
+                    remaining[commodity_id] -= quantity
+                    if remaining[commodity_id] <= 0:
+                        uncovered &= ~(1 << bit)
+                stops.append(SellPlanStop(candidates[index][0], sold, value))
+            return stops
@@ -0,0 +1,299 @@
+import heapq
+import math
+from array import array
+from typing import Any, Collection, Iterator, Optional, TypeAlias
+
+
+class SpatialGrid:
+    """
+    Uniform grid over 3D points (galaxy coordinates in ly). Points are identified by integer ids
+    given by the caller. Radius query visits only cells intersecting the query's cube.
+    """
+
+    def __init__(self, cell_size: float = 250.0):
+        self._cell_size = cell_size
+        self._cells: dict[tuple[int, int, int], array] = {}
+        # Flat x, y, z per point id.
+        self._coords = array("d")
+        self._present = bytearray()
+
+    def __len__(self) -> int:
+        return sum(len(ids) for ids in self._cells.values())
+
+    def _cell_of(self, x: float, y: float, z: float) -> tuple[int, int, int]:
+        size = self._cell_size
+        return math.floor(x / size), math.floor(y / size), math.floor(z / size)
+
+    def add(self, point_id: int, x: float, y: float, z: float) -> None:
+        """
+        Adds point. Point id is expected to be small (index in caller's list), re-adding is ignored.
+        """
+        if point_id < len(self._present) and self._present[point_id]:
+            return
+        if point_id >= len(self._present):
+            grow = point_id + 1 - len(self._present)
+            self._present.extend(bytes(grow))
+            self._coords.frombytes(bytes(8 * 3 * grow))
+        self._present[point_id] = 1
+        self._coords[3 * point_id : 3 * point_id + 3] = array("d", (x, y, z))
+        cell = self._cell_of(x, y, z)
+        ids = self._cells.get(cell)
+        if ids is None:
+            ids = self._cells[cell] = array("I")
+        ids.append(point_id)
+
+    def coords(self, point_id: int) -> tuple[float, float, float]:
+        coords = self._coords
+        return coords[3 * point_id], coords[3 * point_id + 1], coords[3 * point_id + 2]
+
+    def within(
+        self, x: float, y: float, z: float, radius: float
+    ) -> Iterator[tuple[int, float]]:
+        """
+        Yields (point id, distance) of the points not farther than radius, unordered.
+        """
+        lo = self._cell_of(x - radius, y - radius, z - radius)
+        hi = self._cell_of(x + radius, y + radius, z + radius)
+        cells = self._cells
+        coords = self._coords
+        radius_sq = radius * radius
+        if (hi[0] - lo[0] + 1) * (hi[1] - lo[1] + 1) * (hi[2] - lo[2] + 1) > len(cells):
+            # Sparse grid, it is cheaper to check all occupied cells.
+            candidates = (
+                ids
+                for cell, ids in cells.items()
+                if all(lo[i] <= cell[i] <= hi[i] for i in range(3))
+            )
+        else:
+            candidates = (
+                ids
+                for cx in range(lo[0], hi[0] + 1)
+                for cy in range(lo[1], hi[1] + 1)
+                for cz in range(lo[2], hi[2] + 1)
+                for ids in (cells.get((cx, cy, cz)),)
+                if ids is not None
+            )
+        for ids in candidates:
+            for point_id in ids:
+                dx = coords[3 * point_id] - x
+                dy = coords[3 * point_id + 1] - y
+                dz = coords[3 * point_id + 2] - z
+                distance_sq = dx * dx + dy * dy + dz * dz
+                if distance_sq <= radius_sq:
+                    yield point_id, math.sqrt(distance_sq)
+
+    def nearest(
+        self,
+        x: float,
+        y: float,
+        z: float,
+        count: int,
+        max_radius: float,
+        among: Optional[Collection[int]] = None,
+    ) -> list[tuple[int, float]]:
+        """
+        Returns up to count (point id, distance) nearest to the point, closest first.
+        If among is given, only those points are considered: callers pass short lists
+        (like systems of the known buyers), so their distances are computed directly.
+        Otherwise search radius grows by cell size until enough points are found.
+        """
+        if among is not None:
+            found: list[tuple[int, float]] = []
+            for point_id in among:
+                if point_id < len(self._present) and self._present[point_id]:
+                    px, py, pz = self.coords(point_id)
+                    distance = math.sqrt((px - x) ** 2 + (py - y) ** 2 + (pz - z) ** 2)
+                    if distance <= max_radius:
+                        found.append((point_id, distance))
+            return heapq.nsmallest(count, found, key=lambda p: p[1])
+        radius = self._cell_size
+        while True:
+            found = sorted(
+                (
+                    p
+                    for p in self.within(x, y, z, radius)
+                    if among is None or p[0] in among
+                ),
+                key=lambda p: p[1],
+            )
+            if len(found) >= count or radius >= max_radius:
+                return found[:count]
+            radius = min(max_radius, radius * 2)
+
+
+class NumpyGrid:
+    """
+    The same queries as SpatialGrid over NumPy arrays. Point ids are sorted by cell with offsets
+    of each cell's run, so radius query gathers only the cells intersecting its cube
+    and checks their points at once.
+    Points added since the last sort are kept in a short tail checked by brute force,
+    the whole index is sorted again once the tail grows.
+    """
+
+    # Cell's coordinates are shifted by it to pack 3 non-negative 21 bits values into one key.
+    _CELL_OFFSET = 1 << 20
+
+    def __init__(self, cell_size: float = 250.0):
+        import numpy
+
+        self._np = numpy
+        self._cell_size = cell_size
+        self._xyz = numpy.zeros((1024, 3), dtype=numpy.float64)
+        self._present = numpy.zeros(1024, dtype=bool)
+        self._count = 0
+        # Point ids sorted by cell's key, sorted unique keys and starts of their runs (+ end).
+        self._sorted_ids = numpy.zeros(0, dtype=numpy.int64)
+        self._cell_keys = numpy.zeros(0, dtype=numpy.int64)
+        self._cell_starts = numpy.zeros(1, dtype=numpy.int64)
+        self._tail: list[int] = []
+
+    def __len__(self) -> int:
+        return self._count
+
+    def add(self, point_id: int, x: float, y: float, z: float) -> None:
+        if point_id >= len(self._present):
+            capacity = max(2 * len(self._present), point_id + 1)
+            xyz = self._np.zeros((capacity, 3), dtype=self._np.float64)
+            xyz[: len(self._xyz)] = self._xyz
+            present = self._np.zeros(capacity, dtype=bool)
+            present[: len(self._present)] = self._present
+            self._xyz, self._present = xyz, present
+        if self._present[point_id]:
+            return
+        self._xyz[point_id] = (x, y, z)
+        self._present[point_id] = True
+        self._count += 1
+        self._tail.append(point_id)
+
+    def coords(self, point_id: int) -> tuple[float, float, float]:
+        x, y, z = self._xyz[point_id]
+        return float(x), float(y), float(z)
+
+    def _cells_of(self, xyz: Any) -> Any:
+        return self._np.floor(xyz / self._cell_size).astype(self._np.int64)
+
+    def _cell_keys_of(self, cells: Any) -> Any:
+        offset = type(self)._CELL_OFFSET
+        return (
+            ((cells[:, 0] + offset) << 42)
+            | ((cells[:, 1] + offset) << 21)
+            | (cells[:, 2] + offset)
+        )
+
+    def _sort_tail(self) -> None:
+        """
+        Sorts the tail into cells, once it is long enough to slow down the queries.
+        """
+        if len(self._tail) <= max(1024, len(self._sorted_ids) // 8):
+            return
+        np = self._np
+        ids = np.concatenate((self._sorted_ids, np.array(self._tail, dtype=np.int64)))
+        keys = self._cell_keys_of(self._cells_of(self._xyz[ids]))
+        order = np.argsort(keys, kind="stable")
+        self._sorted_ids = ids[order]
+        self._cell_keys, starts = np.unique(keys[order], return_index=True)
+        self._cell_starts = np.append(starts, len(ids))
+        self._tail = []
+
+    def _candidates(self, x: float, y: float, z: float, radius: float) -> Any:
+        """
+        Returns ids of the points in the cells intersecting query's cube and of the tail.
+        """
+        np = self._np
+        self._sort_tail()
+        tail = np.array(self._tail, dtype=np.int64)
+        lo, hi = self._cells_of(
+            np.array(
+                (
+                    (x - radius, y - radius, z - radius),
+                    (x + radius, y + radius, z + radius),
+                )
+            )
+        )
+        if int((hi - lo + 1).prod()) > len(self._cell_keys):
+            # Cube covers more cells than there are occupied ones, it is cheaper to check all.
+            return np.concatenate((self._sorted_ids, tail))
+        cells = np.stack(
+            np.meshgrid(
+                *(np.arange(lo[axis], hi[axis] + 1) for axis in range(3)),
+                indexing="ij",
+            ),
+            axis=-1,
+        ).reshape(-1, 3)
+        keys = self._cell_keys_of(cells)
+        positions = np.searchsorted(self._cell_keys, keys)
+        inside = positions < len(self._cell_keys)
+        positions, keys = positions[inside], keys[inside]
+        positions = positions[self._cell_keys[positions] == keys]
+        starts = self._cell_starts[positions]
+        lengths = self._cell_starts[positions + 1] - starts
+        # Concatenated ranges [start, start + length) of the cells' runs.
+        offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+        offsets += np.arange(len(offsets))
+        return np.concatenate((self._sorted_ids[offsets], tail))
+
+    def _closest(
+        self, ids: Any, x: float, y: float, z: float, count: int, radius: float
+    ) -> list[tuple[int, float]]:
+        np = self._np
+        delta = self._xyz[ids] - np.array((x, y, z))
+        distances_sq = np.einsum("ij,ij->i", delta, delta)
+        keep = distances_sq <= radius * radius
+        ids, distances_sq = ids[keep], distances_sq[keep]
+        if len(ids) > count:
+            part = np.argpartition(distances_sq, count - 1)[:count]
+            ids, distances_sq = ids[part], distances_sq[part]
+        order = np.argsort(distances_sq)
+        return [(int(ids[i]), math.sqrt(float(distances_sq[i]))) for i in order]
+
+    def within(
+        self, x: float, y: float, z: float, radius: float
+    ) -> Iterator[tuple[int, float]]:
+        np = self._np
+        ids = self._candidates(x, y, z, radius)
+        delta = self._xyz[ids] - np.array((x, y, z))
+        distances_sq = np.einsum("ij,ij->i", delta, delta)
+        keep = distances_sq <= radius * radius
+        for point_id, distance_sq in zip(ids[keep], distances_sq[keep]):
+            yield int(point_id), math.sqrt(float(distance_sq))
+
+    def nearest(
+        self,
+        x: float,
+        y: float,
+        z: float,
+        count: int,
+        max_radius: float,
+        among: Optional[Collection[int]] = None,
+    ) -> list[tuple[int, float]]:
+        """
+        The same as SpatialGrid.nearest().
+        """
+        np = self._np
+        if count <= 0:
+            return []
+        if among is not None:
+            ids = np.fromiter(among, dtype=np.int64, count=len(among))
+            ids = ids[ids < len(self._present)]
+            return self._closest(ids[self._present[ids]], x, y, z, count, max_radius)
+        radius = self._cell_size
+        while True:
+            found = self._closest(
+                self._candidates(x, y, z, radius), x, y, z, count, radius
+            )
+            if len(found) >= count or radius >= max_radius:
+                return found
+            radius = min(max_radius, radius * 2)
+
+
+SpatialIndex: TypeAlias = SpatialGrid | NumpyGrid
+
+
+def make_spatial_index(cell_size: float = 250.0) -> SpatialIndex:
+    """
+    Returns NumPy backed grid if NumPy is installed, pure Python grid otherwise.
+    """
+    try:
+        return NumpyGrid(cell_size)
+    except ImportError:
+        return SpatialGrid(cell_size)
@@ -0,0 +1,227 @@
+import bisect
+import gzip
+import json
+import threading
+from array import array
+from typing import ClassVar, Iterable, Iterator, Optional
+from _logger import get_logger
+from external_web_search import EdsmCachedAccess, FilteredEdsmStation
+from metrics import Metrics
+from persistent_store import PersistentStore
+import fast_json
+import carrier_helpers
+
+logger = get_logger("stations")
+
+STATIONS_FILE_NAME = "stations.jsonl"
+
+
+def _trigrams(key: str) -> set[str]:
+    return {key[i : i + 3] for i in range(len(key) - 2)}
+
+
+class StationNamesIndex(PersistentStore):
+    """
+    Search of the stations by part of the name over all stations plugin has ever got from EDSM
+    (fetched per system or imported from EDSM's stations dump).
+
+    Queries of 3+ characters use trigram index: candidates are taken from the shortest posting list
+    and verified by substring check. Shorter queries use prefix search over sorted names.
+    Stations are persisted as JSON lines in plugin's data directory.
+    """
+
+    FILE_NAME = STATIONS_FILE_NAME
+
+    _mutex: ClassVar[threading.Lock] = threading.Lock()
+    _stations: ClassVar[list[FilteredEdsmStation]] = []
+    _keys: ClassVar[list[str]] = []
+    # Identity of the station -> position in _stations, to skip already known ones.
+    _known: ClassVar[dict[tuple[int, str, str], int]] = {}
+    _trigram_postings: ClassVar[dict[str, array]] = {}
+    # Sorted (key, position) for short prefix queries.
+    _sorted_keys: ClassVar[list[tuple[str, int]]] = []
+
+    @classmethod
+    def add_stations(cls, stations: Iterable[FilteredEdsmStation]) -> int:
+        """
+        Adds stations to the index and stores new ones on disk. Returns count of new stations.
+        """
+        cls._ensure_loaded()
+        added = cls._add_to_memory(stations)
+        if added:
+            cls._append_lines(cls._to_json_line(station) for station in added)
+        return len(added)
+
+    @classmethod
+    def search(cls, text: str, limit: int = 30) -> list[FilteredEdsmStation]:
+        """
+        Returns stations which names contain text, ones starting with it go first.
+        It stops as soon as limit is reached, so common queries are as cheap as rare ones.
+        """
+        query = text.strip().lower()
+        if not query:
+            return []
+        cls._ensure_loaded()
+        own_carrier = carrier_helpers.CarrierIdentity.call_sign()
+        result: list[FilteredEdsmStation] = []
+        with Metrics.timer("stations.search"), cls._mutex:
+            # Names starting with query go first, then ones containing it.
+            taken: set[int] = set()
+            candidates: list[Iterable[int]] = [
+                cls._iter_prefix_positions(query, limit * 2)
+            ]
+            if len(query) >= 3:
+                candidates.append(cls._trigram_candidates(query))
+            keys = cls._keys
+            for positions in candidates:
+                for position in positions:
+                    if position in taken or query not in keys[position]:
+                        continue
+                    taken.add(position)
+                    station = cls._stations[position]
+                    if station.station_name == own_carrier:
+                        continue
+                    result.append(station)
+                    if len(result) >= limit:
+                        return result
+        return result
+
+    @classmethod
+    def size(cls) -> int:
+        cls._ensure_loaded()
+        return len(cls._stations)
+
+    @classmethod
+    def import_edsm_dump(cls, dump_path: str) -> int:
+        """
+        Imports stations with market from EDSM's stations dump (JSON array with one station per line,
+        may be gzipped). Returns count of new stations.
+        """
+        total = 0
+        batch: list[FilteredEdsmStation] = []
+        for station in cls._iter_dump_stations(dump_path):
+            batch.append(station)
+            if len(batch) >= 10000:
+                total += cls.add_stations(batch)
+                batch = []
+        total += cls.add_stations(batch)
+        logger.info("Imported %d new stations from %s", total, dump_path)
+        return total
+
+    @staticmethod
+    def _iter_dump_stations(dump_path: str) -> Iterator[FilteredEdsmStation]:
+        opener = gzip.open if dump_path.endswith(".gz") else open
+        with opener(dump_path, "rb") as f:  # type: ignore
+            for line in f:
+                line = line.strip().rstrip(b",")
+                if not line.startswith(b"{"):
+                    continue
+                try:
+                    item = fast_json.loads(line)
+                except ValueError:
+                    continue
+                if not item.get("haveMarket", False) or not item.get("marketId"):
+                    continue
+                yield FilteredEdsmStation.create(
+                    item.get("name", ""),
+                    item.get("id", -1),
+                    item.get("marketId", -1),
+                    item.get("systemName", ""),
+                    item.get("type", ""),
+                )
+
+    @staticmethod
+    def _to_json_line(station: FilteredEdsmStation) -> str:
+        return (
+            json.dumps(
+                {
+                    "n": station.station_name,
+                    "i": station.station_id,
+                    "m": station.market_id,
+                    "s": station.system_name,
+                    "t": station.station_type,
+                },
+                separators=(",", ":"),
+            )
+            + "\n"
+        )
+
+    @staticmethod
+    def _identity(station: FilteredEdsmStation) -> tuple[int, str, str]:
+        if station.market_id > 0:
+            return station.market_id, "", ""
+        return 0, station.system_name.lower(), station.station_name.lower()
+
+    @classmethod
+    def _add_to_memory(
+        cls, stations: Iterable[FilteredEdsmStation]
+    ) -> list[FilteredEdsmStation]:
+        added: list[FilteredEdsmStation] = []
+        sorted_keys: list[tuple[str, int]] = []
+        with cls._mutex:
+            for station in stations:
+                if not station.station_name:
+                    continue
+                identity = cls._identity(station)
+                if identity in cls._known:
+                    continue
+                position = len(cls._stations)
+                key = station.station_name.lower()
+                cls._known[identity] = position
+                cls._stations.append(station)
+                cls._keys.append(key)
+                for trigram in _trigrams(key):
+                    posting = cls._trigram_postings.get(trigram)
+                    if posting is None:
+                        posting = cls._trigram_postings[trigram] = array("I")
+                    posting.append(position)
+                sorted_keys.append((key, position))
+                added.append(station)
+            if sorted_keys:
+                # Sorting of already sorted list with appended run is linear.
+                cls._sorted_keys.extend(sorted_keys)
+                cls._sorted_keys.sort()
+        return added
+
+    @classmethod
+    def _trigram_candidates(cls, query: str) -> Iterable[int]:
+        shortest: Optional[array] = None
+        for trigram in _trigrams(query):
+            posting = cls._trigram_postings.get(trigram)
+            if posting is None:
+                return ()
+            if shortest is None or len(posting) < len(shortest):
+                shortest = posting
+        return shortest if shortest is not None else ()
+
+    @classmethod
+    def _iter_prefix_positions(cls, prefix: str, limit: int) -> Iterator[int]:
+        start = bisect.bisect_left(cls._sorted_keys, (prefix, -1))
+        for key, position in cls._sorted_keys[start : start + limit]:
+            if not key.startswith(prefix):
+                return
+            yield position
+
+    @classmethod
+    def _load(cls) -> None:
+        stations: list[FilteredEdsmStation] = []
+        for line in cls._iter_lines():
+            try:
+                item = fast_json.loads(line)
+            except ValueError:
+                continue
+            stations.append(
+                FilteredEdsmStation.create(
+                    item["n"],
+                    item["i"],
+                    item["m"],
+                    item["s"],
+                    item.get("t") or ("Outpost" if item.get("o") else ""),
+                )
+            )
+        with Metrics.timer("stations.load"):
+            cls._add_to_memory(stations)
+        logger.debug("Loaded %d stations into index.", len(cls._stations))
+
+
+EdsmCachedAccess.add_on_stations_fetched_handler(StationNamesIndex.add_stations)
@@ -0,0 +1,79 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Optional
+from _logger import get_logger
+from metrics import Metrics
+from task_runner import CancelToken, TaskCancelled
+
+logger = get_logger("prefetch")
+
+
+class StationsPrefetch:
+    """
+    Speculatively fetches stations and markets' buys of the systems user most likely picks next
+    (current, targeted and route destination), so those are shown without waiting for EDSM.
+    Runs on the single background thread, newer systems cancel the prefetch of the older ones.
+    """
+
+    # Pause between stations, so requests of the user's actions are not queued behind prefetch.
+    PAUSE_SEC = 0.2
+
+    def __init__(self):
+        self._mutex = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="FcCompanionPrefetch"
+        )
+        self._systems: tuple[str, ...] = ()
+        self._token: Optional[CancelToken] = None
+
+    def request(self, systems: Iterable[str]) -> None:
+        """
+        Replaces systems to prefetch. Can be called from any thread.
+        """
+        wanted = tuple(dict.fromkeys(system for system in systems if system))
+        with self._mutex:
+            if wanted == self._systems:
+                return
+            self._systems = wanted
+            if self._token is not None:
+                self._token.cancel()
+            token = self._token = CancelToken()
+        if not wanted:
+            return
+        try:
+            self._executor.submit(self._prefetch, wanted, token)
+        except RuntimeError:
+            # Prefetch was shut down.
+            pass
+
+    def shutdown(self) -> None:
+        with self._mutex:
+            if self._token is not None:
+                self._token.cancel()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    @staticmethod
+    def _prefetch(systems: tuple[str, ...], token: CancelToken) -> None:
+        from external_web_search import EdsmCachedAccess, FilterSellFromEDSM
+
+        try:
+            with Metrics.timer("prefetch.systems"):
+                for system in systems:
+                    token.raise_if_cancelled()
+                    stations = EdsmCachedAccess.get_stations_in_system(system, token)
+                    for station_type, group in stations.items():
+                        # Busy systems have hundreds of carriers, those are fetched on demand.
+                        if station_type == "Fleet Carrier":
+                            continue
+                        for station in group:
+                            if station.market_id <= 0:
+                                continue
+                            time.sleep(StationsPrefetch.PAUSE_SEC)
+                            token.raise_if_cancelled()
+                            FilterSellFromEDSM(station, token)
+            logger.debug("Prefetched systems: %s", ", ".join(systems))
+        except TaskCancelled:
+            Metrics.count("prefetch.cancelled")
+        except Exception as e:
+            logger.warning("Could not prefetch stations of %s: %s", systems, e)
@@ -0,0 +1,218 @@
+import gzip
+import threading
+from typing import ClassVar, Iterable, Iterator, Optional
+from _logger import get_logger
+from metrics import Metrics
+from persistent_store import PersistentStore
+from spatial_index import SpatialIndex, make_spatial_index
+from task_runner import CancelToken
+import fast_json
+
+logger = get_logger("systems")
+
+COORDS_FILE_NAME = "system_coords.tsv"
+
+Coords = tuple[float, float, float]
+
+
+def _key(name: str) -> str:
+    return name.strip().lower()
+
+
+class SystemCoordinates(PersistentStore):
+    """
+    Galaxy coordinates of the star systems (ly), from journal's StarPos, EDSM and EDSM systems dump.
+    Coordinates never change, so each system is stored once, as "Name<TAB>x<TAB>y<TAB>z" line
+    in plugin's data directory. All known systems are kept in spatial grid for neighbour queries.
+    """
+
+    EDSM_BATCH: ClassVar[int] = 50
+    FILE_NAME = COORDS_FILE_NAME
+
+    _mutex: ClassVar[threading.Lock] = threading.Lock()
+    _names: ClassVar[list[str]] = []
+    _index_of: ClassVar[dict[str, int]] = {}
+    # Keeps coordinates too, point id is system's index. Created on load, it may import NumPy.
+    _grid: ClassVar[Optional[SpatialIndex]] = None
+    # Systems EDSM does not know, not asked again in this session.
+    _edsm_misses: ClassVar[set[str]] = set()
+
+    @classmethod
+    def add(cls, name: Optional[str], coords: Optional[Iterable[float]]) -> None:
+        """
+        Remembers coordinates of the system.
+        """
+        if not name or coords is None:
+            return
+        cls.add_many([(name, coords)])
+
+    @classmethod
+    def add_many(cls, systems: Iterable[tuple[str, Iterable[float]]]) -> int:
+        """
+        Adds systems not known yet and stores them on disk. Returns count of new ones.
+        """
+        cls._ensure_loaded()
+        added = cls._add_to_memory(systems)
+        if added:
+            cls._append_lines(
+                f"{name}\t{x:.5f}\t{y:.5f}\t{z:.5f}\n" for name, (x, y, z) in added
+            )
+        return len(added)
+
+    @classmethod
+    def get(cls, name: str) -> Optional[Coords]:
+        cls._ensure_loaded()
+        with cls._mutex:
+            index = cls._index_of.get(_key(name))
+            if index is None:
+                return None
+            assert cls._grid is not None
+            return cls._grid.coords(index)
+
+    @classmethod
+    def within(cls, center: Coords, radius: float) -> list[tuple[str, float]]:
+        """
+        Returns (system, distance) of the known systems around center, unordered.
+        """
+        cls._ensure_loaded()
+        with Metrics.timer("systems.within"), cls._mutex:
+            assert cls._grid is not None
+            return [
+                (cls._names[index], distance)
+                for index, distance in cls._grid.within(*center, radius)
+            ]
+
+    @classmethod
+    def nearest(
+        cls,
+        center: Coords,
+        among: Iterable[str],
+        count: int,
+        max_radius: float = 100_000.0,
+    ) -> list[tuple[str, float]]:
+        """
+        Returns up to count (system, distance) of the given systems nearest to center, closest first.
+        Systems with unknown coordinates are skipped.
+        """
+        cls._ensure_loaded()
+        with Metrics.timer("systems.nearest"), cls._mutex:
+            assert cls._grid is not None
+            ids = {
+                index
+                for index in (cls._index_of.get(_key(name)) for name in among)
+                if index is not None
+            }
+            return [
+                (cls._names[index], distance)
+                for index, distance in cls._grid.nearest(
+                    *center, count, max_radius, among=ids
+                )
+            ]
+
+    @classmethod
+    def size(cls) -> int:
+        cls._ensure_loaded()
+        return len(cls._names)
+
+    @classmethod
+    def fetch_missing(
+        cls, names: Iterable[str], cancel_token: Optional[CancelToken] = None
+    ) -> int:
+        """
+        Asks EDSM for coordinates of the systems which are not known yet. Returns count of found ones.
+        """
+        from external_web_search import get_edsm_systems_coords
+
+        cls._ensure_loaded()
+        with cls._mutex:
+            missing = sorted(
+                {
+                    name
+                    for name in names
+                    if name
+                    and _key(name) not in cls._index_of
+                    and _key(name) not in cls._edsm_misses
+                }
+            )
+        found = 0
+        for start in range(0, len(missing), cls.EDSM_BATCH):
+            batch = missing[start : start + cls.EDSM_BATCH]
+            coords = get_edsm_systems_coords(batch, cancel_token)
+            found += cls.add_many(coords.items())
+            found_keys = {_key(name) for name in coords}
+            with cls._mutex:
+                cls._edsm_misses.update(
+                    _key(name) for name in batch if _key(name) not in found_keys
+                )
+        return found
+
+    @classmethod
+    def import_edsm_dump(cls, dump_path: str, batch_size: int = 10000) -> int:
+        """
+        Imports coordinates from EDSM's systems dump (JSON array with one system per line,
+        may be gzipped). Returns count of new systems.
+        Written into plugin_paths.plugin_data_dir(), outside of EDMC it must be set explicitly.
+        """
+        total = 0
+        batch: list[tuple[str, Coords]] = []
+        for item in cls._iter_dump_systems(dump_path):
+            batch.append(item)
+            if len(batch) >= batch_size:
+                total += cls.add_many(batch)
+                batch = []
+        total += cls.add_many(batch)
+        logger.info("Imported coordinates of %d new systems from %s", total, dump_path)
+        return total
+
+    @staticmethod
+    def _iter_dump_systems(dump_path: str) -> Iterator[tuple[str, Coords]]:
+        opener = gzip.open if dump_path.endswith(".gz") else open
+        with opener(dump_path, "rb") as f:  # type: ignore
+            for line in f:
+                line = line.strip().rstrip(b",")
+                if not line.startswith(b"{"):
+                    continue
+                try:
+                    item = fast_json.loads(line)
+                    coords = item["coords"]
+                    yield item["name"], (
+                        float(coords["x"]),
+                        float(coords["y"]),
+                        float(coords["z"]),
+                    )
+                except (ValueError, KeyError, TypeError):
+                    continue
+
+    @classmethod
+    def _add_to_memory(
+        cls, systems: Iterable[tuple[str, Iterable[float]]]
+    ) -> list[tuple[str, Coords]]:
+        added: list[tuple[str, Coords]] = []
+        with cls._mutex:
+            for name, coords in systems:
+                name = name.strip()
+                key = _key(name)
+                if not key or "\t" in name or key in cls._index_of:
+                    continue
+                try:
+                    x, y, z = (float(c) for c in coords)
+                except (ValueError, TypeError):
+                    continue
+                index = len(cls._names)
+                cls._index_of[key] = index
+                cls._names.append(name)
+                cls._grid.add(index, x, y, z)  # type: ignore
+                added.append((name, (x, y, z)))
+        return added
+
+    @classmethod
+    def _load(cls) -> None:
+        cls._grid = make_spatial_index()
+        systems: list[tuple[str, list[str]]] = []
+        for line in cls._iter_lines():
+            parts = line.decode("utf-8").rstrip("\r\n").split("\t")
+            if len(parts) == 4:
+                systems.append((parts[0], parts[1:]))
+        with Metrics.timer("systems.coords_load"):
+            cls._add_to_memory(systems)
+        logger.debug("Loaded coordinates of %d systems.", len(cls._names))
@@ -0,0 +1,329 @@
+import bisect
+import gzip
+import heapq
+import mmap
+import os
+import tempfile
+import threading
+from typing import IO, ClassVar, Iterator, Optional
+from _logger import get_logger
+from metrics import Metrics
+from persistent_store import PersistentStore, atomic_write
+import fast_json
+import plugin_paths
+
+logger = get_logger("systems")
+
+CATALOGUE_FILE_NAME = "system_names.idx"
+SEEN_FILE_NAME = "seen_systems.txt"
+
+
+def _key(name: str) -> str:
+    return name.strip().lower()
+
+
+class _SortedLinesFile:
+    """
+    Memory-mapped file of lines "key<TAB>Name" sorted by key's bytes.
+    Prefix search is binary search over the bytes, so nothing is loaded into RAM.
+    """
+
+    def __init__(self, file_path: str):
+        self._file = open(file_path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def close(self):
+        self._mm.close()
+        self._file.close()
+
+    def _lower_bound(self, prefix: bytes) -> int:
+        """
+        Returns offset of the first line which key is >= prefix.
+        """
+        mm = self._mm
+        lo, hi = 0, len(mm)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start = mm.rfind(b"\n", 0, mid) + 1
+            end = mm.find(b"\t", start)
+            if mm[start:end] < prefix:
+                next_line = mm.find(b"\n", mid)
+                lo = len(mm) if next_line < 0 else next_line + 1
+            else:
+                hi = start
+        return lo
+
+    def iter_from(self, key: str, prefix_only: bool) -> Iterator[tuple[str, str]]:
+        """
+        Yields (key, name) of the lines starting from the first one >= key, in sorted order.
+        If prefix_only is set, stops on the first line which does not start with key.
+        """
+        mm = self._mm
+        key_bytes = key.encode("utf-8")
+        position = self._lower_bound(key_bytes)
+        size = len(mm)
+        while position < size:
+            end = mm.find(b"\n", position)
+            if end < 0:
+                end = size
+            line = mm[position:end]
+            position = end + 1
+            if prefix_only and not line.startswith(key_bytes):
+                return
+            line_key, _, name = line.partition(b"\t")
+            yield line_key.decode("utf-8"), name.decode("utf-8")
+
+
+class SystemNamesIndex(PersistentStore):
+    """
+    Local index of the known star systems' names for autocompletion and validation of user's input.
+
+    Names come from 2 sources:
+    - catalogue, sorted memory-mapped file built from EDSM systems dump (see tools/import_edsm_systems.py);
+    - systems seen in the journal, kept in RAM and appended to the small text file.
+    """
+
+    FILE_NAME = SEEN_FILE_NAME
+
+    _mutex: ClassVar[threading.Lock] = threading.Lock()
+    _catalogue: ClassVar[Optional[_SortedLinesFile]] = None
+    # Sorted (key, name) of the systems seen in the journal.
+    _seen: ClassVar[list[tuple[str, str]]] = []
+
+    @classmethod
+    def add_seen(cls, name: Optional[str]) -> None:
+        """
+        Remembers system seen in the journal.
+        """
+        if not name or not name.strip():
+            return
+        name = name.strip()
+        item = (_key(name), name)
+        cls._ensure_loaded()
+        with cls._mutex:
+            index = bisect.bisect_left(cls._seen, item)
+            if index < len(cls._seen) and cls._seen[index][0] == item[0]:
+                return
+            cls._seen.insert(index, item)
+        cls._append_lines([name + "\n"])
+
+    @classmethod
+    def has_catalogue(cls) -> bool:
+        """
+        True if full catalogue of systems is available, so unknown names can be treated as typos.
+        """
+        cls._ensure_loaded()
+        return cls._catalogue is not None
+
+    @classmethod
+    def canonical_name(cls, text: str) -> Optional[str]:
+        """
+        Returns properly spelled name if text is known system's name (case insensitive).
+        """
+        key = _key(text)
+        if not key:
+            return None
+        for candidate_key, name in cls._iter_prefix(key):
+            if candidate_key == key:
+                return name
+            break
+        return None
+
+    @classmethod
+    def suggest(cls, text: str, limit: int = 8) -> list[str]:
+        """
+        Returns names starting with text, or similar ones if there are none.
+        """
+        key = _key(text)
+        if not key:
+            return []
+        with Metrics.timer("systems.suggest"):
+            names = [name for _, name in cls._take(cls._iter_prefix(key), limit)]
+            if not names:
+                names = cls._fuzzy(key, limit)
+        return names
+
+    @classmethod
+    def reload(cls) -> None:
+        """
+        Re-opens catalogue, for example after it was rebuilt.
+        """
+        with cls._load_mutex:
+            with cls._mutex:
+                if cls._catalogue is not None:
+                    cls._catalogue.close()
+                    cls._catalogue = None
+                cls._seen = []
+            cls._loaded = False
+        cls._ensure_loaded()
+
+    @classmethod
+    def build_catalogue_from_edsm_dump(
+        cls,
+        dump_path: str,
+        target_path: Optional[str] = None,
+        chunk_size: int = 1_000_000,
+    ) -> int:
+        """
+        Builds catalogue from EDSM's systems dump (JSON array with one system per line, may be gzipped).
+        Sorting is done in chunks merged from disk, so huge dumps do not need huge RAM.
+        Returns count of the stored names.
+        """
+        target_path = target_path or os.path.join(
+            plugin_paths.plugin_data_dir(), CATALOGUE_FILE_NAME
+        )
+        target_dir = os.path.dirname(os.path.abspath(target_path))
+        chunk_files: list[IO[str]] = []
+        try:
+            chunk: list[str] = []
+            for name in cls._iter_dump_names(dump_path):
+                chunk.append(f"{_key(name)}\t{name}\n")
+                if len(chunk) >= chunk_size:
+                    chunk_files.append(cls._write_sorted_chunk(chunk, target_dir))
+                    chunk = []
+            if chunk:
+                chunk_files.append(cls._write_sorted_chunk(chunk, target_dir))
+
+            count = 0
+            previous_key = None
+            with atomic_write(target_path) as out:
+                for line in heapq.merge(*chunk_files, key=cls._line_sort_key):
+                    line_key = line.partition("\t")[0]
+                    if line_key == previous_key:
+                        continue
+                    previous_key = line_key
+                    out.write(line)
+                    count += 1
+        finally:
+            for f in chunk_files:
+                f.close()
+                os.unlink(f.name)
+        logger.info("Built systems catalogue of %d names: %s", count, target_path)
+        return count
+
+    @staticmethod
+    def _line_sort_key(line: str) -> bytes:
+        # Catalogue is searched by bytes, so it must be sorted by bytes too.
+        return line.partition("\t")[0].encode("utf-8")
+
+    @classmethod
+    def _write_sorted_chunk(cls, chunk: list[str], directory: str) -> IO[str]:
+        chunk.sort(key=cls._line_sort_key)
+        f = tempfile.NamedTemporaryFile(
+            "w+", encoding="utf-8", dir=directory, delete=False, newline="\n"
+        )
+        f.writelines(chunk)
+        f.seek(0)
+        return f
+
+    @staticmethod
+    def _iter_dump_names(dump_path: str) -> Iterator[str]:
+        opener = gzip.open if dump_path.endswith(".gz") else open
+        with opener(dump_path, "rb") as f:  # type: ignore
+            for line in f:
+                line = line.strip().rstrip(b",")
+                if not line.startswith(b"{"):
+                    continue
+                try:
+                    name = fast_json.loads(line).get("name")
+                except ValueError:
+                    continue
+                if name and "\t" not in name and "\n" not in name:
+                    yield name
+
+    @classmethod
+    def _load(cls) -> None:
+        catalogue_path = os.path.join(
+            plugin_paths.plugin_data_dir(), CATALOGUE_FILE_NAME
+        )
+        catalogue: Optional[_SortedLinesFile] = None
+        if os.path.isfile(catalogue_path) and os.path.getsize(catalogue_path) > 0:
+            try:
+                catalogue = _SortedLinesFile(catalogue_path)
+            except (OSError, ValueError) as e:
+                logger.warning("Could not open systems catalogue: %s", e)
+        seen: dict[str, str] = {}
+        for line in cls._iter_lines():
+            name = line.decode("utf-8").strip()
+            if name:
+                seen.setdefault(_key(name), name)
+        with cls._mutex:
+            cls._catalogue = catalogue
+            cls._seen = sorted(seen.items())
+
+    @classmethod
+    def _iter_prefix(cls, key: str) -> Iterator[tuple[str, str]]:
+        """
+        Yields (key, name) starting with key from both sources merged, without duplicates.
+        """
+        return cls._iter_from(key, prefix_only=True)
+
+    @classmethod
+    def _iter_from(
+        cls, key: str, prefix_only: bool, seen_limit: int = 64
+    ) -> Iterator[tuple[str, str]]:
+        cls._ensure_loaded()
+        with cls._mutex:
+            start = bisect.bisect_left(cls._seen, (key, ""))
+            seen: list[tuple[str, str]] = []
+            for item in cls._seen[start:]:
+                if prefix_only and not item[0].startswith(key):
+                    break
+                if not prefix_only and len(seen) >= seen_limit:
+                    break
+                seen.append(item)
+        catalogue = cls._catalogue
+        if catalogue is None:
+            yield from seen
+            return
+        previous_key = None
+        # On equal keys catalogue goes first, its spelling is preferred.
+        for item in heapq.merge(
+            catalogue.iter_from(key, prefix_only),
+            seen,
+            key=lambda i: i[0].encode("utf-8"),
+        ):
+            if item[0] != previous_key:
+                previous_key = item[0]
+                yield item
+
+    @staticmethod
+    def _take(items: Iterator[tuple[str, str]], limit: int) -> list[tuple[str, str]]:
+        result: list[tuple[str, str]] = []
+        for item in items:
+            result.append(item)
+            if len(result) >= limit:
+                break
+        return result
+
+    @classmethod
+    def _fuzzy(cls, key: str, limit: int, window: int = 32) -> list[str]:
+        """
+        Typo tolerant search: candidates are taken by shorter and shorter prefixes of the key,
+        then ranked by similarity. Typos are usually at the end of what user typed so far.
+        """
+        import difflib
+
+        # Names sorted right after the key are close to it, like "colonia" for "colnia".
+        candidates: dict[str, str] = dict(
+            cls._take(cls._iter_from(key, prefix_only=False), window // 4)
+        )
+        for length in range(len(key) - 1, max(1, len(key) - 6), -1):
+            for candidate_key, name in cls._take(
+                cls._iter_prefix(key[:length]), window
+            ):
+                candidates.setdefault(candidate_key, name)
+            if len(candidates) >= window:
+                break
+        if not candidates:
+            return []
+        matcher = difflib.SequenceMatcher(b=key, autojunk=False)
+        scored: list[tuple[float, str]] = []
+        for candidate_key, name in candidates.items():
+            # Compare with the same length prefix, user could type only the part of the name.
+            matcher.set_seq1(candidate_key[: len(key)])
+            ratio = matcher.ratio()
+            if ratio >= 0.6:
+                scored.append((ratio, name))
+        scored.sort(key=lambda s: -s[0])
+        return [name for _, name in scored[:limit]]
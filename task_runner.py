@@ -0,0 +1,153 @@
+import threading
+import tkinter as tk
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Generic, Optional, TypeVar
+from _logger import get_logger
+from metrics import Metrics
+from tk_dispatch import TkDispatcher
+
+logger = get_logger("tasks")
+
+T = TypeVar("T")
+
+
+class TaskCancelled(Exception):
+    """
+    Raised inside the task when newer task with the same tag superseded it.
+    """
+
+
+class CancelToken:
+    """
+    Cooperative cancellation flag passed to the task.
+    Long operations (like network reads) should check it between steps.
+    """
+
+    __slots__ = ("_event",)
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self) -> None:
+        self._event.set()
+
+    def raise_if_cancelled(self) -> None:
+        if self._event.is_set():
+            raise TaskCancelled()
+
+
+class _Task(Generic[T]):
+    __slots__ = ("tag", "token", "work", "on_done", "on_error")
+
+    def __init__(
+        self,
+        tag: str,
+        work: Callable[[CancelToken], T],
+        on_done: Callable[[T], None],
+        on_error: Optional[Callable[[Exception], None]],
+    ):
+        self.tag = tag
+        self.token = CancelToken()
+        self.work = work
+        self.on_done = on_done
+        self.on_error = on_error
+
+
+class LatestWinsTaskRunner:
+    """
+    Runs background tasks on bounded pool of threads and delivers results into Tk thread.
+
+    Each task is tagged by its purpose (like "stations" or "highlighter"). Newer task with the same
+    tag supersedes older one: older is cancelled (if it is still queued it does not run at all)
+    and its result is never delivered, so the latest user's action always wins.
+    """
+
+    def __init__(self, tk_widget: tk.Widget, max_workers: int = 4):
+        self._dispatcher = TkDispatcher.of(tk_widget)
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="FcCompanionTask"
+        )
+        self._mutex = threading.Lock()
+        self._latest_by_tag: dict[str, _Task[Any]] = {}
+
+    def submit(
+        self,
+        tag: str,
+        work: Callable[[CancelToken], T],
+        on_done: Callable[[T], None],
+        on_error: Optional[Callable[[Exception], None]] = None,
+    ) -> CancelToken:
+        """
+        Runs work(token) in the pool, then on_done(result) or on_error(exception) in Tk thread.
+        Must be called from Tk thread.
+        """
+        task = _Task(tag, work, on_done, on_error)
+        with self._mutex:
+            previous = self._latest_by_tag.get(tag)
+            self._latest_by_tag[tag] = task
+        if previous is not None and not previous.token.cancelled:
+            previous.token.cancel()
+            Metrics.count("tasks.superseded")
+        try:
+            future = self._executor.submit(self._run, task)
+        except RuntimeError:
+            # Runner was shut down.
+            task.token.cancel()
+            return task.token
+        future.add_done_callback(lambda f, t=task: self._post_result(t, f))
+        return task.token
+
+    def cancel(self, tag: str) -> None:
+        """
+        Cancels the latest task with the tag, its result will not be delivered.
+        """
+        with self._mutex:
+            task = self._latest_by_tag.pop(tag, None)
+        if task is not None:
+            task.token.cancel()
+
+    def shutdown(self) -> None:
+        with self._mutex:
+            tasks = list(self._latest_by_tag.values())
+            self._latest_by_tag.clear()
+        for task in tasks:
+            task.token.cancel()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, task: "_Task[T]") -> T:
+        task.token.raise_if_cancelled()
+        with Metrics.timer(f"task.{task.tag}"):
+            return task.work(task.token)
+
+    def _post_result(self, task: "_Task[Any]", future: "Future[Any]") -> None:
+        if task.token.cancelled or future.cancelled():
+            return
+        self._dispatcher.post(lambda: self._deliver(task, future))
+
+    def _deliver(self, task: "_Task[Any]", future: "Future[Any]") -> None:
+        """
+        Called in Tk thread, drops the result if newer task with the same tag was submitted meanwhile.
+        """
+        with self._mutex:
+            if self._latest_by_tag.get(task.tag) is not task:
+                return
+            del self._latest_by_tag[task.tag]
+        if task.token.cancelled:
+            return
+
+        error = future.exception()
+        try:
+            if error is None:
+                task.on_done(future.result())
+            elif isinstance(error, TaskCancelled):
+                return
+            elif task.on_error is not None:
+                task.on_error(error)  # type: ignore
+            else:
+                logger.error("Task '%s' failed: %s", task.tag, error)
+        except Exception as e:
+            logger.exception("Task '%s' callback failed.", task.tag, exc_info=e)
@@ -0,0 +1,74 @@
+import queue
+import threading
+import tkinter as tk
+from typing import Callable, ClassVar
+from _logger import get_logger
+from metrics import Metrics
+
+logger = get_logger("tk")
+
+
+class TkDispatcher:
+    """
+    Runs callbacks in Tk thread, posted from any thread.
+
+    Tk must not be called from other threads (after() included), so callbacks are queued and Tk
+    is woken by virtual event generated with when="tail", as EDMC advises plugins to do.
+    One event is pending at most: callbacks posted meanwhile are run by the same drain.
+    There is one dispatcher per toplevel window, the event is bound to it.
+    """
+
+    EVENT: ClassVar[str] = "<<FcCompanionDispatch>>"
+
+    _instances: ClassVar[dict[str, "TkDispatcher"]] = {}
+
+    @classmethod
+    def of(cls, widget: tk.Misc) -> "TkDispatcher":
+        """
+        Returns dispatcher of widget's toplevel. Must be called from Tk thread.
+        """
+        toplevel = widget.winfo_toplevel()
+        key = str(toplevel)
+        instance = cls._instances.get(key)
+        if instance is None or instance._toplevel is not toplevel:
+            instance = cls._instances[key] = cls(toplevel)
+        return instance
+
+    def __init__(self, toplevel: tk.Misc):
+        self._toplevel = toplevel
+        self._queue: queue.SimpleQueue[Callable[[], None]] = queue.SimpleQueue()
+        self._mutex = threading.Lock()
+        self._signalled = False
+        toplevel.bind(type(self).EVENT, self._drain, add="+")
+
+    def post(self, callback: Callable[[], None]) -> None:
+        """
+        Queues callback for Tk thread. Can be called from any thread.
+        Callbacks posted after Tk was destroyed are dropped.
+        """
+        self._queue.put(callback)
+        with self._mutex:
+            if self._signalled:
+                return
+            self._signalled = True
+        try:
+            self._toplevel.event_generate(type(self).EVENT, when="tail")
+        except (tk.TclError, RuntimeError):
+            # Window was destroyed or Tk is shutting down.
+            with self._mutex:
+                self._signalled = False
+
+    def _drain(self, event: tk.Event | None = None) -> None:
+        # Reset first, so callback posted while draining wakes Tk again.
+        with self._mutex:
+            self._signalled = False
+        Metrics.count("tk.dispatch.drains")
+        while True:
+            try:
+                callback = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                callback()
+            except Exception as e:
+                logger.exception("Tk callback failed.", exc_info=e)
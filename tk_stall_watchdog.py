@@ -0,0 +1,144 @@
+import os
+import sys
+import threading
+import time
+import traceback
+import tkinter as tk
+from collections import deque
+from dataclasses import asdict, dataclass
+from typing import Any, Optional
+from _logger import get_logger
+from metrics import Metrics
+
+logger = get_logger("watchdog")
+
+_PLUGIN_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+@dataclass(frozen=True)
+class StallRecord:
+    """
+    Single detected freeze of the Tk thread.
+    """
+
+    wall_time: float
+    duration_ms: float
+    # Innermost plugin's frame (or innermost frame if there are none) like "file.py:10 in func".
+    culprit: str
+    stack: list[str]
+
+
+class TkStallWatchdog:
+    """
+    Detects when Tk thread is blocked: periodic after() heartbeat measures how late it fires.
+    Separated thread watches the heartbeat and captures Tk thread's stack while it is blocked,
+    so the stall is recorded with its call site.
+    """
+
+    def __init__(
+        self,
+        widget: tk.Widget,
+        period_ms: int = 100,
+        threshold_ms: int = 250,
+        max_records: int = 20,
+    ):
+        self._widget = widget
+        self._period = period_ms / 1000
+        self._threshold = threshold_ms / 1000
+        self._mutex = threading.Lock()
+        self._records: deque[StallRecord] = deque(maxlen=max_records)
+        self._tk_thread_id: Optional[int] = None
+        self._expected_beat: float = 0.0
+        self._captured_stack: Optional[list[traceback.FrameSummary]] = None
+        self._after_id = None
+        self._stop_event = threading.Event()
+        self._monitor: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """
+        Must be called from Tk thread.
+        """
+        self._tk_thread_id = threading.get_ident()
+        self._expected_beat = time.monotonic() + self._period
+        self._after_id = self._widget.after(int(self._period * 1000), self._heartbeat)
+        self._monitor = threading.Thread(
+            target=self._watch, name="FcCompanionStallWatchdog", daemon=True
+        )
+        self._monitor.start()
+        Metrics.register_section("tk_stalls", self.stalls_as_dicts)
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._after_id is not None:
+            try:
+                self._widget.after_cancel(self._after_id)
+            except tk.TclError:
+                pass
+            self._after_id = None
+
+    def stalls(self) -> list[StallRecord]:
+        with self._mutex:
+            return list(self._records)
+
+    def stalls_as_dicts(self) -> list[dict[str, Any]]:
+        return [asdict(record) for record in self.stalls()]
+
+    def _heartbeat(self) -> None:
+        now = time.monotonic()
+        lateness = max(0.0, now - self._expected_beat)
+        Metrics.record("tk.heartbeat_lateness", lateness)
+
+        with self._mutex:
+            stack = self._captured_stack
+            self._captured_stack = None
+            self._expected_beat = now + self._period
+
+        if lateness > self._threshold:
+            self._record_stall(lateness, stack)
+
+        if not self._stop_event.is_set():
+            self._after_id = self._widget.after(
+                int(self._period * 1000), self._heartbeat
+            )
+
+    def _record_stall(
+        self, lateness: float, stack: Optional[list[traceback.FrameSummary]]
+    ) -> None:
+        culprit = "unknown"
+        if stack:
+            plugin_frames = [
+                f for f in stack if os.path.abspath(f.filename).startswith(_PLUGIN_DIR)
+            ]
+            frame = (plugin_frames or stack)[-1]
+            culprit = (
+                f"{os.path.basename(frame.filename)}:{frame.lineno} in {frame.name}"
+            )
+        record = StallRecord(
+            wall_time=time.time(),
+            duration_ms=lateness * 1000,
+            culprit=culprit,
+            stack=traceback.format_list(stack) if stack else [],
+        )
+        with self._mutex:
+            self._records.append(record)
+        Metrics.count("tk.stalls")
+        Metrics.record("tk.stall", lateness)
+        logger.warning(
+            "Tk thread was blocked for %.0f ms by %s", lateness * 1000, culprit
+        )
+
+    def _watch(self) -> None:
+        while not self._stop_event.wait(self._threshold / 2):
+            with self._mutex:
+                overdue = time.monotonic() - self._expected_beat
+                if overdue <= self._threshold or self._captured_stack is not None:
+                    continue
+            frame = sys._current_frames().get(self._tk_thread_id)  # type: ignore
+            if frame is None:
+                continue
+            stack = traceback.extract_stack(frame)
+            with self._mutex:
+                # Heartbeat could fire meanwhile, then stack belongs to nothing.
+                still_overdue = time.monotonic() - self._expected_beat > self._threshold
+                if still_overdue and self._captured_stack is None:
+                    self._captured_stack = stack
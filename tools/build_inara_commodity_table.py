@@ -0,0 +1,80 @@
+"""
+Builds table of Inara's commodity pages shipped with the plugin (inara_commodities.json).
+
+Commodities are taken from given market files: game's Market.json and/or EDSM market responses.
+Only commodities missing in the table are searched on Inara, one request per --delay seconds.
+
+Usage:
+    python tools/build_inara_commodity_table.py <Market.json or EDSM market json>... [--out <file>]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+PLUGIN_DIR = os.path.dirname(TOOLS_DIR)
+
+
+def _commodity_ids(file_path: str) -> set[int]:
+    from cargo_names import MarketCatalogue
+
+    with open(file_path, "r", encoding="utf-8") as f:
+        content = json.load(f)
+    ids: set[int] = set()
+    # Game's Market.json has numeric ids in "Items".
+    for item in content.get("Items", []):
+        if "id" in item:
+            ids.add(int(item["id"]))
+    # EDSM has commodity symbol as "id" in "commodities".
+    for item in content.get("commodities", []):
+        market = MarketCatalogue.explain_commodity(item.get("id", ""))
+        if market is not None:
+            ids.add(market.id)
+    return ids
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "markets", nargs="+", help="Market files to take commodities from."
+    )
+    parser.add_argument("--out", default=None, help="Table file to write.")
+    parser.add_argument("--delay", type=float, default=2.0)
+    parser.add_argument(
+        "--lib",
+        default=os.path.join(PLUGIN_DIR, "..", "ed-fc-cargo-tracker-lib"),
+    )
+    args = parser.parse_args()
+
+    sys.path.insert(0, PLUGIN_DIR)
+    sys.path.insert(0, args.lib)
+    sys.path.insert(0, os.path.join(TOOLS_DIR, "standins"))
+    from cargo_names import MarketCatalogue
+    from inara_links import InaraCommodityLinks
+
+    ids: set[int] = set()
+    for file_path in args.markets:
+        ids |= _commodity_ids(file_path)
+
+    InaraCommodityLinks.load()
+    resolved = 0
+    for commodity_id in sorted(ids):
+        known, _ = InaraCommodityLinks.lookup(commodity_id) or (False, None)
+        market = MarketCatalogue.explain_commodity_id(commodity_id)
+        if known or market is None:
+            continue
+        url = InaraCommodityLinks.resolve(commodity_id, market.trade_name)
+        print(f"{commodity_id} {market.trade_name}: {url}")
+        resolved += 1
+        time.sleep(args.delay)
+
+    InaraCommodityLinks.export(args.out)
+    print(f"{len(ids)} commodities, {resolved} searched on Inara.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,174 @@
+"""
+Local HTTP stand-in for EDSM's API, serves canned systems, stations and markets from the dataset.
+
+Dataset is JSON object (tools/standins/edsm_dataset.json is the example):
+    {
+        "systems": {"<system>": {"coords": [x, y, z], "population": N,
+                                 "stations": [<EDSM station objects>]}, ...},
+        "markets": {"<marketId>": [<EDSM commodity objects>], ...}
+    }
+Served endpoints: /api-v1/sphere-systems, /api-v1/systems, /api-system-v1/stations,
+/api-system-v1/stations/market. --limit imitates EDSM's rate limit (X-Rate-Limit-* headers,
+429 with Retry-After when exceeded), --delay imitates network latency.
+
+Point the plugin to it with environment variable FC_COMPANION_EDSM_URL=http://127.0.0.1:8765
+(or config key fc_companion_edsm_url).
+
+Usage:
+    python tools/edsm_standin_server.py [DATASET.json] [--port N] [--limit N] [--window SEC]
+        [--delay MS]
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+from urllib.parse import parse_qs, urlparse
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class _RateLimit:
+    def __init__(self, limit: int, window: float):
+        self.limit = limit
+        self.window = window
+        self._mutex = threading.Lock()
+        self._started = time.monotonic()
+        self._used = 0
+
+    def take(self) -> tuple[bool, dict[str, str]]:
+        """
+        Returns (allowed, headers).
+        """
+        with self._mutex:
+            now = time.monotonic()
+            if now - self._started >= self.window:
+                self._started = now
+                self._used = 0
+            reset = self.window - (now - self._started)
+            if self._used >= self.limit:
+                return False, {"Retry-After": str(math.ceil(reset))}
+            self._used += 1
+            return True, {
+                "X-Rate-Limit-Limit": str(self.limit),
+                "X-Rate-Limit-Remaining": str(self.limit - self._used),
+                "X-Rate-Limit-Reset": str(math.ceil(reset)),
+            }
+
+
+class _Edsm:
+    def __init__(self, dataset: dict[str, Any]):
+        self.systems: dict[str, dict[str, Any]] = {
+            name.lower(): {"name": name, **system}
+            for name, system in dataset["systems"].items()
+        }
+        self.markets: dict[str, list[dict[str, Any]]] = dataset["markets"]
+
+    def _system_json(self, system: dict[str, Any]) -> dict[str, Any]:
+        x, y, z = system["coords"]
+        population = system.get("population", 0)
+        return {
+            "name": system["name"],
+            "coords": {"x": x, "y": y, "z": z},
+            "information": {"population": population} if population else {},
+        }
+
+    def sphere_systems(self, query: dict[str, list[str]]) -> Any:
+        center = self.systems.get(query.get("systemName", [""])[0].lower())
+        if center is None:
+            return {}
+        radius = min(float(query.get("radius", ["50"])[0]), 100.0)
+        result: list[dict[str, Any]] = []
+        for system in self.systems.values():
+            distance = math.dist(center["coords"], system["coords"])
+            if distance <= radius:
+                result.append(
+                    {"distance": round(distance, 2), **self._system_json(system)}
+                )
+        return result
+
+    def systems_list(self, query: dict[str, list[str]]) -> Any:
+        found = [
+            self._system_json(self.systems[name.lower()])
+            for name in query.get("systemName[]", [])
+            if name.lower() in self.systems
+        ]
+        return found or {}
+
+    def stations(self, query: dict[str, list[str]]) -> Any:
+        system = self.systems.get(query.get("systemName", [""])[0].lower())
+        if system is None:
+            return {}
+        return {"name": system["name"], "stations": system.get("stations", [])}
+
+    def market(self, query: dict[str, list[str]]) -> Any:
+        market_id = query.get("marketId", [""])[0]
+        return {
+            "marketId": int(market_id or 0),
+            "commodities": self.markets.get(market_id, []),
+        }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "dataset",
+        nargs="?",
+        default=os.path.join(TOOLS_DIR, "standins", "edsm_dataset.json"),
+    )
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--limit", type=int, default=360)
+    parser.add_argument("--window", type=float, default=3600.0)
+    parser.add_argument("--delay", type=float, default=0.0)
+    args = parser.parse_args()
+
+    with open(args.dataset, "r", encoding="utf-8") as f:
+        edsm = _Edsm(json.load(f))
+    rate_limit = _RateLimit(args.limit, args.window)
+    routes = {
+        "/api-v1/sphere-systems": edsm.sphere_systems,
+        "/api-v1/systems": edsm.systems_list,
+        "/api-system-v1/stations": edsm.stations,
+        "/api-system-v1/stations/market": edsm.market,
+    }
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            route = routes.get(url.path)
+            if route is None:
+                self.send_error(404)
+                return
+            allowed, headers = rate_limit.take()
+            if args.delay:
+                time.sleep(args.delay / 1000)
+            body = (
+                json.dumps(route(parse_qs(url.query))).encode("utf-8")
+                if allowed
+                else b"{}"
+            )
+            self.send_response(200 if allowed else 429)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), Handler)
+    print(f"EDSM stand-in on http://127.0.0.1:{args.port}, Ctrl+C to stop.")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
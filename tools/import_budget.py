@@ -0,0 +1,112 @@
+"""
+Import-time budget check of the plugin, fails (exit code 1) if cold import regresses.
+
+Checks in a fresh interpreter:
+- "import load" + plugin_start3() time and that heavy modules are not imported by it;
+- "import ui_frame" (what plugin_app() needs) time and that network / rarely used modules
+  are still deferred to the first use.
+
+EDMC modules are replaced by stand-ins from tools/standins, commodity names come from
+ed-fc-cargo-tracker-lib located next to the plugin (or --lib).
+
+Usage:
+    python tools/import_budget.py [--start-budget-ms 50] [--app-budget-ms 300] [--runs 3]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+PLUGIN_DIR = os.path.dirname(TOOLS_DIR)
+
+# Must not be imported by "import load" + plugin_start3().
+FORBIDDEN_AT_START = ("requests", "ui_frame", "external_web_search")
+# Must not be imported until user really needs them.
+FORBIDDEN_AT_APP = (
+    "requests",
+    "webbrowser",
+    "tkinter.filedialog",
+    "cargo_rows_rclick_menu",
+    "stations_rows_click_menu",
+    "context_menu",
+)
+
+_PROBE = """
+import json, sys, time
+sys.path[:0] = {paths!r}
+import config, theme, fleetcarriercargo
+start = time.perf_counter()
+import load
+load.plugin_start3({plugin_dir!r})
+started = time.perf_counter()
+at_start = set(sys.modules)
+import ui_frame
+app = time.perf_counter()
+print(json.dumps({{
+    "start_ms": (started - start) * 1000,
+    "app_import_ms": (app - started) * 1000,
+    "at_start": sorted(at_start),
+    "at_app": sorted(sys.modules),
+}}))
+"""
+
+
+def _probe(lib_dir: str) -> dict:
+    paths = [os.path.join(TOOLS_DIR, "standins"), lib_dir, PLUGIN_DIR]
+    code = _PROBE.format(paths=paths, plugin_dir=PLUGIN_DIR)
+    process = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        cwd=PLUGIN_DIR,
+    )
+    if process.returncode != 0:
+        raise RuntimeError(f"Import probe failed:\n{process.stderr}")
+    return json.loads(process.stdout.strip().splitlines()[-1])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--start-budget-ms", type=float, default=50.0)
+    parser.add_argument("--app-budget-ms", type=float, default=300.0)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument(
+        "--lib",
+        default=os.path.join(PLUGIN_DIR, "..", "ed-fc-cargo-tracker-lib"),
+    )
+    args = parser.parse_args()
+
+    results = [_probe(args.lib) for _ in range(max(1, args.runs))]
+    # The best run is the least noisy estimation of the cold import cost.
+    start_ms = min(r["start_ms"] for r in results)
+    app_ms = min(r["app_import_ms"] for r in results)
+    failures: list[str] = []
+
+    loaded_at_start = set(results[0]["at_start"])
+    loaded_at_app = set(results[0]["at_app"])
+    for module in FORBIDDEN_AT_START:
+        if module in loaded_at_start:
+            failures.append(f"'{module}' is imported by plugin_start3().")
+    for module in FORBIDDEN_AT_APP:
+        if module in loaded_at_app:
+            failures.append(f"'{module}' is imported by plugin_app().")
+    if start_ms > args.start_budget_ms:
+        failures.append(
+            f"plugin_start3() import took {start_ms:.1f} ms, budget {args.start_budget_ms} ms."
+        )
+    if app_ms > args.app_budget_ms:
+        failures.append(
+            f"plugin_app() import took {app_ms:.1f} ms, budget {args.app_budget_ms} ms."
+        )
+
+    print(f"plugin_start3(): {start_ms:.1f} ms, plugin_app() imports: {app_ms:.1f} ms")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
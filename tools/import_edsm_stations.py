@@ -0,0 +1,49 @@
+"""
+Imports stations with market from EDSM's stations dump into plugin's station search index.
+
+Input is https://www.edsm.net/dump/stations.json.gz (or unpacked). Stations are appended to the index
+in plugin's data directory given by --data-dir, plugin picks them up on the next start.
+The directory is required for the same reason as in import_edsm_systems.py: tools cannot know
+EDMC's settings.
+
+Usage:
+    python tools/import_edsm_stations.py <stations.json[.gz]> --data-dir <dir>
+"""
+
+import argparse
+import os
+import sys
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+PLUGIN_DIR = os.path.dirname(TOOLS_DIR)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("dump", help="EDSM stations dump, .json or .json.gz")
+    parser.add_argument(
+        "--data-dir",
+        required=True,
+        help="Plugin's data directory to write into, like <EDMC data>/fc_companion.",
+    )
+    parser.add_argument(
+        "--lib",
+        default=os.path.join(PLUGIN_DIR, "..", "ed-fc-cargo-tracker-lib"),
+    )
+    args = parser.parse_args()
+
+    sys.path.insert(0, PLUGIN_DIR)
+    sys.path.insert(0, args.lib)
+    sys.path.insert(0, os.path.join(TOOLS_DIR, "standins"))
+    import plugin_paths
+    from config import config
+    from station_index import StationNamesIndex
+
+    config.set(plugin_paths.DATA_DIR_CONFIG_KEY, args.data_dir)
+    added = StationNamesIndex.import_edsm_dump(args.dump)
+    print(f"{added} new stations imported, {StationNamesIndex.size()} in the index.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
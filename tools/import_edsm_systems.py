@@ -0,0 +1,63 @@
+"""
+Builds local systems catalogue used by plugin's system name autocompletion.
+
+Input is EDSM's systems dump, for example https://www.edsm.net/dump/systemsWithCoordinates.json.gz
+(smaller ones like systemsWithCoordinates7days.json.gz work too). Output is written into
+plugin's data directory given by --data-dir (or the catalogue into --out), then plugin picks it up
+on the next start. Tools run outside of EDMC and cannot know its settings, so the directory must be
+given: by default it is "fc_companion" inside EDMC's data directory, which is
+%LOCALAPPDATA%\EDMarketConnector on Windows, ~/.local/share/EDMarketConnector on Linux and
+~/Library/Application Support/EDMarketConnector on macOS.
+
+With --coords systems' coordinates are imported too, they are used by carrier's route planner.
+
+Usage:
+    python tools/import_edsm_systems.py <dump.json[.gz]> --data-dir <dir> [--out system_names.idx]
+        [--coords]
+"""
+
+import argparse
+import os
+import sys
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+PLUGIN_DIR = os.path.dirname(TOOLS_DIR)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("dump", help="EDSM systems dump, .json or .json.gz")
+    parser.add_argument("--out", default=None, help="Catalogue file to write.")
+    parser.add_argument(
+        "--data-dir",
+        required=True,
+        help="Plugin's data directory to write into, like <EDMC data>/fc_companion.",
+    )
+    parser.add_argument("--chunk-size", type=int, default=1_000_000)
+    parser.add_argument(
+        "--coords", action="store_true", help="Import systems' coordinates too."
+    )
+    args = parser.parse_args()
+
+    sys.path.insert(0, PLUGIN_DIR)
+    sys.path.insert(0, os.path.join(TOOLS_DIR, "standins"))
+    import plugin_paths
+    from config import config
+    from system_names_index import CATALOGUE_FILE_NAME, SystemNamesIndex
+
+    config.set(plugin_paths.DATA_DIR_CONFIG_KEY, args.data_dir)
+    out = args.out or os.path.join(plugin_paths.plugin_data_dir(), CATALOGUE_FILE_NAME)
+    count = SystemNamesIndex.build_catalogue_from_edsm_dump(
+        args.dump, out, chunk_size=args.chunk_size
+    )
+    print(f"{count} system names written to {out}")
+    if args.coords:
+        from system_coords import SystemCoordinates
+
+        count = SystemCoordinates.import_edsm_dump(args.dump)
+        print(f"Coordinates of {count} new systems imported.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,290 @@
+"""
+Headless replay of recorded journal files through load.journal_entry().
+
+EDMC's config/theme and carrier's library are replaced by stand-ins from tools/standins,
+commodity names are taken from ed-fc-cargo-tracker-lib located next to the plugin (or --lib).
+Tk window is created but never shown, on Linux without display run it under xvfb-run.
+
+Usage:
+    python tools/journal_replay.py JOURNAL_DIR_OR_FILES... [--markets DIR] [--cargo FILE]
+        [--call-sign NAME] [--trace-alloc] [--json OUT]
+
+--markets: directory with Market.json snapshots (any *.json file with "MarketID" and "timestamp"),
+           the latest snapshot of the docked market is installed as Market.json before each
+           "Market" / "Docked" event.
+--cargo:   JSON object {commodity: amount} used as carrier's tally.
+
+Reports per-event latency percentiles of the journal_entry() call (cost for EDMC's thread)
+and of full processing (until the worker and Tk rendering are idle), repaint counts and allocations.
+"""
+
+import argparse
+import glob
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict
+from typing import Any, Optional
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+PLUGIN_DIR = os.path.dirname(TOOLS_DIR)
+
+
+def _percentiles(samples: list[float]) -> dict[str, float]:
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+
+    def pick(p: float) -> float:
+        return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+    return {
+        "count": len(ordered),
+        "p50_ms": pick(0.50) * 1000,
+        "p90_ms": pick(0.90) * 1000,
+        "p99_ms": pick(0.99) * 1000,
+        "max_ms": ordered[-1] * 1000,
+        "mean_ms": statistics.fmean(ordered) * 1000,
+    }
+
+
+def _read_journal_entries(paths: list[str]) -> list[dict[str, Any]]:
+    files: list[str] = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(glob.glob(os.path.join(path, "Journal.*.log")))
+        else:
+            files.append(path)
+    entries: list[dict[str, Any]] = []
+    for file_path in sorted(files):
+        with open(file_path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entries.append(json.loads(line))
+                except json.JSONDecodeError:
+                    print(f"Skipping malformed line in {file_path}", file=sys.stderr)
+    return entries
+
+
+class _MarketSnapshots:
+    """
+    Index of Market.json snapshots by MarketID, sorted by timestamp.
+    """
+
+    def __init__(self, directory: Optional[str]):
+        self._by_market: dict[int, list[tuple[str, str]]] = defaultdict(list)
+        if not directory:
+            return
+        for path in glob.glob(os.path.join(directory, "*.json")):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    content = json.load(f)
+                self._by_market[int(content["MarketID"])].append(
+                    (content.get("timestamp", ""), path)
+                )
+            except Exception as e:
+                print(f"Skipping market snapshot {path}: {e}", file=sys.stderr)
+        for snapshots in self._by_market.values():
+            snapshots.sort()
+
+    def install(self, market_id: Any, timestamp: str, journal_dir: str) -> bool:
+        snapshots = self._by_market.get(int(market_id or 0))
+        if not snapshots:
+            return False
+        chosen = snapshots[0][1]
+        for snapshot_time, path in snapshots:
+            if snapshot_time <= timestamp:
+                chosen = path
+        shutil.copyfile(chosen, os.path.join(journal_dir, "Market.json"))
+        return True
+
+
+def _install_standins(lib_dir: str) -> None:
+    sys.path.insert(0, PLUGIN_DIR)
+    sys.path.insert(0, lib_dir)
+    # Stand-ins must win over the real library, so they are imported first.
+    sys.path.insert(0, os.path.join(TOOLS_DIR, "standins"))
+    import config  # noqa: F401
+    import theme  # noqa: F401
+    import fleetcarriercargo  # noqa: F401
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("journals", nargs="+")
+    parser.add_argument("--markets", default=None)
+    parser.add_argument("--cargo", default=None)
+    parser.add_argument("--call-sign", default="XXX-000")
+    parser.add_argument(
+        "--lib",
+        default=os.path.join(PLUGIN_DIR, "..", "ed-fc-cargo-tracker-lib"),
+    )
+    parser.add_argument("--trace-alloc", action="store_true")
+    parser.add_argument("--json", dest="json_out", default=None)
+    parser.add_argument(
+        "--idle-timeout", type=float, default=5.0, help="Seconds to wait per event."
+    )
+    args = parser.parse_args()
+
+    _install_standins(args.lib)
+    import tkinter as tk
+    from config import config
+    from fleetcarriercargo import FleetCarrierCargo
+    import load
+    import ui_table
+
+    journal_dir = tempfile.mkdtemp(prefix="fc_replay_")
+    config.default_journal_dir = journal_dir
+    config.set("journaldir", journal_dir)
+
+    cargo: dict[str, int] = {}
+    if args.cargo:
+        with open(args.cargo, "r", encoding="utf-8") as f:
+            cargo = json.load(f)
+    FleetCarrierCargo.set_tally(args.call_sign, cargo)
+
+    repaints = 0
+    original_populate = ui_table.CanvasTableView.populate_colored_carrier_data
+
+    def counting_populate(self: Any) -> None:
+        nonlocal repaints
+        repaints += 1
+        original_populate(self)
+
+    ui_table.CanvasTableView.populate_colored_carrier_data = counting_populate  # type: ignore
+
+    root = tk.Tk()
+    root.withdraw()
+    load.plugin_start3(PLUGIN_DIR)
+    frame = load.plugin_app(root)
+    frame.grid(row=0, column=0)
+    root.update()
+
+    entries = _read_journal_entries(args.journals)
+    snapshots = _MarketSnapshots(args.markets)
+
+    call_latency: dict[str, list[float]] = defaultdict(list)
+    full_latency: dict[str, list[float]] = defaultdict(list)
+    allocated: dict[str, list[int]] = defaultdict(list)
+    timeouts = 0
+    system: Optional[str] = None
+    station: Optional[str] = None
+
+    if args.trace_alloc:
+        tracemalloc.start()
+
+    replay_start = time.perf_counter()
+    for entry in entries:
+        event: str = entry.get("event", "")
+        if "StarSystem" in entry and event in (
+            "Location",
+            "FSDJump",
+            "CarrierJump",
+            "Docked",
+        ):
+            system = entry["StarSystem"]
+        if event == "Docked" or (event == "Location" and entry.get("Docked")):
+            station = entry.get("StationName")
+        elif event == "Undocked":
+            station = None
+        if event in ("Market", "Docked"):
+            snapshots.install(
+                entry.get("MarketID"), entry.get("timestamp", ""), journal_dir
+            )
+
+        state = {"StationName": station, "SystemName": system}
+        if args.trace_alloc:
+            before, _ = tracemalloc.get_traced_memory()
+
+        start = time.perf_counter()
+        load.journal_entry("Replay", False, system, station, entry, state)
+        call_latency[event].append(time.perf_counter() - start)
+
+        deadline = start + args.idle_timeout
+        while True:
+            root.update()
+            # Docked station is loaded by delayed timer, it is a part of processing too.
+            if (
+                frame._journal_worker.is_idle()  # pyright: ignore[reportPrivateUsage]
+                and frame._docked_call_after_id
+                is None  # pyright: ignore[reportPrivateUsage]
+            ):
+                break
+            if time.perf_counter() > deadline:
+                timeouts += 1
+                break
+            time.sleep(0.0005)
+        full_latency[event].append(time.perf_counter() - start)
+
+        if args.trace_alloc:
+            after, _ = tracemalloc.get_traced_memory()
+            allocated[event].append(after - before)  # type: ignore
+
+    replay_total = time.perf_counter() - replay_start
+
+    report: dict[str, Any] = {
+        "events": len(entries),
+        "replay_seconds": replay_total,
+        "repaints": repaints,
+        "idle_timeouts": timeouts,
+        "server_updates_requested": FleetCarrierCargo.server_updates_requested,
+        "dropped_jobs": frame._journal_worker.dropped,  # pyright: ignore[reportPrivateUsage]
+        "journal_entry_call": _percentiles(
+            [s for samples in call_latency.values() for s in samples]
+        ),
+        "per_event": {
+            event: {
+                "call": _percentiles(call_latency[event]),
+                "full": _percentiles(full_latency[event]),
+                "allocated_bytes": sum(allocated[event]) if allocated else None,
+            }
+            for event in sorted(call_latency)
+        },
+    }
+    if args.trace_alloc:
+        current, peak = tracemalloc.get_traced_memory()
+        report["traced_memory"] = {"current": current, "peak": peak}
+        tracemalloc.stop()
+
+    load.plugin_stop()
+    root.destroy()
+    shutil.rmtree(journal_dir, ignore_errors=True)
+
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    _print_report(report)
+    return 0
+
+
+def _print_report(report: dict[str, Any]) -> None:
+    print(
+        f"Events: {report['events']}, replay: {report['replay_seconds']:.3f}s, "
+        f"repaints: {report['repaints']}, dropped: {report['dropped_jobs']}, "
+        f"idle timeouts: {report['idle_timeouts']}"
+    )
+    overall = report["journal_entry_call"]
+    if overall:
+        print(
+            f"journal_entry() p50 {overall['p50_ms']:.3f} ms, p99 {overall['p99_ms']:.3f} ms, "
+            f"max {overall['max_ms']:.3f} ms"
+        )
+    print(f"{'event':<24}{'count':>7}{'call p99':>12}{'full p50':>12}{'full p99':>12}")
+    for event, data in report["per_event"].items():
+        call, full = data["call"], data["full"]
+        print(
+            f"{event:<24}{call['count']:>7}{call['p99_ms']:>12.3f}"
+            f"{full['p50_ms']:>12.3f}{full['p99_ms']:>12.3f}"
+        )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+"""
+Runs carrier's sell-route planner offline, on the dataset instead of plugin's data and EDSM.
+
+Dataset is JSON object:
+    {
+        "origin": "Sol",
+        "cargo": {"<commodity id>": quantity, ...},
+        "systems": {"<system>": [x, y, z], ...},
+        "markets": [{"market_id": 1, "station": "...", "system": "...",
+                     "buys": {"<commodity id>": [price, demand], ...}}, ...]
+    }
+tools/standins/route_dataset.json is a small example. --synthetic N generates random dataset
+of N systems with markets instead, to measure planner's time.
+
+Usage:
+    python tools/plan_carrier_route.py [DATASET.json | --synthetic N] [--range LY] [--legs N]
+        [--beam N]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from typing import Any
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+PLUGIN_DIR = os.path.dirname(TOOLS_DIR)
+
+
+def _synthetic(count: int, seed: int = 1) -> dict[str, Any]:
+    rnd = random.Random(seed)
+    commodities = list(range(128000000, 128000300))
+    systems = {
+        f"Synthetic {i}": [
+            rnd.uniform(-5000, 5000),
+            rnd.uniform(-500, 500),
+            rnd.uniform(-5000, 5000),
+        ]
+        for i in range(count)
+    }
+    systems["Origin"] = [0.0, 0.0, 0.0]
+    markets = [
+        {
+            "market_id": i + 1,
+            "station": f"Station {i}",
+            "system": f"Synthetic {i}",
+            "buys": {
+                str(c): [rnd.randint(100, 5000), rnd.randint(1, 3000)]
+                for c in rnd.sample(commodities, 40)
+            },
+        }
+        for i in range(count)
+    ]
+    cargo = {str(c): rnd.randint(100, 3000) for c in rnd.sample(commodities, 20)}
+    return {"origin": "Origin", "cargo": cargo, "systems": systems, "markets": markets}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("dataset", nargs="?", default=None)
+    parser.add_argument("--synthetic", type=int, default=0)
+    parser.add_argument("--range", type=float, default=500.0)
+    parser.add_argument("--legs", type=int, default=4)
+    parser.add_argument("--beam", type=int, default=8)
+    args = parser.parse_args()
+
+    sys.path.insert(0, PLUGIN_DIR)
+    sys.path.insert(0, os.path.join(TOOLS_DIR, "standins"))
+    from known_markets import KnownMarkets, MarketBuy
+    from route_planner import CarrierRoutePlanner
+
+    if args.synthetic:
+        dataset = _synthetic(args.synthetic)
+    else:
+        path = args.dataset or os.path.join(TOOLS_DIR, "standins", "route_dataset.json")
+        with open(path, "r", encoding="utf-8") as f:
+            dataset = json.load(f)
+
+    for market in dataset["markets"]:
+        KnownMarkets.update(
+            market["market_id"],
+            market["station"],
+            market["system"],
+            {
+                int(commodity_id): MarketBuy(price, demand)
+                for commodity_id, (price, demand) in market["buys"].items()
+            },
+        )
+    coords = {
+        name.lower(): tuple(position) for name, position in dataset["systems"].items()
+    }
+    cargo = {int(commodity_id): q for commodity_id, q in dataset["cargo"].items()}
+
+    start = time.perf_counter()
+    plan = CarrierRoutePlanner.plan(
+        dataset["origin"],
+        cargo,
+        jump_range=args.range,
+        max_legs=args.legs,
+        beam_width=args.beam,
+        coords_of=lambda name: coords.get(name.lower()),  # type: ignore
+    )
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    if plan is None:
+        print(f"No reachable market buys the cargo ({elapsed_ms:.1f} ms).")
+        return 1
+    print(
+        f"{plan.value:,} Cr in {plan.jumps} jumps, {plan.value_per_jump:,.0f} Cr/jump "
+        f"({elapsed_ms:.1f} ms, {len(dataset['markets'])} markets)"
+    )
+    for index, leg in enumerate(plan.legs, start=1):
+        print(
+            f"{index}. {leg.system_name}: {leg.jumps} jumps, {leg.distance:.0f} ly, "
+            f"{leg.value:,} Cr at {', '.join(sorted(leg.sold))}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+"""
+Runs EDSM sphere scan for the cargo headless, printing ranked buyers as they arrive.
+
+Commodity names are taken from ed-fc-cargo-tracker-lib located next to the plugin (or --lib).
+Together with tools/edsm_standin_server.py it runs without real EDSM:
+    python tools/edsm_standin_server.py &
+    python tools/scan_edsm_sphere.py Sol --cargo gold=2000 --cargo silver=500 \
+        --url http://127.0.0.1:8765
+
+Usage:
+    python tools/scan_edsm_sphere.py SYSTEM --cargo COMMODITY=QUANTITY... [--url URL]
+        [--radius LY] [--systems N] [--workers N]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+PLUGIN_DIR = os.path.dirname(TOOLS_DIR)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("system")
+    parser.add_argument("--cargo", action="append", default=[])
+    parser.add_argument("--url", default=None)
+    parser.add_argument("--radius", type=float, default=100.0)
+    parser.add_argument("--systems", type=int, default=60)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument(
+        "--lib",
+        default=os.path.join(PLUGIN_DIR, "..", "ed-fc-cargo-tracker-lib"),
+    )
+    args = parser.parse_args()
+
+    sys.path.insert(0, PLUGIN_DIR)
+    sys.path.insert(0, args.lib)
+    sys.path.insert(0, os.path.join(TOOLS_DIR, "standins"))
+    from cargo_names import MarketCatalogue
+    from config import config
+    from edsm_sphere_scan import EdsmSphereScan, SphereScanProgress
+    from external_web_search import EDSM_URL_CONFIG_KEY
+    from task_runner import CancelToken
+
+    if args.url:
+        config.set(EDSM_URL_CONFIG_KEY, args.url)
+
+    cargo: dict[int, int] = {}
+    for item in args.cargo:
+        name, _, quantity = item.partition("=")
+        commodity = MarketCatalogue.explain_commodity(name)
+        if commodity is None:
+            print(f"Unknown commodity: {name}")
+            return 2
+        cargo[commodity.id] = cargo.get(commodity.id, 0) + int(quantity)
+
+    start = time.perf_counter()
+
+    def on_progress(progress: SphereScanProgress) -> None:
+        best = progress.buyers[0] if progress.buyers else None
+        print(
+            f"{(time.perf_counter() - start) * 1000:7.0f} ms: "
+            f"{progress.systems_done}/{progress.systems_total} systems, "
+            f"{len(progress.buyers)} buyers"
+            + (
+                f", best {best.market.station_name} {best.value:,} Cr"
+                if best is not None
+                else ""
+            )
+        )
+
+    result = EdsmSphereScan.scan(
+        args.system,
+        cargo,
+        on_progress,
+        CancelToken(),
+        radius=args.radius,
+        max_systems=args.systems,
+        max_workers=args.workers,
+    )
+    for index, buyer in enumerate(result.buyers, start=1):
+        print(
+            f"{index}. {buyer.market.station_name} | {buyer.market.system_name}: "
+            f"{buyer.distance:.0f} ly, {buyer.value:,} Cr"
+        )
+    return 0 if result.buyers else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,28 @@
+"""
+Stand-in for EDMC's config module, used by tools outside of EDMC.
+"""
+
+import os
+import tempfile
+from typing import Any
+
+appname = "EDMarketConnector"
+
+
+class _Config:
+    def __init__(self):
+        self.default_journal_dir: str = ""
+        self.app_dir_path: str = os.path.join(tempfile.gettempdir(), "edmc-standin")
+        self.values: dict[str, Any] = {}
+
+    def get_str(self, key: str, default: str | None = None) -> str | None:
+        return self.values.get(key, default)
+
+    def get_int(self, key: str, default: int = 0) -> int:
+        return int(self.values.get(key, default))
+
+    def set(self, key: str, value: Any) -> None:
+        self.values[key] = value
+
+
+config = _Config()
@@ -0,0 +1,48 @@
+"""
+Stand-in for ed-fc-cargo-tracker-lib's fleetcarriercargo module, used by tools outside of EDMC.
+Keeps tally in memory, server's update is counted but not performed.
+"""
+
+import threading
+from collections import namedtuple
+from typing import Callable, ClassVar, TypeAlias
+
+CargoKey = namedtuple("CargoKey", ["commodity"])
+CargoTally: TypeAlias = dict[CargoKey, int]
+
+
+class FleetCarrierCargo:
+    call_sign: ClassVar[str | None] = None
+    cargo: ClassVar[CargoTally] = {}
+    server_updates_requested: ClassVar[int] = 0
+
+    _mutex: ClassVar[threading.Lock] = threading.Lock()
+    _handlers: ClassVar[list[Callable[[], None]]] = []
+
+    @classmethod
+    def inventory(cls, callback: Callable[[str | None, CargoTally], bool]) -> None:
+        with cls._mutex:
+            changed = callback(cls.call_sign, cls.cargo)
+        if changed:
+            cls._notify()
+
+    @classmethod
+    def add_on_cargo_change_handler(cls, handler: Callable[[], None]) -> None:
+        cls._handlers.append(handler)
+
+    @classmethod
+    def update_from_server(cls) -> None:
+        cls.server_updates_requested += 1
+
+    @classmethod
+    def set_tally(cls, call_sign: str | None, cargo: dict[str, int]) -> None:
+        """Replaces tally as if it was received from server."""
+        with cls._mutex:
+            cls.call_sign = call_sign
+            cls.cargo = {CargoKey(name): amount for name, amount in cargo.items()}
+        cls._notify()
+
+    @classmethod
+    def _notify(cls) -> None:
+        for handler in list(cls._handlers):
+            handler()
@@ -0,0 +1,15 @@
+"""
+Stand-in for EDMC's theme module, used by tools outside of EDMC.
+"""
+
+import tkinter as tk
+
+
+class _Theme:
+    current: dict[str, str] | None = None
+
+    def update(self, widget: tk.Widget) -> None:
+        pass
+
+
+theme = _Theme()
@@ -0,0 +1,101 @@
+import tkinter as tk
+from tkinter import ttk
+from typing import Callable
+from metrics import Metrics
+from ui_tooltip import Tooltip
+import translation
+
+
+class UiDiagnosticsPlane(tk.Frame):
+    """
+    Hidden plane which shows live timings and counters of the plugin.
+    It refreshes itself only while visible.
+    """
+
+    _REFRESH_MS = 1000
+
+    def __init__(self, on_close: Callable[[], None], master=None, **kwargs):  # type: ignore
+        super().__init__(master, **kwargs)  # type: ignore
+        self.columnconfigure(0, weight=1)
+        self.rowconfigure(1, weight=1)
+
+        buttons = tk.Frame(self)
+        buttons.grid(row=0, column=0, sticky=tk.NW)
+
+        btn_copy = ttk.Button(
+            buttons, text=translation.ptl("Copy JSON"), command=self._copy_json
+        )
+        btn_copy.grid(row=0, column=0, padx=0)
+        Tooltip(
+            btn_copy,
+            translation.ptl("Copy diagnostics as JSON to attach to the bug report."),
+        )
+
+        btn_save = ttk.Button(
+            buttons, text=translation.ptl("Save JSON"), command=self._save_json
+        )
+        btn_save.grid(row=0, column=1, padx=0)
+
+        btn_close = ttk.Button(buttons, text=translation.ptl("Close"), command=on_close)
+        btn_close.grid(row=0, column=2, padx=0)
+
+        self._text = tk.Text(self, height=12, width=60, wrap=tk.NONE)
+        self._text.grid(row=1, column=0, sticky=tk.NSEW)
+        self._text.config(state=tk.DISABLED)
+
+        self._refresh_after_id = None
+        self.bind("<Map>", lambda _: self._refresh())
+        self.bind("<Unmap>", lambda _: self._stop_refresh())
+        self.grid(row=0, column=0, sticky=tk.NSEW)
+
+    def _stop_refresh(self):
+        if self._refresh_after_id is not None:
+            self.after_cancel(self._refresh_after_id)
+            self._refresh_after_id = None
+
+    def _refresh(self):
+        self._stop_refresh()
+        if not self.winfo_ismapped():
+            return
+
+        snapshot = Metrics.snapshot()
+        lines = [
+            f"{'timer':<28}{'count':>8}{'p50':>9}{'p90':>9}{'p99':>9}{'max':>9}  ms"
+        ]
+        for name, stats in snapshot["timers"].items():
+            lines.append(
+                f"{name:<28}{stats['count']:>8}{stats['p50_ms']:>9.2f}"
+                f"{stats['p90_ms']:>9.2f}{stats['p99_ms']:>9.2f}{stats['max_ms']:>9.2f}"
+            )
+        lines.append("")
+        for name, value in snapshot["counters"].items():
+            lines.append(f"{name:<44}{value:>10}")
+        stalls = snapshot["sections"].get("tk_stalls", [])
+        if stalls:
+            lines.append("")
+            lines.append(translation.ptl("Tk thread stalls (latest last):"))
+            for stall in stalls:
+                lines.append(f"{stall['duration_ms']:>8.0f} ms  {stall['culprit']}")
+
+        self._text.config(state=tk.NORMAL)
+        self._text.delete("1.0", tk.END)
+        self._text.insert(tk.END, "\n".join(lines))
+        self._text.config(state=tk.DISABLED)
+
+        self._refresh_after_id = self.after(type(self)._REFRESH_MS, self._refresh)
+
+    def _copy_json(self):
+        self.clipboard_clear()
+        self.clipboard_append(Metrics.dump_json())
+
+    def _save_json(self):
+        from tkinter import filedialog
+
+        file_path = filedialog.asksaveasfilename(
+            parent=self,
+            defaultextension=".json",
+            initialfile="fc_companion_diagnostics.json",
+            filetypes=[("JSON", "*.json")],
+        )
+        if file_path:
+            Metrics.dump_json(file_path)
@@ -1,14 +1,18 @@
 import tkinter as tk
 from tkinter import ttk
 from typing import Optional
-from _logger import logger
+from _logger import get_logger
 from ui_base_filter_plane import UiBaseFilteredPlane
 from ui_table import CanvasTableView
 import carrier_helpers
 import translation
 from sell_on_station import FilterSellOnDockedStation
 from ui_tooltip import Tooltip
+from tk_dispatch import TkDispatcher
 import fleetcarriercargo
+import weakref
+
+logger = get_logger("ui")
 
 
 class UiDockedUndocked(UiBaseFilteredPlane):
@@ -66,12 +70,24 @@ class UiDockedUndocked(UiBaseFilteredPlane):
         )
         self._update_btn.state(["disabled"])  # type: ignore
 
-    def docked_to(self, station: Optional[str]):
-        if not station:
-            logger.debug("Called docked_to() without station name, ignoring.")
-            return
+        self._last_station: Optional[str] = None
+        weakself = weakref.ref(self)
+        dispatcher = TkDispatcher.of(self)
+
+        def identity_changed(call_sign: str):
+            obj = weakself()
+            if obj:
+                # Handler can be called from any thread.
+                dispatcher.post(lambda: obj._update_buttons(obj._last_station))
+
+        carrier_helpers.CarrierIdentity.add_on_identity_change_handler(identity_changed)
+
+    def docked_to(self, station: str, highlighter: FilterSellOnDockedStation):
+        """
+        Docked to the station, highlighter is created by caller because it reads market from disk.
+        """
         self._update_buttons(station)
-        self._set_current_highlighter(FilterSellOnDockedStation(station))
+        self._set_current_highlighter(highlighter)
 
         if self.follow_var.get():
             # Follow mode: create & install filter immediately
@@ -87,15 +103,17 @@ class UiDockedUndocked(UiBaseFilteredPlane):
     def _update_buttons(self, station: str | None):
         """Change Freeze button depend if we're docked properly."""
 
-        is_carrier: bool = station == carrier_helpers.get_carrier_name()
+        self._last_station = station
+        is_carrier: bool = station == carrier_helpers.CarrierIdentity.call_sign()
         is_wrong_station = not station or is_carrier
         logger.debug(
-            f"updating freeze button, station {station}, wrong_station: {is_wrong_station} "
+            "updating freeze button, station %s, wrong_station: %s",
+            station,
+            is_wrong_station,
         )
         if is_wrong_station:
             self._freeze_btn.state(["disabled"])  # type: ignore
-            if is_carrier:
-                self._update_btn.state(["!disabled"])  # type: ignore
+            self._update_btn.state(["!disabled" if is_carrier else "disabled"])  # type: ignore
             self._freeze_btn.config(text=translation.ptl("Wrong Station"))
         else:
             self._update_btn.state(["disabled"])  # type: ignore
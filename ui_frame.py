@@ -1,15 +1,33 @@
+from ui_diagnostics import UiDiagnosticsPlane
 from ui_docked_undocked import UiDockedUndocked
 from ui_navigation import UiNavigationPlane
+from ui_sell_plan import UiSellPlan
+from ui_system_input import SystemNamesReceiver
+from system_names_index import SystemNamesIndex
 from ui_multy_planes_widget import MultiPlanesWidget, PlaneSwitch
 from ui_table import CanvasTableView
 
 import tkinter as tk
-from _logger import logger
-from typing import Any, Optional
+from _logger import get_logger
+from journal_tail_scan import scan_journal_tail
+from metrics import Metrics
+from tk_stall_watchdog import TkStallWatchdog
+from journal_worker import JournalWorker, RenderRequest
+from task_runner import LatestWinsTaskRunner
+from sell_on_station import FilterSellOnDockedStation
+from carrier_cargo_ledger import CarrierCargoLedger
+from carrier_helpers import CarrierIdentity, CarrierPosition
+from known_markets import KnownMarket, KnownMarkets
+from stations_prefetch import StationsPrefetch
+from system_coords import SystemCoordinates
+from inara_links import InaraCommodityLinks, InaraStationLinks
+from typing import Any, Callable, Optional
 import fleetcarriercargo
 import weakref
 import translation
 
+logger = get_logger("journal")
+
 
 class SwitchesModes:
     Cargo = PlaneSwitch(
@@ -29,6 +47,19 @@ class SwitchesModes:
         tooltip=translation.ptl("If selected, highlight based on docked station."),
     )
 
+    SellPlan = PlaneSwitch(
+        text=translation.ptl("Sell Plan"),
+        tooltip=translation.ptl(
+            "Fewest known stations which buy the most of the carrier's cargo."
+        ),
+    )
+
+    Diagnostics = PlaneSwitch(
+        text=translation.ptl("Diagnostics"),
+        # Hidden plane, it is opened by Ctrl+Click on "Cargo On Carrier" button.
+        has_button=False,
+    )
+
     Navigated = PlaneSwitch(
         text=translation.ptl("Navigated"),
         tooltip=translation.ptl(
@@ -43,6 +74,8 @@ class MainUiFrame(tk.Frame):
     This class handles signal "on cargo changed" from carrier.
     """
 
+    _RECONCILE_CHECK_MS = 60 * 1000
+
     def __init__(self, *args, **kwargs):  # type: ignore
         super().__init__(*args, **kwargs)  # type: ignore
 
@@ -50,43 +83,228 @@ class MainUiFrame(tk.Frame):
         self.rowconfigure(1, weight=1)
 
         self._docked_call_after_id = None
+        # Ledger may drift while carrier is idle (found on repaint), so it is checked by timer too.
+        self._reconcile_after_id = self.after(
+            self._RECONCILE_CHECK_MS, self._on_reconcile_timer
+        )
+
+        # Systems are tracked even if navigation UI was not built yet.
+        self._systems_receiver = SystemNamesReceiver()
+        # Stations of the systems user most likely picks are fetched before they are asked.
+        self._stations_prefetch = prefetch = StationsPrefetch()
+        self._systems_receiver.add_on_systems_changed_handler(
+            lambda receiver: prefetch.request(
+                [
+                    receiver.current_system,
+                    receiver.targeted_system,
+                    receiver.navigated_final_system,
+                ]
+            )
+        )
+
+        # Only cargo plane is built here, others are built when user opens them first time.
+        self._highlights_planes: Optional[MultiPlanesWidget] = None
+        self._docked: Optional[UiDockedUndocked] = None
+        self._pending_docking: Optional[tuple[str, Optional[str]]] = None
+        self._navigating: Optional[UiNavigationPlane] = None
+        self._sell_plan: Optional[UiSellPlan] = None
 
         planes = MultiPlanesWidget(
-            [SwitchesModes.Cargo, SwitchesModes.Highlighting], self
+            [
+                SwitchesModes.Cargo,
+                SwitchesModes.Highlighting,
+                SwitchesModes.SellPlan,
+                SwitchesModes.Diagnostics,
+            ],
+            self,
+            factories={
+                SwitchesModes.Highlighting: self._build_highlighting_plane,
+                SwitchesModes.SellPlan: self._build_sell_plan_plane,
+                SwitchesModes.Diagnostics: lambda frame: UiDiagnosticsPlane(
+                    lambda: planes.activate_plane(SwitchesModes.Cargo), frame
+                ),
+            },
+            prewarm=[SwitchesModes.Highlighting],
+        )
+        planes.bind_plane_button(
+            SwitchesModes.Cargo,
+            "<Control-Button-1>",
+            lambda _: planes.activate_plane(SwitchesModes.Diagnostics),
         )
         self._cargo_table_view = CanvasTableView(
             planes.plane_frames[SwitchesModes.Cargo]
         )
+        # Buyers of the carrier's cargo are ranked from the carrier, commander's system is a fallback.
+        self._cargo_table_view.set_origin_system_provider(
+            lambda: CarrierPosition.system() or self._systems_receiver.current_system
+        )
+
+        # Journal events are processed in dedicated thread, only rendering is done in Tk thread.
+        self._journal_worker = JournalWorker(self)
+
+        # User's requests to the web, the latest one of each kind wins.
+        self._task_runner = LatestWinsTaskRunner(self)
+
+        # Records when Tk thread is blocked and by whom.
+        self._stall_watchdog = TkStallWatchdog(self)
+        self._stall_watchdog.start()
+
+        weakself = weakref.ref(self)
+
+        def update():
+            obj = weakself()
+            if obj:
+                obj._cargo_on_carrier_updated()
+
+        fleetcarriercargo.FleetCarrierCargo.add_on_cargo_change_handler(update)
+
+        def ledger_update():
+            obj = weakself()
+            if obj:
+                obj._request_table_repaint()
+
+        CarrierCargoLedger.add_on_ledger_change_handler(ledger_update)
+
+        def market_update(market: KnownMarket):
+            obj = weakself()
+            if obj:
+                obj._request_sell_plan_refresh()
+
+        KnownMarkets.add_on_market_update_handler(market_update)
+
+        # Journal events which are handled by plugin, all others are ignored as cheap as possible.
+        # Handlers are called in the worker thread and may return render request for Tk thread.
+        self._last_known_system: Optional[str] = None
+        self._journal_handlers: dict[
+            str,
+            Callable[[str, dict[str, Any], Optional[str]], Optional[RenderRequest]],
+        ] = {
+            "FSDTarget": self._on_fsd_target,
+            "NavRoute": self._on_nav_route,
+            "StartUp": self._on_startup,
+            "FSDJump": self._on_star_position,
+            "Location": self._on_star_position,
+            "CarrierJump": self._on_carrier_event,
+            "CarrierLocation": self._on_carrier_event,
+            "CarrierJumpRequest": self._on_carrier_event,
+            "CarrierJumpCancelled": self._on_carrier_event,
+            "Market": self._on_docking_event,
+            "Docked": self._on_docking_event,
+            "Undocked": self._on_docking_event,
+            "Embark": self._on_docking_event,
+            "Disembark": self._on_docking_event,
+            "CargoTransfer": self._handle_cargo_ledger_events,
+            "MarketBuy": self._handle_cargo_ledger_events,
+            "MarketSell": self._handle_cargo_ledger_events,
+            "CarrierTradeOrder": self._handle_cargo_ledger_events,
+        }
+        # Counter names are built once, journal_entry() runs on EDMC's thread.
+        self._event_counters: dict[str, str] = {
+            event: f"journal.event.{event}" for event in self._journal_handlers
+        }
+        # Events where only the latest one matters, older still queued are dropped.
+        self._superseding_keys: dict[str, str] = {
+            "FSDTarget": "target",
+            "NavRoute": "route",
+            "Market": "docking",
+            "Docked": "docking",
+            "Undocked": "docking",
+            "Embark": "docking",
+            "Disembark": "docking",
+        }
+
+    def _build_highlighting_plane(self, frame: tk.Frame):
         self._highlights_planes = MultiPlanesWidget(
             [SwitchesModes.Docked, SwitchesModes.Navigated],
-            planes.plane_frames[SwitchesModes.Highlighting],
+            frame,
+            factories={
+                SwitchesModes.Docked: self._build_docked_plane,
+                SwitchesModes.Navigated: self._build_navigation_plane,
+            },
         )
 
+    def _build_docked_plane(self, frame: tk.Frame):
         # Highlights depend on docked state.
-        self._docked = UiDockedUndocked(
-            self._cargo_table_view,
-            self._highlights_planes.plane_frames[SwitchesModes.Docked],
-        )
+        self._docked = UiDockedUndocked(self._cargo_table_view, frame)
         self._docked.pack(anchor="nw", padx=5, pady=5)
+        # Docking events received before the plane existed are applied now.
+        pending = self._pending_docking
+        self._pending_docking = None
+        if pending:
+            self._handle_docking_events(*pending)
 
+    def _build_navigation_plane(self, frame: tk.Frame):
         # Highlights depend on navigation state
         self._navigating = UiNavigationPlane(
+            self._cargo_table_view, self._systems_receiver, self._task_runner, frame
+        )
+
+    def _build_sell_plan_plane(self, frame: tk.Frame):
+        self._sell_plan = UiSellPlan(
             self._cargo_table_view,
-            self._highlights_planes.plane_frames[SwitchesModes.Navigated],
+            self._task_runner,
+            self._journal_worker,
+            self._systems_receiver,
+            frame,
         )
 
-        weakself = weakref.ref(self)
+    def stop(self):
+        """
+        Stops background processing, called when plugin is unloaded.
+        """
+        if self._reconcile_after_id is not None:
+            self.after_cancel(self._reconcile_after_id)
+            self._reconcile_after_id = None
+        self._journal_worker.stop()
+        self._task_runner.shutdown()
+        self._stations_prefetch.shutdown()
+        self._stall_watchdog.stop()
 
-        def update():
-            obj = weakself()
-            if obj:
-                obj._cargo_on_carrier_updated()
+    def _request_table_repaint(self):
+        """
+        Repaints cargo table in Tk thread. Can be called from any thread, repeated requests are coalesced.
+        """
+        self._journal_worker.post_render(
+            self._cargo_table_view.populate_colored_carrier_data, "table"
+        )
+        self._request_sell_plan_refresh()
 
-        fleetcarriercargo.FleetCarrierCargo.add_on_cargo_change_handler(update)
+    def _request_sell_plan_refresh(self):
+        """
+        Recomputes sell plan in Tk thread, if user has opened it. Can be called from any thread.
+        """
+        if self._sell_plan is not None:
+            self._journal_worker.post_render(self._sell_plan.refresh, "sell_plan")
 
     def _cargo_on_carrier_updated(self):
         logger.debug("Got carrier update signal.")
-        self._cargo_table_view.populate_colored_carrier_data()
+        CarrierCargoLedger.reset()
+        self._request_table_repaint()
+
+    def _handle_cargo_ledger_events(
+        self, event: str, entry: dict[str, Any], station: str | None
+    ) -> Optional[RenderRequest]:
+        """
+        Keeps local carrier's cargo ledger up to date and requests server's tally
+        only when ledger cannot be trusted anymore.
+        """
+        CarrierCargoLedger.apply_journal_event(
+            entry, station, CarrierIdentity.call_sign()
+        )
+        return self._reconcile_if_needed()
+
+    def _reconcile_if_needed(self) -> Optional[RenderRequest]:
+        if CarrierCargoLedger.needs_reconcile():
+            logger.debug("Requesting carrier's tally from server to reconcile ledger.")
+            CarrierCargoLedger.mark_reconcile_requested()
+            fleetcarriercargo.FleetCarrierCargo.update_from_server()
+        return None
+
+    def _on_reconcile_timer(self):
+        self._journal_worker.submit(self._reconcile_if_needed, "reconcile")
+        self._reconcile_after_id = self.after(
+            self._RECONCILE_CHECK_MS, self._on_reconcile_timer
+        )
 
     def journal_entry(
         self,
@@ -97,58 +315,129 @@ class MainUiFrame(tk.Frame):
         entry: dict[str, Any],
         state: dict[str, Any],
     ):
+        """
+        Called for each journal event, so it must be as cheap as possible for events we do not handle.
+        Handled events are queued for the worker thread.
+        """
+        if system is not None and system != self._last_known_system:
+            self._last_known_system = system
+            # Receiver stores seen system on disk, so it is done in the worker thread.
+            self._journal_worker.submit(
+                lambda: self._systems_receiver.set_current_system(system),
+                "current_system",
+            )
+
         event = entry.get("event")
-        self._navigating.get_systems_receiver().set_current_system(system)
-
-        if event == "FSDTarget":
-            self._navigating.get_systems_receiver().set_targeted_system(entry["Name"])
-        if event == "NavRoute":
-            route: Optional[list[dict[str, Any]]] = entry.get("Route")
-            logger.debug("NavRoute event receieved.")
-            if route:
-                self._navigating.get_systems_receiver().set_navigated_final_system(
-                    route[-1]["StarSystem"]
+        handler = self._journal_handlers.get(event)  # type: ignore
+        if handler is None:
+            return
+        logger.debug("Received event: %s", event)
+        Metrics.count(self._event_counters[event])  # type: ignore
+        station = station or state.get("StationName")
+        self._journal_worker.submit(
+            lambda: handler(event, entry, station),  # type: ignore
+            self._superseding_keys.get(event),  # type: ignore
+        )
+
+    def _on_fsd_target(
+        self, event: str, entry: dict[str, Any], station: str | None
+    ) -> Optional[RenderRequest]:
+        self._systems_receiver.set_targeted_system(entry["Name"])
+        return None
+
+    def _on_nav_route(
+        self, event: str, entry: dict[str, Any], station: str | None
+    ) -> Optional[RenderRequest]:
+        route: Optional[list[dict[str, Any]]] = entry.get("Route")
+        if route:
+            for jump in route[:-1]:
+                SystemNamesIndex.add_seen(jump.get("StarSystem"))
+            SystemCoordinates.add_many(
+                (jump["StarSystem"], jump["StarPos"])
+                for jump in route
+                if jump.get("StarSystem") and jump.get("StarPos")
+            )
+            self._systems_receiver.set_navigated_final_system(route[-1]["StarSystem"])
+        return None
+
+    def _on_star_position(
+        self, event: str, entry: dict[str, Any], station: str | None
+    ) -> Optional[RenderRequest]:
+        SystemCoordinates.add(entry.get("StarSystem"), entry.get("StarPos"))
+        return None
+
+    def _on_carrier_event(
+        self, event: str, entry: dict[str, Any], station: str | None
+    ) -> Optional[RenderRequest]:
+        CarrierPosition.apply_journal_event(event, entry, CarrierIdentity.call_sign())
+        if event == "CarrierJump":
+            return self._on_star_position(event, entry, station)
+        return None
+
+    def _on_startup(
+        self, event: str, entry: dict[str, Any], station: str | None
+    ) -> Optional[RenderRequest]:
+        self._request_table_repaint()
+        # Local tables are loaded here, so neither UI nor journal waits for them.
+        SystemCoordinates.size()
+        SystemNamesIndex.has_catalogue()
+        InaraCommodityLinks.load()
+        InaraStationLinks.load()
+
+        # Live events will come only on changes, so last known state is restored from journal.
+        recovered = scan_journal_tail()
+        logger.debug("Recovered from journal: %s", recovered)
+        if recovered.current_system and self._last_known_system is None:
+            self._systems_receiver.set_current_system(recovered.current_system)
+        if recovered.targeted_system:
+            self._systems_receiver.set_targeted_system(recovered.targeted_system)
+        if recovered.route_destination:
+            self._systems_receiver.set_navigated_final_system(
+                recovered.route_destination
+            )
+        if not CarrierPosition.system():
+            call_sign = CarrierIdentity.call_sign()
+            for carrier_event, carrier_entry in reversed(recovered.carrier_records):
+                CarrierPosition.apply_journal_event(
+                    carrier_event, carrier_entry, call_sign
                 )
+        if not station and recovered.docking_known:
+            station = recovered.docked_station
+            if not station:
+                event = "Undocked"
 
-        logger.debug(f"Received event: {event}")
-        if event == "StartUp":
-            self._cargo_table_view.populate_colored_carrier_data()
-        logger.debug(
-            f"Active pane {self._highlights_planes.active_plane_frame}, docking pane {self._docked}."
-        )
+        return self._on_docking_event(event, entry, station)
 
-        # Check if "Docked" plane is activated by user.
-        if type(self).is_ancestor(
-            self._highlights_planes.active_plane_frame, self._docked
+    def _on_docking_event(
+        self, event: str, entry: dict[str, Any], station: str | None
+    ) -> Optional[RenderRequest]:
+        # Check if "Docked" plane is activated by user, it is the default one when not built yet.
+        highlights_planes = self._highlights_planes
+        if highlights_planes is not None and not highlights_planes.is_plane_active(
+            SwitchesModes.Docked
         ):
-            logger.debug(f"Active 'Docked' plane, event {event}")
-            self._handle_docking_events(event, station or state["StationName"])  # type: ignore
+            return None
+        logger.debug("Docking event %s, station %s", event, station)
+        return lambda: self._handle_docking_events(event, station)
 
-    def _handle_docking_events(self, event: Any, station: str | None):
+    def _handle_docking_events(self, event: str, station: str | None):
         """
         Handle docking-related events when the "Docked" plane is active in the GUI.
+        Called in Tk thread.
 
         Depending on the event type, triggers appropriate updates for the docking state:
         - For "Docked" event, schedules a delayed update to allow market data to be ready.
-        - For "StartUp" and "Market", triggers an immediate update.
+        - For "StartUp", "Market", "Embark" and "Disembark", triggers an immediate update.
         - For "Undocked", clears the docked state immediately.
-        - Ignores other unrelated events.
 
         Parameters:
-            event (Any): The docking event name as a string.
+            event (str): The docking event name.
             station (Optional[str]): The station name relevant to the event.
         """
-        if event not in [
-            "StartUp",
-            "Market",
-            "Undocked",
-            "Docked",
-            "Disembark",
-            "Embark",
-        ]:
-            logger.debug(f"_handle_docking_events: ignoring {event}")
+        if self._docked is None:
+            # Plane is not built yet, only the latest state matters.
+            self._pending_docking = (event, station)
             return
-        logger.debug(f"_handle_docking_events: processing {event}, station {station}")
 
         # If we're here we must stop the timer (depend on event it can be 2 different reasons though).
         if self._docked_call_after_id is not None:
@@ -163,14 +452,20 @@ class MainUiFrame(tk.Frame):
             self._docked_call_after_id = self.after(
                 delay,
                 lambda: setattr(self, "_docked_call_after_id", None)
-                or self._docked.docked_to(station),
+                or self._journal_worker.submit(
+                    lambda: self._load_docked_station(station), "docking"
+                ),
             )
 
-    @staticmethod
-    def is_ancestor(ancestor: tk.Widget, widget: tk.Widget) -> bool:
-        current = widget
-        while current is not None:  # type: ignore
-            if current is ancestor:
-                return True
-            current = current.master
-        return False
+    def _load_docked_station(self, station: str | None) -> Optional[RenderRequest]:
+        """
+        Reads docked station's market in the worker thread.
+        """
+        if not station:
+            logger.debug("Docked without station name, ignoring.")
+            return None
+        highlighter = FilterSellOnDockedStation(station)
+        docked = self._docked
+        if docked is None:
+            return None
+        return lambda: docked.docked_to(station, highlighter)
@@ -1,10 +1,12 @@
 from dataclasses import dataclass
 import tkinter as tk
 from collections.abc import Iterator, Mapping
-from typing import Optional
-from _logger import logger
+from typing import Any, Callable, Optional
+from _logger import get_logger
 from ui_tooltip import Tooltip
 
+logger = get_logger("ui")
+
 
 @dataclass(frozen=True)
 class PlaneSwitch:
@@ -17,10 +19,16 @@ class PlaneSwitch:
     has_button: bool = True
 
 
+PlaneFactory = Callable[[tk.Frame], Any]
+
+
 @dataclass
 class _SinglePlane:
-    panel: tk.Frame
+    # Frame is created on the first access, so hidden planes cost nothing until shown.
+    panel: Optional[tk.Frame]
     button: Optional[tk.Button]
+    # Builds plane's content into the panel, it is called once and dropped then.
+    factory: Optional[PlaneFactory] = None
 
 
 class MultiPlanesWidget(tk.Frame):
@@ -29,27 +37,31 @@ class MultiPlanesWidget(tk.Frame):
     """
 
     class _PlaneDictView(Mapping):  # pyright: ignore[reportMissingTypeArgument]
-        def __init__(self, source: dict[str, _SinglePlane]):
-            self._source = source
+        def __init__(self, owner: "MultiPlanesWidget"):
+            self._owner = owner
 
         def __getitem__(self, key: str | PlaneSwitch) -> tk.Frame:
             if isinstance(key, PlaneSwitch):
                 key = key.text
-            return self._source[key].panel
+            return self._owner._build_plane(key)
 
         def __iter__(self) -> Iterator[str]:
-            return iter(self._source)
+            return iter(self._owner._planes)
 
         def __len__(self) -> int:
-            return len(self._source)
+            return len(self._owner._planes)
 
         def __contains__(self, key: object) -> bool:
-            return key in self._source
+            if isinstance(key, PlaneSwitch):
+                key = key.text
+            return key in self._owner._planes
 
     def __init__(
         self,
         planes: list[PlaneSwitch],
         parent: tk.Widget,
+        factories: Optional[Mapping[str | PlaneSwitch, PlaneFactory]] = None,
+        prewarm: Optional[list[str | PlaneSwitch]] = None,
         **kwargs,  # type: ignore
     ):
         """
@@ -64,36 +76,25 @@ class MultiPlanesWidget(tk.Frame):
             parent (tk.Widget): Must support free resizings inside, you may want to call
                             parent.columnconfigure(0, weight=1)
                             parent.rowconfigure(1, weight=1)
+
+            factories (Mapping): Optional builders of the planes' content, factory receives plane's
+                            frame and is called on the first activation of the plane only.
+
+            prewarm (list): Planes which are built when Tk is idle, before user opens them.
         """
         super().__init__(parent, **kwargs)  # pyright: ignore[reportUnknownArgumentType]
 
-        # Buttons panel.
+        # Buttons panel, created with the first plane which has a button.
         self._buttons_frame: Optional[tk.Frame] = None
-        for plane in planes:
-            if plane.has_button:
-                self._buttons_frame = tk.Frame(self)
-                break
 
         self._planes: dict[str, _SinglePlane] = {}
         self._selected_plane: str = ""
 
         for plane in planes:
-            name = plane.text
-            panel = tk.Frame(self)
-            button: Optional[tk.Button] = None
-            if plane.has_button:
-                button = tk.Button(
-                    self._buttons_frame,
-                    text=name,
-                    command=lambda n=name: self.activate_plane(n),
-                )
-                button.grid(row=0, column=len(self._planes), sticky=tk.NW)
-                if plane.tooltip:
-                    Tooltip(button, plane.tooltip)
-            self._planes[name] = _SinglePlane(panel=panel, button=button)
-
-        if self._buttons_frame:
-            self._buttons_frame.grid(row=0, column=0, sticky=tk.NW)
+            self._add_plane_entry(plane)
+
+        for plane_name, factory in (factories or {}).items():
+            self.set_plane_factory(plane_name, factory)
 
         self.grid(row=0, column=0, sticky=tk.NSEW)
         self.grid_rowconfigure(0, weight=0)  # Buttons
@@ -103,13 +104,120 @@ class MultiPlanesWidget(tk.Frame):
         if planes and len(planes) > 0:
             self.activate_plane(planes[0])
 
+        self._prewarm_queue: list[str] = [self._plane_key(p) for p in (prewarm or [])]
+        self._prewarm_after_id = None
+        if self._prewarm_queue:
+            self._prewarm_after_id = self.after_idle(self._prewarm_next)
+
+    def _add_plane_entry(self, plane: PlaneSwitch):
+        name = plane.text
+        button: Optional[tk.Button] = None
+        if plane.has_button:
+            if self._buttons_frame is None:
+                self._buttons_frame = tk.Frame(self)
+                self._buttons_frame.grid(row=0, column=0, sticky=tk.NW)
+            button = tk.Button(
+                self._buttons_frame,
+                text=name,
+                command=lambda n=name: self.activate_plane(n),
+            )
+            button.grid(row=0, column=len(self._planes), sticky=tk.NW)
+            if plane.tooltip:
+                Tooltip(button, plane.tooltip)
+        self._planes[name] = _SinglePlane(panel=None, button=button)
+
+    def add_plane(self, plane: PlaneSwitch, factory: Optional[PlaneFactory] = None):
+        """
+        Adds new plane after existing ones. It is not activated.
+        """
+        if plane.text in self._planes:
+            return
+        self._add_plane_entry(plane)
+        if factory is not None:
+            self.set_plane_factory(plane, factory)
+
+    def set_visible_planes(self, plane_names: list[str | PlaneSwitch]):
+        """
+        Shows buttons of the given planes in given order and hides all others, planes are kept
+        for the later reuse. If selected plane becomes hidden, the first visible one is activated.
+        """
+        visible = [
+            name
+            for name in (self._plane_key(p) for p in plane_names)
+            if name in self._planes
+        ]
+        for plane in self._planes.values():
+            if plane.button:
+                plane.button.grid_remove()
+        for column, name in enumerate(visible):
+            button = self._planes[name].button
+            if button:
+                button.grid(row=0, column=column, sticky=tk.NW)
+
+        if self._selected_plane in visible:
+            return
+        if visible:
+            self.activate_plane(visible[0])
+            return
+        self._selected_plane = ""
+        for plane in self._planes.values():
+            if plane.panel is not None:
+                plane.panel.grid_remove()
+
+    @staticmethod
+    def _plane_key(plane_name: str | PlaneSwitch) -> str:
+        return plane_name.text if isinstance(plane_name, PlaneSwitch) else plane_name
+
+    def set_plane_factory(self, plane_name: str | PlaneSwitch, factory: PlaneFactory):
+        """
+        Sets builder of the plane's content. It is called on the first activation of the plane,
+        or immediately if plane is already shown.
+        """
+        name = self._plane_key(plane_name)
+        plane = self._planes[name]
+        plane.factory = factory
+        if plane.panel is not None and name == self._selected_plane:
+            self._build_plane(name)
+
+    def is_plane_built(self, plane_name: str | PlaneSwitch) -> bool:
+        plane = self._planes.get(self._plane_key(plane_name), None)
+        return plane is not None and plane.panel is not None and plane.factory is None
+
+    def _build_plane(self, name: str) -> tk.Frame:
+        """
+        Creates plane's frame and runs its factory if it was not done yet.
+        """
+        plane = self._planes[name]
+        if plane.panel is None:
+            plane.panel = tk.Frame(self)
+        factory = plane.factory
+        if factory is not None:
+            # Dropped before the call, so re-entrant access does not build it twice.
+            plane.factory = None
+            logger.debug("Building plane: %s", name)
+            factory(plane.panel)
+        return plane.panel
+
+    def _prewarm_next(self):
+        """
+        Builds one plane per idle callback, so Tk stays responsive between them.
+        """
+        self._prewarm_after_id = None
+        if not self.winfo_exists():
+            return
+        while self._prewarm_queue:
+            name = self._prewarm_queue.pop(0)
+            if not self.is_plane_built(name):
+                self._build_plane(name)
+                break
+        if self._prewarm_queue:
+            self._prewarm_after_id = self.after_idle(self._prewarm_next)
+
     def activate_plane(self, plane_name: str | PlaneSwitch):
         """
         Activates plane by given name.
         """
-        name: str = (
-            plane_name.text if isinstance(plane_name, PlaneSwitch) else plane_name
-        )
+        name = self._plane_key(plane_name)
 
         selected_plane = self._planes.get(name, None)
         if selected_plane:
@@ -117,22 +225,44 @@ class MultiPlanesWidget(tk.Frame):
             for plane in self._planes.values():
                 if plane.button:
                     plane.button.config(relief=tk.RAISED, state=tk.NORMAL)
-                plane.panel.grid_remove()
+                if plane.panel is not None:
+                    plane.panel.grid_remove()
             if selected_plane.button:
                 selected_plane.button.config(relief=tk.SUNKEN, state=tk.DISABLED)
             self.grid_rowconfigure(1, weight=1)  # Content
             self.grid_columnconfigure(0, weight=1)
-            selected_plane.panel.grid(row=1, column=0, sticky=tk.NSEW)
-            selected_plane.panel.grid_rowconfigure(0, weight=1)
-            selected_plane.panel.grid_columnconfigure(0, weight=1)
+            panel = self._build_plane(name)
+            panel.grid(row=1, column=0, sticky=tk.NSEW)
+            panel.grid_rowconfigure(0, weight=1)
+            panel.grid_columnconfigure(0, weight=1)
+
+    def bind_plane_button(
+        self,
+        plane_name: str | PlaneSwitch,
+        sequence: str,
+        handler: Callable[[tk.Event], Any],
+    ):
+        """
+        Adds extra binding to the button of the plane, for example to reach hidden planes.
+        """
+        selected_plane = self._planes.get(self._plane_key(plane_name), None)
+        if selected_plane and selected_plane.button:
+            selected_plane.button.bind(sequence, handler, add="+")
 
     @property
     def plane_frames(self) -> Mapping[str | PlaneSwitch, tk.Frame]:
-        return MultiPlanesWidget._PlaneDictView(self._planes)
+        """
+        Accessing the frame builds the plane (creates frame and runs its factory).
+        """
+        return MultiPlanesWidget._PlaneDictView(self)
 
     @property
     def active_plane_frame(self) -> tk.Frame:
-        logger.debug(
-            f"Active pane: {self._selected_plane} ({self.plane_frames[self._selected_plane]})"
-        )
+        logger.debug("Active pane: %s", self._selected_plane)
         return self.plane_frames[self._selected_plane]
+
+    def is_plane_active(self, plane_name: str | PlaneSwitch) -> bool:
+        """
+        Cheap check if given plane is the selected one.
+        """
+        return self._plane_key(plane_name) == self._selected_plane
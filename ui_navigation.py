@@ -1,13 +1,17 @@
 # from external_web_search import FilterSellFromEDSM
 
 from ui_station_input import UiStationInput
+from ui_station_search import UiStationSearch
 from ui_system_input import UiSystemInput, SystemNamesReceiver
 from ui_multy_planes_widget import MultiPlanesWidget, PlaneSwitch
 from ui_table import CanvasTableView
+from task_runner import LatestWinsTaskRunner
 import tkinter as tk
-from _logger import logger
+from _logger import get_logger
 import translation
 
+logger = get_logger("ui")
+
 
 class _NavigationPlanes:
     NavigatedSystemSelect = PlaneSwitch(
@@ -23,13 +27,26 @@ class _NavigationPlanes:
         has_button=False,
     )
 
+    NavigatedStationSearch = PlaneSwitch(
+        text=translation.ptl("Find Station"),
+        tooltip=translation.ptl("Find station by name in all systems known to plugin."),
+        has_button=True,
+    )
+
 
 class UiNavigationPlane(tk.Frame):
     """
     Wizard-like component, once user selects system, it switches to stations.
     """
 
-    def __init__(self, target_table: CanvasTableView, master=None, **kwargs):  # type: ignore
+    def __init__(
+        self,
+        target_table: CanvasTableView,
+        systems_receiver: SystemNamesReceiver,
+        task_runner: LatestWinsTaskRunner,
+        master=None,  # type: ignore
+        **kwargs,  # type: ignore
+    ):
         super().__init__(master, **kwargs)  # type: ignore
 
         # Wizard planes
@@ -37,13 +54,20 @@ class UiNavigationPlane(tk.Frame):
             [
                 _NavigationPlanes.NavigatedSystemSelect,
                 _NavigationPlanes.NavigatedStationSelect,
+                _NavigationPlanes.NavigatedStationSearch,
             ],
             self,
+            factories={
+                _NavigationPlanes.NavigatedStationSearch: lambda frame: UiStationSearch(
+                    target_table, task_runner, frame
+                )
+            },
         )
 
         # System selection.
         self._system_input = UiSystemInput(
             self._user_provided_system_name,
+            systems_receiver,
             self._sys_station_wizard.plane_frames[
                 _NavigationPlanes.NavigatedSystemSelect
             ],
@@ -52,6 +76,7 @@ class UiNavigationPlane(tk.Frame):
         # Station selection. Once station is selected, component will signal coloring to cargo table.
         self._station_input = UiStationInput(
             target_table,
+            task_runner,
             self._sys_station_wizard.plane_frames[
                 _NavigationPlanes.NavigatedStationSelect
             ],
@@ -60,13 +85,6 @@ class UiNavigationPlane(tk.Frame):
         self.grid_columnconfigure(0, weight=1)
         self.grid(row=0, column=0, sticky="nsew")
 
-    def get_systems_receiver(self) -> SystemNamesReceiver:
-        """
-        Provides "new system known" events listener.
-        User may do something inside game which generates different systems and those will be sent here.
-        """
-        return self._system_input
-
     def _user_provided_system_name(self, system_name: str):
         """
         User finalized system entry on 1st wizard's pane.
@@ -75,7 +93,7 @@ class UiNavigationPlane(tk.Frame):
         system_name = system_name.strip()
         if not system_name:
             return
-        logger.debug(f"User selected system: {system_name}")
+        logger.debug("User selected system: %s", system_name)
         self._station_input.set_target_system(system_name)
         self._sys_station_wizard.activate_plane(
             _NavigationPlanes.NavigatedStationSelect
@@ -0,0 +1,341 @@
+import tkinter as tk
+from tkinter import ttk
+from typing import Any, Optional, TypeAlias
+from cargo_names import MarketCatalogue
+from carrier_cargo_ledger import CarrierCargoLedger
+from carrier_helpers import CarrierIdentity, CarrierPosition
+from edsm_sphere_scan import EdsmSphereScan, SphereScanProgress
+from journal_worker import JournalWorker
+from known_markets import KnownMarkets
+from route_planner import CarrierRoutePlanner, RoutePlan
+from sell_on_station import FilterSellOnKnownMarket
+from sell_plan import SellPlanStop, SellPlanner
+from system_coords import SystemCoordinates
+from task_runner import CancelToken, LatestWinsTaskRunner
+from ui_base_filter_plane import UiBaseFilteredPlane
+from ui_system_input import SystemNamesReceiver
+from ui_table import CanvasTableView
+from ui_tooltip import Tooltip
+import fleetcarriercargo
+import translation
+
+# Known markets' revision and cargo the plan was computed for.
+_PlanInput: TypeAlias = tuple[int, tuple[tuple[int, int], ...]]
+
+
+class UiSellPlan(UiBaseFilteredPlane):
+    """
+    Ordered list of the stations to empty the carrier in as few stops as possible.
+    Only markets plugin already knows are used, nothing is fetched. Plan is computed in background.
+    Below it, carrier's jumps from its system can be planned to sell the most per jump
+    and EDSM can be scanned for the buyers around the carrier.
+    """
+
+    REFRESH_DELAY_MS = 500
+
+    def __init__(
+        self,
+        target_table: CanvasTableView,
+        task_runner: LatestWinsTaskRunner,
+        journal_worker: JournalWorker,
+        systems_receiver: SystemNamesReceiver,
+        master=None,  # type: ignore
+        **kwargs,  # type: ignore
+    ):
+        super().__init__(target_table, master, **kwargs)  # type: ignore
+        self._task_runner = task_runner
+        self._journal_worker = journal_worker
+        self._systems_receiver = systems_receiver
+        self._stops: list[SellPlanStop] = []
+        self._computed_for: Optional[_PlanInput] = None
+        self._refresh_after_id: Optional[str] = None
+        self._scan_progress: Optional[SphereScanProgress] = None
+
+        self.rowconfigure(1, weight=1)
+
+        self._summary = ttk.Label(self, text="")
+        self._summary.grid(row=0, column=0, columnspan=2, sticky="w")
+
+        self._stops_list = tk.Listbox(self, height=6)
+        scrollbar = tk.Scrollbar(
+            self,
+            orient=tk.VERTICAL,
+            command=self._stops_list.yview,  # type: ignore
+        )
+        self._stops_list.config(yscrollcommand=scrollbar.set)
+        self._stops_list.grid(row=1, column=0, sticky="nsew")
+        scrollbar.grid(row=1, column=1, sticky="ns")
+        self._stops_list.bind("<<ListboxSelect>>", self._on_stop_select)
+        Tooltip(
+            self._stops_list,
+            translation.ptl(
+                "Stations from the markets seen while docked or picked in navigation. Select to highlight."
+            ),
+        )
+
+        route_button = ttk.Button(
+            self, text=translation.ptl("Plan Carrier Jumps"), command=self._plan_route
+        )
+        route_button.grid(row=2, column=0, columnspan=2, sticky="w", pady=(3, 0))
+        Tooltip(
+            route_button,
+            translation.ptl(
+                "Plan carrier's jumps from the current system to known markets, the most value per jump."
+            ),
+        )
+        self._route_list = tk.Listbox(self, height=4)
+        self._route_list.grid(row=3, column=0, columnspan=2, sticky="nsew")
+
+        scan_button = ttk.Button(
+            self, text=translation.ptl("Scan EDSM Nearby"), command=self._scan_sphere
+        )
+        scan_button.grid(row=4, column=0, columnspan=2, sticky="w", pady=(3, 0))
+        Tooltip(
+            scan_button,
+            translation.ptl(
+                "Fetch stations and markets of populated systems within 100 ly of the carrier (EDSM's limit) "
+                "and list those buying the cargo, the most valuable first. Select to highlight."
+            ),
+        )
+        self._scan_list = tk.Listbox(self, height=5)
+        self._scan_list.grid(row=5, column=0, columnspan=2, sticky="nsew")
+        self._scan_list.bind("<<ListboxSelect>>", self._on_scan_select)
+
+        self.grid(row=0, column=0, sticky="nsew", padx=3, pady=3)
+        self.refresh()
+
+    def refresh(self):
+        """
+        Requests recomputing of the plan in background. Called in Tk thread.
+        Requests coming within REFRESH_DELAY_MS (like markets of EDSM scan) are merged into one.
+        """
+        if self._refresh_after_id is None:
+            self._refresh_after_id = self.after(
+                type(self).REFRESH_DELAY_MS, self._start_refresh
+            )
+
+    def _start_refresh(self):
+        self._refresh_after_id = None
+        previous = self._computed_for
+        exclude_station = CarrierIdentity.call_sign()
+        self._task_runner.submit(
+            "sell_plan",
+            lambda token: type(self)._compute_plan(previous, exclude_station),
+            self._show_plan,
+        )
+
+    @staticmethod
+    def _compute_plan(
+        previous: Optional[_PlanInput], exclude_station: str
+    ) -> Optional[tuple[_PlanInput, dict[int, int], list[SellPlanStop]]]:
+        """
+        Returns None if cargo and known markets did not change since the previous plan.
+        """
+        cargo = UiSellPlan._read_cargo()
+        computed_for = (KnownMarkets.revision(), tuple(sorted(cargo.items())))
+        if computed_for == previous:
+            return None
+        return (
+            computed_for,
+            cargo,
+            SellPlanner.plan(cargo, exclude_station=exclude_station),
+        )
+
+    def _show_plan(
+        self, result: Optional[tuple[_PlanInput, dict[int, int], list[SellPlanStop]]]
+    ):
+        if result is None:
+            return
+        self._computed_for, cargo, self._stops = result
+        self._stops_list.delete(0, tk.END)
+        self._stops_list.insert(
+            tk.END,
+            *(
+                translation.ptl(
+                    f"{index}. {stop.market.station_name}"
+                    + (
+                        f" | {stop.market.system_name}"
+                        if stop.market.system_name
+                        else ""
+                    )
+                    + f": {len(stop.sold)} commodities, {stop.value:,} Cr"
+                )
+                for index, stop in enumerate(self._stops, start=1)
+            ),
+        )
+        total = sum(cargo.values())
+        sold = sum(sum(stop.sold.values()) for stop in self._stops)
+        if self._stops:
+            self._summary.config(
+                text=translation.ptl(
+                    f"{len(self._stops)} stops sell {sold:,} of {total:,} t"
+                )
+            )
+        else:
+            self._summary.config(
+                text=translation.ptl("No known market buys the cargo yet.")
+            )
+
+    @staticmethod
+    def _read_cargo() -> dict[int, int]:
+        """
+        Returns commodity id -> quantity on carrier, including local ledger's changes.
+        """
+        result: dict[int, int] = {}
+
+        def reader(call_sign: str | None, cargo: fleetcarriercargo.CargoTally) -> bool:
+            for _, commodity, quantity in CarrierCargoLedger.adjusted_items(cargo):
+                market = MarketCatalogue.explain_commodity(commodity)
+                if market:
+                    result[market.id] = result.get(market.id, 0) + quantity
+            return False
+
+        fleetcarriercargo.FleetCarrierCargo.inventory(reader)
+        return result
+
+    def _carrier_system(self) -> str:
+        """
+        Carrier's system, commander's one if carrier's position is not known.
+        """
+        return CarrierPosition.system() or self._systems_receiver.current_system
+
+    def _plan_route(self):
+        origin = self._carrier_system()
+        self._route_list.delete(0, tk.END)
+        if not origin:
+            self._route_list.insert(
+                tk.END, translation.ptl("Carrier's system is unknown.")
+            )
+            return
+        cargo = type(self)._read_cargo()
+        exclude_station = CarrierIdentity.call_sign()
+        self._route_list.insert(tk.END, translation.ptl("Planning..."))
+        self._task_runner.submit(
+            "route_plan",
+            lambda token: type(self)._compute_route(
+                origin, cargo, exclude_station, token
+            ),
+            self._show_route,
+            self._show_route_error,
+        )
+
+    @staticmethod
+    def _compute_route(
+        origin: str, cargo: dict[int, int], exclude_station: str, token: CancelToken
+    ) -> Optional[RoutePlan]:
+        # Coordinates of the known markets' systems are asked from EDSM only once.
+        _, _, markets = KnownMarkets.snapshot()
+        SystemCoordinates.fetch_missing(
+            [origin] + [market.system_name for market, _ in markets], token
+        )
+        return CarrierRoutePlanner.plan(
+            origin, cargo, exclude_station=exclude_station, cancel_token=token
+        )
+
+    def _show_route(self, plan: Optional[RoutePlan]):
+        self._route_list.delete(0, tk.END)
+        if plan is None:
+            self._route_list.insert(
+                tk.END, translation.ptl("No reachable known market buys the cargo.")
+            )
+            return
+        self._route_list.insert(
+            tk.END,
+            translation.ptl(f"{plan.value:,} Cr in {plan.jumps} jumps"),
+            *(
+                translation.ptl(
+                    f"{index}. {leg.system_name}: {leg.jumps} jumps, {leg.distance:.0f} ly, {leg.value:,} Cr"
+                )
+                for index, leg in enumerate(plan.legs, start=1)
+            ),
+        )
+
+    def _show_route_error(self, error: Exception):
+        self._route_list.delete(0, tk.END)
+        self._route_list.insert(
+            tk.END, translation.ptl(f"Could not plan carrier's jumps: {error}")
+        )
+
+    def _scan_sphere(self):
+        center = self._carrier_system()
+        self._scan_progress = None
+        self._scan_list.delete(0, tk.END)
+        if not center:
+            self._scan_list.insert(
+                tk.END, translation.ptl("Carrier's system is unknown.")
+            )
+            return
+        cargo = type(self)._read_cargo()
+        exclude_station = CarrierIdentity.call_sign()
+        self._scan_list.insert(tk.END, translation.ptl("Scanning..."))
+
+        def work(token: CancelToken) -> SphereScanProgress:
+            return EdsmSphereScan.scan(
+                center,
+                cargo,
+                lambda progress: self._post_scan_progress(progress, token),
+                token,
+                exclude_station=exclude_station,
+            )
+
+        self._task_runner.submit(
+            "sphere_scan", work, self._show_scan, self._show_scan_error
+        )
+
+    def _post_scan_progress(self, progress: SphereScanProgress, token: CancelToken):
+        """
+        Called from background thread, only the latest progress is rendered once Tk is free.
+        """
+        if token.cancelled:
+            return
+
+        def render():
+            if not token.cancelled:
+                self._show_scan(progress)
+
+        self._journal_worker.post_render(render, "sphere_scan")
+
+    def _show_scan(self, progress: SphereScanProgress):
+        self._scan_progress = progress
+        self._scan_list.delete(0, tk.END)
+        finished = progress.systems_done >= progress.systems_total
+        self._scan_list.insert(
+            tk.END,
+            translation.ptl(
+                f"{progress.systems_done} of {progress.systems_total} systems scanned"
+                + ("" if finished else "...")
+            ),
+            *(
+                translation.ptl(
+                    f"{buyer.market.station_name} | {buyer.market.system_name}: "
+                    f"{buyer.distance:.0f} ly, {buyer.value:,} Cr"
+                )
+                for buyer in progress.buyers
+            ),
+        )
+
+    def _show_scan_error(self, error: Exception):
+        self._scan_list.delete(0, tk.END)
+        self._scan_list.insert(tk.END, translation.ptl(f"Could not scan EDSM: {error}"))
+
+    def _on_scan_select(self, event: Any):
+        selection = self._scan_list.curselection()
+        # The first line is progress.
+        if not selection or self._scan_progress is None or selection[0] == 0:
+            return
+        buyers = self._scan_progress.buyers
+        if selection[0] > len(buyers):
+            return
+        self._set_current_highlighter(
+            FilterSellOnKnownMarket(buyers[selection[0] - 1].market)
+        )
+        self._activate_current_highlighter()
+
+    def _on_stop_select(self, event: Any):
+        selection = self._stops_list.curselection()
+        if not selection or selection[0] >= len(self._stops):
+            return
+        self._set_current_highlighter(
+            FilterSellOnKnownMarket(self._stops[selection[0]].market)
+        )
+        self._activate_current_highlighter()
@@ -5,127 +5,123 @@ from external_web_search import (
     FilterSellFromEDSM,
     FilteredEdsmStation,
 )
-from stations_rows_click_menu import RightClickContextMenuForStationsList
 from ui_base_filter_plane import UiBaseFilteredPlane
 from ui_multy_planes_widget import MultiPlanesWidget, PlaneSwitch
 from ui_table import CanvasTableView
-import threading
-import queue
-from _logger import logger
+from task_runner import LatestWinsTaskRunner
+from _logger import get_logger
 import translation
 import tkinter as tk
 
+logger = get_logger("ui")
+
 
 class UiStationInput(UiBaseFilteredPlane):
-    def __init__(self, target_table: CanvasTableView, master=None, **kwargs):  # type: ignore
+    def __init__(
+        self,
+        target_table: CanvasTableView,
+        task_runner: LatestWinsTaskRunner,
+        master=None,  # type: ignore
+        **kwargs,  # type: ignore
+    ):
         super().__init__(target_table, master, **kwargs)  # type: ignore
 
         self.rowconfigure(0, weight=1)
         self.columnconfigure(0, weight=1)
 
-        self._edsm_data_queue: queue.Queue[EdsmPerStationTypeResponse] = queue.Queue(
-            maxsize=5
-        )
-
-        self._process_queue_scheduled = False
-        self._check_retries: int = 0
+        self._task_runner = task_runner
         self._visible_stations: Optional[MultiPlanesWidget] = None
-
-    def _fetch_stations_thread(self, system_name: str):
-        stations = EdsmCachedAccess.get_stations_in_system(system_name)
-        self._edsm_data_queue.put(stations)
+        # One listbox per category ever seen, refilled for each selected system.
+        self._station_listboxes: dict[str, tk.Listbox] = {}
 
     def set_target_system(self, system_name: str):
-        """Called when user has selected the system."""
-        if not self._process_queue_scheduled:
-            threading.Thread(
-                target=self._fetch_stations_thread, args=(system_name,), daemon=True
-            ).start()
-            self._check_retries = 0
-            self._delayed_check_in_ui_thread()
-
-    def _receive_edsm_data_in_ui_thread(self):
-        self._check_retries += 1
-        try:
-            stations = self._edsm_data_queue.get_nowait()
-        except queue.Empty:
-            self._delayed_check_in_ui_thread()
-            return
-        self._process_queue_scheduled = False
-        self._update_ui_with_stations(stations)
-
-    def _delayed_check_in_ui_thread(self):
-        if self._check_retries > 60:
-            self._process_queue_scheduled = False
-            logger.error(
-                f"Something went wrong, couldn't read EDSM data in {self._check_retries} retries."
-            )
-            return
-        self._process_queue_scheduled = True
-        self.after(100, self._receive_edsm_data_in_ui_thread)
+        """Called when user has selected the system. Newer system supersedes one still loading."""
+        self._task_runner.submit(
+            "stations",
+            lambda token: EdsmCachedAccess.get_stations_in_system(system_name, token),
+            self._update_ui_with_stations,
+            lambda e: logger.error(
+                "Could not get stations of %s from EDSM: %s", system_name, e
+            ),
+        )
 
     def _update_ui_with_stations(self, stations: EdsmPerStationTypeResponse):
         """
         Now we have all stations from EDSM. Time to update UI.
+        Listboxes are reused between systems, only their content is replaced.
         """
         logger.debug(
-            f"Got list of the stations in the system of {len(stations)} categories."
+            "Got list of the stations in the system of %d categories.",
+            stations.type_count(),
         )
-        if self._visible_stations:
-            self._visible_stations.destroy()
-            self._visible_stations = None
-
-        # Remaping ports' categories to some shorter ones.
-        mapped_types = {
-            mapped
-            for pt in stations
-            if (mapped := type(self).map_station_type(pt)) and mapped[0]
-        }
-        planes_by_type = [PlaneSwitch(pt[0], pt[1]) for pt in sorted(mapped_types)]
-        self._visible_stations = MultiPlanesWidget(planes_by_type, self)
+        if self._visible_stations is None:
+            self._visible_stations = MultiPlanesWidget([], self)
 
         # Some couple station types could be re-mapped to the same UI name.
         # We must keep exact lists visible and stored, becaus listbox gives us index.
         stations_per_ui_name: dict[str, list[FilteredEdsmStation]] = {}
+        hints: dict[str, str] = {}
         for category, category_stations in stations.items():
-            ui_name, _ = type(self).map_station_type(category)
+            ui_name, hint = type(self).map_station_type(category)
             if not ui_name:
                 continue
+            hints[ui_name] = hint
             stations_per_ui_name.setdefault(ui_name, []).extend(category_stations)
 
-        for ui_name, stations_list in stations_per_ui_name.items():
-            stations_per_ui_name[ui_name] = sorted(
-                stations_list, key=lambda s: s.station_name
-            )
-
-        for ui_name, category_stations in stations_per_ui_name.items():
-            frame = self._visible_stations.plane_frames[ui_name]
-            listbox = tk.Listbox(frame)
-            scrollbar = tk.Scrollbar(
-                frame,
-                orient=tk.VERTICAL,
-                command=listbox.yview,  # type: ignore
+        visible_names = sorted(stations_per_ui_name)
+        for ui_name in visible_names:
+            listbox = self._station_listboxes.get(ui_name)
+            if listbox is None:
+                listbox = self._create_station_listbox(ui_name, hints[ui_name])
+            category_stations = sorted(
+                stations_per_ui_name[ui_name], key=lambda s: s.station_name
             )
-            listbox.config(yscrollcommand=scrollbar.set)
-            listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-            scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
             listbox._stations_objects = category_stations  # type: ignore
-
-            for st in category_stations:
-                listbox.insert(
-                    tk.END,
-                    st.station_name
-                    if st.pads_information == ""
-                    else f"{st.station_name}({st.pads_information})",
-                )
-            listbox.bind("<<ListboxSelect>>", self._on_station_select)
-            listbox.bind(
-                "<Button-3>",
-                lambda event, lb=listbox: self._on_right_mouse_click(lb, event),  # type: ignore
+            listbox.delete(0, tk.END)
+            listbox.insert(
+                tk.END,
+                *(
+                    (
+                        st.station_name
+                        if st.pads_information == ""
+                        else f"{st.station_name}({st.pads_information})"
+                    )
+                    for st in category_stations
+                ),
             )
+            listbox.yview_moveto(0)
+
+        # Categories absent in this system are hidden and emptied, but kept for the next ones.
+        for ui_name, listbox in self._station_listboxes.items():
+            if ui_name not in stations_per_ui_name:
+                listbox._stations_objects = []  # type: ignore
+                listbox.delete(0, tk.END)
+        self._visible_stations.set_visible_planes(visible_names)  # type: ignore
 
         self.grid(row=0, column=0, sticky="nsew", padx=3, pady=3)
 
+    def _create_station_listbox(self, ui_name: str, hint: str) -> tk.Listbox:
+        assert self._visible_stations is not None
+        self._visible_stations.add_plane(PlaneSwitch(ui_name, hint))
+        frame = self._visible_stations.plane_frames[ui_name]
+        listbox = tk.Listbox(frame)
+        scrollbar = tk.Scrollbar(
+            frame,
+            orient=tk.VERTICAL,
+            command=listbox.yview,  # type: ignore
+        )
+        listbox.config(yscrollcommand=scrollbar.set)
+        listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        listbox._stations_objects = []  # type: ignore
+        listbox.bind("<<ListboxSelect>>", self._on_station_select)
+        listbox.bind(
+            "<Button-3>",
+            lambda event, lb=listbox: self._on_right_mouse_click(lb, event),  # type: ignore
+        )
+        self._station_listboxes[ui_name] = listbox
+        return listbox
+
     def _on_station_select(self, event: Any):
         widget = event.widget
         selection = widget.curselection()
@@ -133,11 +129,17 @@ class UiStationInput(UiBaseFilteredPlane):
             index = selection[0]
             station_obj = widget._stations_objects[index]  # type: ignore
 
-            def worker():
-                highlighter = FilterSellFromEDSM(station_obj)
-                self.after(0, lambda: self._apply_highlighter(highlighter))
-
-            threading.Thread(target=worker, daemon=True).start()
+            # Only the last selected station is applied, even if older ones respond later.
+            self._task_runner.submit(
+                "highlighter",
+                lambda token: FilterSellFromEDSM(station_obj, token),
+                self._apply_highlighter,
+                lambda e: logger.error(
+                    "Could not get market of %s from EDSM: %s",
+                    station_obj.station_name,
+                    e,
+                ),
+            )
 
     def _apply_highlighter(self, highlighter: FilterSellFromEDSM):
         self._set_current_highlighter(highlighter)
@@ -145,9 +147,11 @@ class UiStationInput(UiBaseFilteredPlane):
 
     def _on_right_mouse_click(self, listbox: tk.Listbox, event: tk.Event):
         index = listbox.nearest(event.y)  # type: ignore
-        logger.debug(f"Right mouse stations click at index {index}")
+        logger.debug("Right mouse stations click at index %s", index)
         if index is not None:
             station_obj: FilteredEdsmStation = listbox._stations_objects[index]  # type: ignore
+            from stations_rows_click_menu import RightClickContextMenuForStationsList
+
             menu = RightClickContextMenuForStationsList(listbox, station_obj)  # type: ignore
             menu.popup(event)  # type: ignore
 
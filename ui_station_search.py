@@ -0,0 +1,100 @@
+import tkinter as tk
+from tkinter import ttk
+from typing import Any
+from _logger import get_logger
+from external_web_search import FilterSellFromEDSM, FilteredEdsmStation
+from station_index import StationNamesIndex
+from task_runner import LatestWinsTaskRunner
+from ui_base_filter_plane import UiBaseFilteredPlane
+from ui_table import CanvasTableView
+from ui_tooltip import Tooltip
+import translation
+
+logger = get_logger("ui")
+
+
+class UiStationSearch(UiBaseFilteredPlane):
+    """
+    Finds station by part of its name over all stations known to the plugin, regardless of the system.
+    Selected station is used for highlighting directly.
+    """
+
+    def __init__(
+        self,
+        target_table: CanvasTableView,
+        task_runner: LatestWinsTaskRunner,
+        master=None,  # type: ignore
+        **kwargs,  # type: ignore
+    ):
+        super().__init__(target_table, master, **kwargs)  # type: ignore
+        self._task_runner = task_runner
+        self._found: list[FilteredEdsmStation] = []
+
+        self.rowconfigure(1, weight=1)
+        self.columnconfigure(0, weight=1)
+
+        self._query_value = tk.StringVar()
+        self._query_value.trace_add("write", self._on_query_changed)
+        entry = ttk.Entry(self, textvariable=self._query_value, width=25)
+        entry.grid(row=0, column=0, columnspan=2, sticky="nwe")
+        Tooltip(
+            entry,
+            translation.ptl("Part of the station's name, any system known to plugin."),
+        )
+
+        self._results_list = tk.Listbox(self, height=6)
+        scrollbar = tk.Scrollbar(
+            self,
+            orient=tk.VERTICAL,
+            command=self._results_list.yview,  # type: ignore
+        )
+        self._results_list.config(yscrollcommand=scrollbar.set)
+        self._results_list.grid(row=1, column=0, sticky="nsew")
+        scrollbar.grid(row=1, column=1, sticky="ns")
+        self._results_list.bind("<<ListboxSelect>>", self._on_station_select)
+
+        self.grid(row=0, column=0, sticky="nsew", padx=3, pady=3)
+
+    def _on_query_changed(self, _1: str, _2: str, _3: str):
+        query = self._query_value.get()
+        # Index is loaded from disk on the first query, so search is done out of Tk thread.
+        self._task_runner.submit(
+            "station_search",
+            lambda token: StationNamesIndex.search(query),
+            self._show_results,
+        )
+
+    def _show_results(self, stations: list[FilteredEdsmStation]):
+        self._found = stations
+        self._results_list.delete(0, tk.END)
+        self._results_list.insert(
+            tk.END,
+            *(
+                f"{st.station_name} | {st.system_name}"
+                + (f" ({st.pads_information})" if st.pads_information else "")
+                for st in stations
+            ),
+        )
+
+    def _on_station_select(self, event: Any):
+        selection = self._results_list.curselection()
+        if not selection or selection[0] >= len(self._found):
+            return
+        station = self._found[selection[0]]
+        logger.debug(
+            "Station selected by search: %s in %s",
+            station.station_name,
+            station.system_name,
+        )
+        self._task_runner.submit(
+            "highlighter",
+            lambda token: FilterSellFromEDSM(station, token),
+            self._apply_highlighter,
+            lambda e: logger.error(
+                "Could not get market of %s from EDSM: %s", station.station_name, e
+            ),
+        )
+
+    def _apply_highlighter(self, highlighter: FilterSellFromEDSM):
+        self._set_current_highlighter(highlighter)
+        self._activate_current_highlighter()
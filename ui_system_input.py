@@ -1,13 +1,16 @@
 import tkinter as tk
 from tkinter import ttk
-from typing import Optional, Protocol
+from typing import Callable, Optional, Protocol
 import translation
+from system_names_index import SystemNamesIndex
 from ui_tooltip import Tooltip
 
 
 class SystemNamesReceiver:
     """
     Signal from plugin/game to UiSystemInput which means some option(s) for user to pick one is(are) ready.
+    It lives independently of UI, so systems are tracked even if UiSystemInput was not built yet.
+    Setters store seen systems on disk, so those are called from the journal worker, not EDMC's thread.
     """
 
     def __init__(self):
@@ -15,16 +18,49 @@ class SystemNamesReceiver:
         self._current_system: str = ""
         self._route_navigated_final_system: str = ""
         self._targeted_system: str = ""
+        self._on_systems_changed: list[Callable[["SystemNamesReceiver"], None]] = []
+
+    @property
+    def current_system(self) -> str:
+        return self._current_system
+
+    @property
+    def navigated_final_system(self) -> str:
+        return self._route_navigated_final_system
+
+    @property
+    def targeted_system(self) -> str:
+        return self._targeted_system
+
+    def add_on_systems_changed_handler(
+        self, handler: Callable[["SystemNamesReceiver"], None]
+    ):
+        """
+        Handler is called with this receiver when any system changes, from the thread which set it.
+        """
+        self._on_systems_changed.append(handler)
 
     def set_current_system(self, system: Optional[str]):
-        if system is not None:
+        if system is not None and system != self._current_system:
             self._current_system = system
+            SystemNamesIndex.add_seen(system)
+            self._notify()
 
     def set_navigated_final_system(self, system: str):
-        self._route_navigated_final_system = system
+        if system != self._route_navigated_final_system:
+            self._route_navigated_final_system = system
+            SystemNamesIndex.add_seen(system)
+            self._notify()
 
     def set_targeted_system(self, system: str):
-        self._targeted_system = system
+        if system != self._targeted_system:
+            self._targeted_system = system
+            SystemNamesIndex.add_seen(system)
+            self._notify()
+
+    def _notify(self):
+        for handler in self._on_systems_changed:
+            handler(self)
 
 
 class UserProvidedSystemName(Protocol):
@@ -35,7 +71,7 @@ class UserProvidedSystemName(Protocol):
     def __call__(self, system_name: str) -> None: ...
 
 
-class UiSystemInput(tk.Frame, SystemNamesReceiver):
+class UiSystemInput(tk.Frame):
     """
     Small component to receive system name from user in different ways.
     """
@@ -43,12 +79,13 @@ class UiSystemInput(tk.Frame, SystemNamesReceiver):
     def __init__(
         self,
         on_system_name_ready: UserProvidedSystemName,
+        systems_receiver: SystemNamesReceiver,
         parent_widget=None,  # type: ignore
         **kwargs,  # type: ignore
     ):  # type: ignore
         tk.Frame.__init__(self, parent_widget, **kwargs)  # type: ignore
-        SystemNamesReceiver.__init__(self)
 
+        self._systems_receiver = systems_receiver
         self._on_system_name_ready: UserProvidedSystemName = on_system_name_ready
 
         self.columnconfigure(0, weight=0)
@@ -77,13 +114,17 @@ class UiSystemInput(tk.Frame, SystemNamesReceiver):
         btn_current = ttk.Button(
             self,
             text=translation.ptl("Curr.Sys."),
-            command=lambda: self._system_entry_value.set(self._current_system),
+            command=lambda: self._use_known_system(
+                self._systems_receiver.current_system
+            ),
         )
 
         btn_selected = ttk.Button(
             self,
             text=translation.ptl("Next Sys."),
-            command=lambda: self._system_entry_value.set(self._targeted_system),
+            command=lambda: self._use_known_system(
+                self._systems_receiver.targeted_system
+            ),
         )
         Tooltip(
             btn_selected,
@@ -97,8 +138,8 @@ class UiSystemInput(tk.Frame, SystemNamesReceiver):
         btn_dest = ttk.Button(
             self,
             text=translation.ptl("Nav.Dest."),
-            command=lambda: self._system_entry_value.set(
-                self._route_navigated_final_system
+            command=lambda: self._use_known_system(
+                self._systems_receiver.navigated_final_system
             ),
         )
         Tooltip(
@@ -107,6 +148,16 @@ class UiSystemInput(tk.Frame, SystemNamesReceiver):
         )
         btn_dest.grid(row=1, column=1, padx=0)
 
+        # Suggestions from local index of the systems, hidden while there are none.
+        self._suggestions_list = tk.Listbox(self, height=4, width=15)
+        self._suggestions_list.grid(row=1, column=0, rowspan=2, sticky="nwe")
+        self._suggestions_list.grid_remove()
+        # Not on <<ListboxSelect>>, so keyboard can move over the list before picking.
+        self._suggestions_list.bind("<ButtonRelease-1>", self._on_suggestion_selected)
+        self._suggestions_list.bind("<Return>", self._on_suggestion_selected)
+        self._system_entry_widget.bind("<Return>", self._on_entry_return)
+        self._system_entry_widget.bind("<Down>", self._on_entry_down)
+
         self.grid(row=0, column=0, sticky="nw", padx=3, pady=3)
 
     def get_system_name(self) -> str:
@@ -115,6 +166,17 @@ class UiSystemInput(tk.Frame, SystemNamesReceiver):
         """
         return self._system_entry_value.get()
 
+    def _use_known_system(self, system_name: str):
+        """
+        System known from the game is sent at once, without waiting for the user to type more.
+        Its stations are usually prefetched already.
+        """
+        self._system_entry_value.set(system_name)
+        self._cancel_debounce()
+        self._show_suggestions([])
+        if system_name:
+            self._system_name_ready(system_name)
+
     def _paste_from_clipboard(self):
         try:
             clipboard = self.clipboard_get()
@@ -123,14 +185,70 @@ class UiSystemInput(tk.Frame, SystemNamesReceiver):
             pass  # Clipboard empty or unavailable
 
     def _on_system_entry_changed(self, _1: str, _2: str, _3: str):
+        self._cancel_debounce()
+        text = self._system_entry_value.get().strip()
+        if not text:
+            self._show_suggestions([])
+            return
+
+        canonical = SystemNamesIndex.canonical_name(text)
+        if canonical:
+            # Known name, there is nothing to suggest, short delay lets user continue typing.
+            self._show_suggestions([])
+            self._schedule_system_ready(canonical, 300)
+            return
+
+        self._show_suggestions(SystemNamesIndex.suggest(text))
+        if not SystemNamesIndex.has_catalogue():
+            # Without full catalogue unknown name could be valid, so EDSM decides.
+            self._schedule_system_ready(text, 1500)
+
+    def _cancel_debounce(self):
         if self._debounce_system_entry_after_id is not None:
             self.after_cancel(self._debounce_system_entry_after_id)
             self._debounce_system_entry_after_id = None
+
+    def _schedule_system_ready(self, system_name: str, delay_ms: int):
         self._debounce_system_entry_after_id = self.after(
-            1500, self._debounced_system_entry_callback
+            delay_ms, lambda: self._system_name_ready(system_name)
         )
 
-    def _debounced_system_entry_callback(self):
+    def _system_name_ready(self, system_name: str):
         self._debounce_system_entry_after_id = None
         if self._on_system_name_ready:
-            self._on_system_name_ready(self._system_entry_value.get())
+            self._on_system_name_ready(system_name)
+
+    def _show_suggestions(self, names: list[str]):
+        self._suggestions_list.delete(0, tk.END)
+        if not names:
+            self._suggestions_list.grid_remove()
+            return
+        self._suggestions_list.insert(tk.END, *names)
+        self._suggestions_list.grid()
+
+    def _on_suggestion_selected(self, _: tk.Event):
+        selection = self._suggestions_list.curselection()
+        name = self._suggestions_list.get(selection[0] if selection else tk.ACTIVE)
+        if name:
+            self._system_entry_value.set(name)
+            self._system_entry_widget.focus_set()
+            self._system_entry_widget.icursor(tk.END)
+
+    def _on_entry_down(self, _: tk.Event):
+        if self._suggestions_list.size() > 0:
+            self._suggestions_list.focus_set()
+            self._suggestions_list.selection_clear(0, tk.END)
+            self._suggestions_list.selection_set(0)
+            self._suggestions_list.activate(0)
+
+    def _on_entry_return(self, _: tk.Event):
+        """
+        Enter takes the first suggestion or, if there are none, sends typed name as is.
+        """
+        self._cancel_debounce()
+        if self._suggestions_list.size() > 0:
+            self._system_entry_value.set(self._suggestions_list.get(0))
+            return
+        text = self._system_entry_value.get().strip()
+        if text:
+            self._system_name_ready(SystemNamesIndex.canonical_name(text) or text)
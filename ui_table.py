@@ -1,19 +1,22 @@
 from itertools import accumulate
 import tkinter as tk
-from typing import Any, Optional
+from typing import Any, Callable, Optional
+from carrier_cargo_ledger import CarrierCargoLedger
 from carrier_cargo_position import CarrierCargoPosition
 from icons_cache import IconsCache
-from cargo_rows_rclick_menu import RightClickContextMenuForTable
+from metrics import Metrics
 from sell_on_station import FilterSellOnStationProtocol
 from theme import theme
 from translation import ptl
 import tkinter.font as tkfont
 import fleetcarriercargo
-from _logger import logger
+from _logger import get_logger
 from cargo_names import MarketCatalogue, MarketName
 from vertical_resize_handler import VerticalResizeHandler
 from vertical_wheel_scroll import CanvasVerticalMouseWheelScroller
 
+logger = get_logger("table", rate_limit_sec=1.0)
+
 
 class CanvasTableView:
     _PAD_Y_PER_ROW = 3
@@ -59,6 +62,13 @@ class CanvasTableView:
             None
         )
         self._color_market_on_station: Optional[FilterSellOnStationProtocol] = None
+        self._origin_system_provider: Callable[[], str] = lambda: ""
+
+    def set_origin_system_provider(self, provider: Callable[[], str]):
+        """
+        Provider of the system distances are measured from (nearest buyers in context menu).
+        """
+        self._origin_system_provider = provider
 
     @property
     def widget(self):
@@ -84,13 +94,13 @@ class CanvasTableView:
 
     def _update_column_widths(self):
         total_width = self._frame.winfo_width() - self._PAD_X_FOR_SCROLL_BAR
-        logger.debug(
-            f"Updating to total_width: {total_width}, {self.parent_frame.winfo_width()}"
-        )
+        logger.debug("Updating to total_width: %d", total_width)
         self._COLUMN_WIDTH[-1] = max(0, total_width - self._COLUMN_OFFSET[-1])
         self._TABLE_WIDTH = sum(self._COLUMN_WIDTH)
         logger.debug(
-            f"Table width {self._TABLE_WIDTH}, column width: {self._COLUMN_WIDTH[-1]}"
+            "Table width %d, column width: %d",
+            self._TABLE_WIDTH,
+            self._COLUMN_WIDTH[-1],
         )
         self.reset()
         self.populate_colored_carrier_data()
@@ -117,9 +127,7 @@ class CanvasTableView:
             frame.pack(side=tk.RIGHT, fill=tk.Y)
             vbar = tk.Scrollbar(frame, orient=tk.VERTICAL, command=self._canvas.yview)  # type: ignore
             vbar.pack(expand=True, fill=tk.BOTH)
-            sizegrip = tk.Label(
-                frame, image=IconsCache.icons["resize"], cursor="sizing"
-            )
+            sizegrip = tk.Label(frame, image=IconsCache.get("resize"), cursor="sizing")
             sizegrip.pack(side=tk.BOTTOM, anchor=tk.SE)
             # Vertical resize handling.
             self._resize_handler = VerticalResizeHandler(
@@ -158,7 +166,8 @@ class CanvasTableView:
         def updater(call_sign: str | None, cargo: fleetcarriercargo.CargoTally) -> bool:
             if self._canvas:
                 # +1 for "header" and +1 for "totals"
-                self._total_rows = 1 + len(cargo) + 1
+                items = CarrierCargoLedger.adjusted_items(cargo)
+                self._total_rows = 1 + len(items) + 1
                 if self._color_market_on_station:
                     self._total_rows = self._total_rows + 1  # for station name
 
@@ -176,25 +185,23 @@ class CanvasTableView:
                     )
                 )
                 logger.debug(
-                    f"We have total rows to draw in table/carrier: {self._total_rows}."
+                    "We have total rows to draw in table/carrier: %d.", self._total_rows
                 )
 
                 # This object must strictly correspond visible rows, so when user clicks something,
                 # we know what it was
                 self._last_drawn_items_in_rows_order = []
-                for cargo_key, amount in cargo.items():
-                    market = MarketCatalogue.explain_commodity(cargo_key.commodity)
+                for _, commodity, amount in items:
+                    market = MarketCatalogue.explain_commodity(commodity)
                     if market:
                         self._last_drawn_items_in_rows_order.append(
-                            CarrierCargoPosition((market, amount, cargo_key.commodity))
+                            CarrierCargoPosition((market, amount, commodity))
                         )
                     else:
                         market_name = MarketName(
-                            category="", trade_name=cargo_key.commodity, id=0
-                        )
-                        pos = CarrierCargoPosition(
-                            (market_name, amount, cargo_key.commodity)
+                            category="", trade_name=commodity, id=0
                         )
+                        pos = CarrierCargoPosition((market_name, amount, commodity))
                         self._last_drawn_items_in_rows_order.append(pos)
                 self._last_drawn_items_in_rows_order.sort(key=lambda x: x.category)
 
@@ -235,10 +242,11 @@ class CanvasTableView:
                         crop=crop,
                     )
 
-                logger.debug(f"Update finished of {self._total_rows} rows.")
+                logger.debug("Update finished of %d rows.", self._total_rows)
             return False
 
-        fleetcarriercargo.FleetCarrierCargo.inventory(updater)
+        with Metrics.timer("table.repaint"):
+            fleetcarriercargo.FleetCarrierCargo.inventory(updater)
 
     def _get_row_visible_height(self) -> int:
         """
@@ -314,12 +322,12 @@ class CanvasTableView:
 
     def _on_left_mouse_click(self, event: tk.Event):
         row, col = self._get_clicked_data_cell(event)
-        logger.debug(f"Left mouse click at adjusted row={row}, col={col}")
+        logger.debug("Left mouse click at adjusted row=%s, col=%s", row, col)
 
     def _on_right_mouse_click(self, event: tk.Event):
         row, col = self._get_clicked_data_cell(event)
 
-        logger.debug(f"Right mouse click at adjusted row={row}, col={col}")
+        logger.debug("Right mouse click at adjusted row=%s, col=%s", row, col)
 
         if row is None or col is None:
             logger.debug("Clicked outside valid data area")
@@ -327,8 +335,13 @@ class CanvasTableView:
 
         if self._canvas and self._last_drawn_items_in_rows_order:
             item = self._last_drawn_items_in_rows_order[row]
-            logger.debug(f"Right-clicked on {item}")
-            menu = RightClickContextMenuForTable(self._canvas, item)
+            logger.debug("Right-clicked on %s", item)
+            # Menu pulls web search, it is imported on the first use.
+            from cargo_rows_rclick_menu import RightClickContextMenuForTable
+
+            menu = RightClickContextMenuForTable(
+                self._canvas, item, self._origin_system_provider()
+            )
             menu.popup(event)
         else:
             logger.error("Canvas or data cell is/are not available during click event!")